@@ -0,0 +1,297 @@
+# benchmarks/loadtest.py
+# 종단 간 부하 테스트: main.py의 실제 Application / 핸들러에 Update를 흘려보내고,
+# 봇의 API 호출은 로컬 가짜 Bot API 서버(aiohttp)가 받는다 (api.telegram.org에 연결하지 않음)
+#
+#   python -m benchmarks.loadtest                              # 동시 유저 1, 8, 32, 128 단계
+#   python -m benchmarks.loadtest --concurrency 16,64,256 --sessions 500 --api-latency 50
+#
+# 가상 유저 1명의 세션: /daily → 받은 키보드에서 버튼 몇 개 탭 → /done → /progress
+#                      (+ 일부는 /addtask 대화를 진행하다 /cancel)
+# 가상 유저는 응답(핸들러 처리 완료)을 받은 뒤 다음 업데이트를 보낸다 (closed loop).
+# 단계별로 처리량(업데이트/초), 지연 시간 p50/p99(큐 대기 포함 / 핸들러 처리만), 메서드별 API 호출 수를 출력하고 JSON으로 저장
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+from collections import Counter
+from datetime import datetime
+
+from aiohttp import web
+
+from benchmarks import synthetic
+from benchmarks.run import percentile, git_commit
+
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "DailyQuest", "username": "dailyquest_loadtest_bot"}
+
+class FakeBotApi:
+    # Bot API 흉내: 메서드별 호출 수를 세고, 보낸 메시지의 인라인 키보드를 채팅별로 기억
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = Counter()
+        self.keyboards = {}  # chat_id → (message_id, reply_markup dict)
+        self._message_ids = 0
+        self.runner = None
+        self.port = None
+
+    async def start(self, host="127.0.0.1"):
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{self.port}/bot"
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+
+    async def handle(self, request):
+        method = request.match_info["method"]
+        if request.content_type == "application/json":
+            params = await request.json()
+        else:
+            params = dict(await request.post())
+        self.calls[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return web.json_response({"ok": True, "result": self._result(method, params)})
+
+    def _message(self, chat_id, message_id, params):
+        message = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": params.get("text", ""),
+        }
+        markup = params.get("reply_markup")
+        if markup:
+            markup = json.loads(markup) if isinstance(markup, str) else markup
+            if "inline_keyboard" in markup:
+                message["reply_markup"] = markup
+                self.keyboards[chat_id] = (message_id, markup)
+        return message
+
+    def _result(self, method, params):
+        if method == "getMe":
+            return BOT_USER
+        if method == "sendMessage":
+            self._message_ids += 1
+            return self._message(int(params["chat_id"]), self._message_ids, params)
+        if method in ("editMessageText", "editMessageReplyMarkup"):
+            return self._message(int(params["chat_id"]), int(params["message_id"]), params)
+        return True
+
+class Harness:
+    # 실제 Application에 업데이트를 넣고 처리 완료까지 기다리며 지연 시간을 기록
+    def __init__(self, app, api):
+        self.app = app
+        self.api = api
+        self.waiters = {}
+        self.latencies = []  # (kind, 큐에 넣은 뒤 처리 완료까지, 핸들러 처리 시간)
+        self._handled = {}
+        original = app.process_update
+
+        async def process_update(update):
+            started = time.perf_counter()
+            try:
+                await original(update)
+            finally:
+                self._handled[update.update_id] = time.perf_counter() - started
+                waiter = self.waiters.pop(update.update_id, None)
+                if waiter and not waiter.done():
+                    waiter.set_result(None)
+        app.process_update = process_update
+
+    async def send(self, data, kind, timeout=60):
+        from telegram import Update
+        update = Update.de_json(data, self.app.bot)
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters[update.update_id] = waiter
+        enqueued = time.perf_counter()
+        await self.app.update_queue.put(update)
+        await asyncio.wait_for(waiter, timeout)
+        self.latencies.append((kind, time.perf_counter() - enqueued, self._handled.pop(update.update_id, 0.0)))
+
+def latency_summary(samples):
+    total = sorted(s[0] for s in samples)
+    handler = sorted(s[1] for s in samples)
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(total, 50) * 1000, 2),
+        "p99_ms": round(percentile(total, 99) * 1000, 2),
+        "handler_p50_ms": round(percentile(handler, 50) * 1000, 2),
+        "handler_p99_ms": round(percentile(handler, 99) * 1000, 2),
+    }
+
+async def user_session(harness, user_id, rng, args, games):
+    from utils import webhook
+
+    await harness.send(webhook.fake_message_update(user_id, "/daily"), "/daily")
+    keyboard = harness.api.keyboards.get(user_id)
+    if keyboard:
+        message_id, markup = keyboard
+        buttons = [b["callback_data"] for row in markup["inline_keyboard"] for b in row
+                   if b.get("callback_data") and b["callback_data"] != "n"]
+        for data in rng.sample(buttons, min(args.taps, len(buttons))):
+            await harness.send(webhook.fake_callback_update(user_id, data, message_id=message_id), "callback")
+    await harness.send(webhook.fake_message_update(user_id, "/done"), "/done")
+    await harness.send(webhook.fake_message_update(user_id, "/progress"), "/progress")
+    if rng.random() < args.conversations:
+        # 관리 대화: 실제로 카탈로그를 바꾸지 않도록 마지막 단계 전에 취소
+        for text, kind in (("/addtask", "/addtask"), (rng.choice(games), "conversation"),
+                           ("daily", "conversation"), ("/cancel", "/cancel")):
+            await harness.send(webhook.fake_message_update(user_id, text), kind)
+
+async def run_level(harness, concurrency, population, rng, args, games):
+    harness.latencies.clear()
+    calls_before = Counter(harness.api.calls)
+    sessions = asyncio.Queue()
+    for user_id in rng.sample(population, min(args.sessions, len(population))):
+        sessions.put_nowait(user_id)
+
+    async def worker():
+        while True:
+            try:
+                user_id = sessions.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await user_session(harness, user_id, rng, args, games)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    # 묶어서 보내는 키보드 수정이 모두 나갈 때까지 기다린 뒤 API 호출 수 집계
+    await asyncio.sleep(float(os.environ.get("EDIT_COALESCE_WINDOW", "0")) + 0.2)
+
+    calls = harness.api.calls - calls_before
+    updates = len(harness.latencies)
+    by_kind = {}
+    for kind, total, handler in harness.latencies:
+        by_kind.setdefault(kind, []).append((total, handler))
+    return {
+        "concurrency": concurrency,
+        "updates": updates,
+        "seconds": round(elapsed, 3),
+        "updates_per_sec": round(updates / elapsed, 2) if elapsed else None,
+        "latency": latency_summary([(t, h) for _, t, h in harness.latencies]),
+        "by_kind": {kind: latency_summary(samples) for kind, samples in sorted(by_kind.items())},
+        "api_calls": dict(calls),
+        "api_calls_per_update": round(sum(calls.values()) / updates, 3) if updates else None,
+    }
+
+def print_level(result):
+    latency = result["latency"]
+    calls = ", ".join(f"{m} {n}" for m, n in sorted(result["api_calls"].items(), key=lambda x: -x[1]))
+    print(f"  동시 {result['concurrency']:>4}: {result['updates']:>6}건 {result['updates_per_sec'] or 0:>9,.1f}건/초   "
+          f"지연 p50 {latency['p50_ms']:>8,.1f}ms p99 {latency['p99_ms']:>8,.1f}ms   "
+          f"(핸들러 p50 {latency['handler_p50_ms']:,.1f}ms p99 {latency['handler_p99_ms']:,.1f}ms)   "
+          f"API {result['api_calls_per_update']}/건 [{calls}]")
+
+async def run(args, data_dir):
+    from telegram.ext import ApplicationBuilder
+    from utils import storage, users, periods, config
+    from utils import progress as day_progress
+    import main as bot
+
+    quests = synthetic.make_catalog(args.games, args.daily, args.weekly, args.events, seed=args.seed,
+                                    today=periods.get_game_date())
+    synthetic.write_catalog(data_dir, quests)
+    storage.init()
+    users.init()
+    day_progress.init()
+    bot.load_quests()
+    population = synthetic.user_ids(args.users)
+    records = synthetic.make_checks(quests, population, periods.get_today(), periods.get_week_key(),
+                                    active=args.active, density=args.density, seed=args.seed)
+    synthetic.populate(storage, users, population, records)
+    bot._rebuild_catalog()
+
+    api = FakeBotApi(latency=args.api_latency / 1000)
+    base_url = await api.start()
+    app = bot.build_application(ApplicationBuilder().token(bot.BOT_TOKEN).base_url(base_url))
+    harness = Harness(app, api)
+    await app.initialize()
+    await app.start()
+    print(f"\n🧪 부하 테스트: 유저 {args.users:,}명, 세션 {args.sessions}개/단계, 게임 {args.games}개, "
+          f"가짜 API 지연 {args.api_latency}ms, 처리 동시성 {config.UPDATE_CONCURRENCY}, backend={config.STORAGE_BACKEND}\n")
+
+    rng = random.Random(args.seed)
+    levels = []
+    try:
+        for concurrency in args.concurrency:
+            result = await run_level(harness, concurrency, population, rng, args, list(quests))
+            print_level(result)
+            levels.append(result)
+    finally:
+        await app.stop()
+        await app.shutdown()
+        await api.stop()
+        storage.flush()
+        bot.QUEST_REPO.flush()
+    return levels
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="DailyQuest 종단 간 부하 테스트 (가짜 Bot API)")
+    parser.add_argument("--concurrency", default="1,8,32,128",
+                        type=lambda v: [int(x) for x in v.split(",") if x.strip()],
+                        help="동시 가상 유저 수 단계 (쉼표 구분)")
+    parser.add_argument("--sessions", type=int, default=200, help="단계마다 실행할 유저 세션 수")
+    parser.add_argument("--taps", type=int, default=5, help="세션당 버튼 탭 수")
+    parser.add_argument("--conversations", type=float, default=0.1, help="관리 대화를 진행하는 세션 비율")
+    parser.add_argument("--api-latency", type=float, default=25.0, help="가짜 Bot API 응답 지연(ms)")
+    parser.add_argument("--edit-window", type=float, default=0.7, help="키보드 수정 묶음 대기(초), 운영 기본값과 동일")
+    parser.add_argument("--processor-concurrency", type=int, default=32, help="UPDATE_CONCURRENCY")
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--daily", type=int, default=6)
+    parser.add_argument("--weekly", type=int, default=3)
+    parser.add_argument("--events", type=int, default=1)
+    parser.add_argument("--active", type=float, default=0.6)
+    parser.add_argument("--density", type=float, default=0.5)
+    parser.add_argument("--backend", default="tinydb", choices=["tinydb", "sqlite", "journal"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="결과 JSON 경로 (기본 benchmarks/results/loadtest-<시각>-<커밋>.json)")
+    parser.add_argument("--keep-data", action="store_true")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv if argv is not None else sys.argv[1:])
+    data_dir = synthetic.prepare_environment(
+        backend=args.backend,
+        EDIT_COALESCE_WINDOW=args.edit_window,
+        UPDATE_CONCURRENCY=args.processor_concurrency,
+    )
+    try:
+        levels = asyncio.run(run(args, data_dir))
+    finally:
+        if not args.keep_data:
+            synthetic.cleanup(data_dir)
+
+    payload = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("out", "keep_data")},
+        },
+        "levels": levels,
+    }
+    out = args.out or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "results",
+        f"loadtest-{datetime.now():%Y%m%d-%H%M%S}-{payload['meta']['commit'] or 'nogit'}.json",
+    )
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 결과 저장: {out}")
+    return payload
+
+if __name__ == "__main__":
+    main()
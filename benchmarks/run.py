@@ -0,0 +1,277 @@
+# benchmarks/run.py
+# 핫 패스 마이크로 벤치마크 (완전 오프라인, 임시 DATA_DIR 사용)
+#
+#   python -m benchmarks.run                         # 기본: 유저 1만, 게임 30개 × daily 8개
+#   python -m benchmarks.run --users 100000 --backend sqlite
+#   python -m benchmarks.run --quick --compare benchmarks/results/이전결과.json
+#
+# 측정 항목: build_daily_keyboard(캐시 적중/재생성), handle_callback 토글, complete_all,
+# 일일 초기화(지난 파티션 정리 + streak 일괄 초기화), refresh_event_tasks, 전체 브로드캐스트(가짜 봇)
+# 결과는 ops/sec와 지연 시간 백분위(µs)로 출력하고 JSON으로 저장 → 커밋 간 비교(--compare)
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import inspect
+import argparse
+import platform
+import subprocess
+from datetime import datetime
+
+from benchmarks import synthetic
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(durations, ops_per_iteration=1):
+    durations = sorted(durations)
+    total = sum(durations)
+    ops = len(durations) * ops_per_iteration
+    return {
+        "iterations": len(durations),
+        "ops": ops,
+        "ops_per_sec": round(ops / total, 2) if total > 0 else None,
+        "mean_us": round(total / len(durations) * 1e6, 2),
+        "p50_us": round(percentile(durations, 50) * 1e6, 2),
+        "p90_us": round(percentile(durations, 90) * 1e6, 2),
+        "p99_us": round(percentile(durations, 99) * 1e6, 2),
+        "max_us": round(durations[-1] * 1e6, 2),
+    }
+
+async def measure(fn, iterations, setup=None, ops_per_iteration=1):
+    # fn(arg)는 동기 함수 또는 코루틴을 돌려주는 함수, setup(i)의 반환값이 arg (setup 시간은 제외)
+    durations = []
+    for i in range(iterations):
+        arg = setup(i) if setup else None
+        started = time.perf_counter()
+        result = fn(arg)
+        if inspect.isawaitable(result):
+            await result
+        durations.append(time.perf_counter() - started)
+    return summarize(durations, ops_per_iteration)
+
+# ---- 가짜 텔레그램 객체 ----
+
+class FakeBot:
+    def __init__(self):
+        self.sent = 0
+
+    async def send_message(self, chat_id, **kwargs):
+        self.sent += 1
+
+class FakeApp:
+    def __init__(self):
+        self.bot = FakeBot()
+
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+
+class FakeMessage:
+    def __init__(self, chat_id, message_id):
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.reply_markup = None
+
+class FakeQuery:
+    def __init__(self, user_id, data, message_id):
+        self.from_user = FakeUser(user_id)
+        self.data = data
+        self.message = FakeMessage(user_id, message_id)
+        self.edits = 0
+
+    async def answer(self, text=None, **kwargs):
+        pass
+
+    async def edit_message_reply_markup(self, reply_markup=None, **kwargs):
+        self.edits += 1
+
+class FakeUpdate:
+    def __init__(self, query):
+        self.callback_query = query
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).strip()
+    except Exception:
+        return None
+
+# ---- 벤치마크 본체 ----
+
+async def run_benchmarks(args):
+    import main
+    from utils import storage, keyboards, callbacks
+    from utils import progress as day_progress
+
+    rng = random.Random(args.seed)
+    results = {}
+
+    def report(name, result):
+        results[name] = result
+        print(f"  {name:<28} {result['ops_per_sec'] or 0:>12,.1f} ops/s   "
+              f"p50 {result['p50_us']:>10,.1f}µs   p99 {result['p99_us']:>10,.1f}µs")
+
+    population = synthetic.user_ids(args.users)
+
+    # 1) 키보드 생성: 레이아웃 캐시 적중 (유저별 체크 표시만 채움) / 매번 재생성
+    report("build_daily_keyboard", await measure(
+        main.build_daily_keyboard, args.iterations, setup=lambda i: rng.choice(population)))
+
+    def rebuild(user_id):
+        keyboards.clear()
+        main.build_daily_keyboard(user_id)
+    report("build_daily_keyboard_cold", await measure(
+        rebuild, max(1, args.iterations // 10), setup=lambda i: rng.choice(population)))
+
+    # 2) 버튼 탭: callback_data 해석 → 토글 → 키보드 수정(가짜 API)
+    markup = main.build_daily_keyboard(population[0])
+    buttons = [b.callback_data for row in markup.inline_keyboard for b in row if b.callback_data != callbacks.NOOP]
+
+    def tap(i):
+        return FakeUpdate(FakeQuery(rng.choice(population), rng.choice(buttons), message_id=i))
+    report("handle_callback_toggle", await measure(
+        lambda update: main.handle_callback(update, None), args.iterations, setup=tap))
+
+    # 3) 게임 숙제 일괄 완료
+    games = [g for g in main.CATALOG.games if g.daily]
+
+    def pick_completion(i):
+        return rng.choice(population), rng.choice(games)
+    report("complete_all", await measure(
+        lambda arg: storage.complete_all(arg[0], arg[1].name, arg[1].daily), args.iterations, setup=pick_completion))
+
+    # 4) 일일 초기화: 지난 파티션 정리 + 끊긴 streak 일괄 초기화 (예전 reset_daily_tasks 자리)
+    def seed_stale(i):
+        records = synthetic.make_stale_checks(main.QUESTS, population, days_ago=1 + i, seed=args.seed + i)
+        ids = storage.backend.insert_many(records)
+        for record, record_id in zip(records, ids):
+            storage._index_add(record, record_id)
+        return len(records)
+
+    def rollover(_):
+        storage.purge_stale_partitions()
+        day_progress.on_rollover()
+    report("daily_rollover", await measure(rollover, args.rounds, setup=seed_stale))
+
+    # 5) 이벤트 만료 제거 + daily 이벤트 반영 (매번 원래 카탈로그로 되돌린 뒤 측정)
+    original = json.dumps(main.QUESTS, ensure_ascii=False)
+
+    def restore_catalog(i):
+        main.QUESTS.clear()
+        main.QUESTS.update(json.loads(original))
+        main._rebuild_catalog()
+    report("refresh_event_tasks", await measure(
+        lambda _: main.refresh_event_tasks(), args.rounds, setup=restore_catalog))
+    restore_catalog(0)
+
+    # 6) 전체 유저 브로드캐스트 (가짜 봇, 전송 한도 해제) → 1회 = 유저 수만큼 메시지
+    app = FakeApp()
+    result = await measure(lambda _: main.send_daily_to_all_users(app), args.rounds,
+                           ops_per_iteration=len(population))
+    report("broadcast_daily", result)
+
+    storage.flush()
+    return results
+
+REGRESSION_THRESHOLD = 10.0  # 이 비율(%) 이상 나빠지면 표시
+
+def compare(results, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\n📈 비교 기준: {baseline_path} (commit {baseline.get('meta', {}).get('commit')})")
+    for name, current in results.items():
+        old = baseline.get("results", {}).get(name)
+        if not old or not old.get("ops_per_sec") or not current.get("ops_per_sec"):
+            continue
+        ops_change = (current["ops_per_sec"] / old["ops_per_sec"] - 1) * 100
+        p99_change = (current["p99_us"] / old["p99_us"] - 1) * 100 if old["p99_us"] else 0.0
+        flag = "  ⚠️" if ops_change < -REGRESSION_THRESHOLD or p99_change > REGRESSION_THRESHOLD else ""
+        print(f"  {name:<28} ops/s {ops_change:+7.1f}%   p99 {p99_change:+7.1f}%{flag}")
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="DailyQuest 오프라인 마이크로 벤치마크")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--games", type=int, default=30)
+    parser.add_argument("--daily", type=int, default=8)
+    parser.add_argument("--weekly", type=int, default=4)
+    parser.add_argument("--events", type=int, default=2, help="게임당 이벤트 수")
+    parser.add_argument("--active", type=float, default=0.6, help="오늘 체크한 유저 비율")
+    parser.add_argument("--density", type=float, default=0.5, help="활성 유저의 숙제별 체크 확률")
+    parser.add_argument("--iterations", type=int, default=2000, help="단건 작업 반복 횟수")
+    parser.add_argument("--rounds", type=int, default=3, help="일괄 작업(초기화, 브로드캐스트 등) 반복 횟수")
+    parser.add_argument("--backend", default="tinydb", choices=["tinydb", "sqlite", "journal"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--quick", action="store_true", help="유저 2천, 반복 300회로 빠르게")
+    parser.add_argument("--out", help="결과 JSON 경로 (기본 benchmarks/results/<시각>-<커밋>.json)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    parser.add_argument("--keep-data", action="store_true", help="임시 DATA_DIR을 지우지 않음")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.users, args.iterations = min(args.users, 2_000), min(args.iterations, 300)
+    return args
+
+def main(argv=None):
+    args = parse_args(argv if argv is not None else sys.argv[1:])
+    data_dir = synthetic.prepare_environment(backend=args.backend)
+    try:
+        # 환경변수를 정한 뒤에 import (config는 import 시점에 값을 읽음)
+        from utils import storage, users, periods
+        from utils import progress as day_progress
+        import main as bot
+
+        quests = synthetic.make_catalog(args.games, args.daily, args.weekly, args.events, seed=args.seed,
+                                        today=periods.get_game_date())
+        synthetic.write_catalog(data_dir, quests)
+
+        storage.init()
+        users.init()
+        day_progress.init()
+        bot.load_quests()
+
+        population = synthetic.user_ids(args.users)
+        records = synthetic.make_checks(quests, population, periods.get_today(), periods.get_week_key(),
+                                        active=args.active, density=args.density, seed=args.seed)
+        started = time.perf_counter()
+        synthetic.populate(storage, users, population, records)
+        bot._rebuild_catalog()  # 적재한 체크로 완료 카운터 재계산
+        print(f"\n🧪 데이터 준비: 유저 {args.users:,}명, 체크 {len(records):,}건, "
+              f"게임 {args.games}개 ({time.perf_counter() - started:.1f}초, backend={args.backend}, {data_dir})\n")
+
+        results = asyncio.run(run_benchmarks(args))
+    finally:
+        if not args.keep_data:
+            synthetic.cleanup(data_dir)
+
+    payload = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "keep_data")},
+        },
+        "results": results,
+    }
+    out = args.out or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "results",
+        f"{datetime.now():%Y%m%d-%H%M%S}-{payload['meta']['commit'] or 'nogit'}.json",
+    )
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 결과 저장: {out}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return payload
+
+if __name__ == "__main__":
+    main()
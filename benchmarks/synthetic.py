@@ -0,0 +1,118 @@
+# benchmarks/synthetic.py
+# 벤치마크 / 부하 테스트용 가짜 데이터 생성
+# - 임시 DATA_DIR 준비 (실제 /data는 건드리지 않음)
+# - 게임/숙제/이벤트가 많은 카탈로그, 체크 밀도가 현실적인 유저 집단
+# utils를 import 하기 전에 prepare_environment()를 먼저 호출해야 한다 (config가 import 시 환경변수를 읽음).
+import os
+import json
+import random
+import shutil
+import tempfile
+from datetime import date, timedelta
+
+def prepare_environment(backend="tinydb", data_dir=None, **overrides):
+    # 임시 데이터 폴더 + 오프라인 실행용 환경변수. 만든 폴더 경로를 반환
+    data_dir = data_dir or tempfile.mkdtemp(prefix="dailyquest-bench-")
+    os.makedirs(data_dir, exist_ok=True)
+    env = {
+        "DATA_DIR": data_dir,
+        "STORAGE_BACKEND": backend,
+        "TELEGRAM_BOT_TOKEN": os.environ.get("TELEGRAM_BOT_TOKEN", "123456:offline-benchmark"),
+        "SELF_URL": "",
+        "EDIT_COALESCE_WINDOW": "0",     # 탭마다 바로 수정 (지연 전송 태스크를 만들지 않음)
+        "QUESTS_SAVE_DELAY": "0.05",
+        "BROADCAST_RATE": "1000000",     # 가짜 봇이므로 전송 한도 해제 → 전송 루프 자체의 비용만 측정
+        "BROADCAST_PER_CHAT_INTERVAL": "0",
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "warning"),  # 측정 결과 출력이 로그에 묻히지 않도록
+    }
+    env.update({k: str(v) for k, v in overrides.items()})
+    os.environ.update(env)
+    return data_dir
+
+def cleanup(data_dir):
+    shutil.rmtree(data_dir, ignore_errors=True)
+
+def make_catalog(games=30, daily=8, weekly=4, events=2, event_tasks=3, seed=1, today=None):
+    # quests.json 형식의 dict. 이벤트 종료일은 오늘 기준 -3 ~ +20일에 분산 (일부는 이미 만료)
+    rng = random.Random(seed)
+    today = today or date.today()
+    quests = {}
+    for g in range(games):
+        game = f"게임{g:03d}"
+        game_events = []
+        for e in range(events):
+            until = today + timedelta(days=rng.randint(-3, 20))
+            game_events.append({
+                "name": f"이벤트{g:03d}-{e}",
+                "type": rng.choice(["daily", "once"]),
+                "until": until.isoformat(),
+                "tasks": [
+                    {"name": f"이벤트 숙제 {t}", "type": rng.choice(["daily", "once"])}
+                    for t in range(event_tasks)
+                ],
+            })
+        quests[game] = {
+            "daily": [f"일일 숙제 {t:02d}" for t in range(daily)],
+            "weekly": [f"주간 숙제 {t:02d}" for t in range(weekly)],
+            "events": game_events,
+        }
+    return quests
+
+def write_catalog(data_dir, quests):
+    path = os.path.join(data_dir, "quests.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(quests, f, ensure_ascii=False, indent=2)
+    return path
+
+def user_ids(count, start=10_000_000):
+    return list(range(start, start + count))
+
+def make_checks(quests, users, today_key, week_key, active=0.6, density=0.5, seed=2):
+    # checklist 기록 생성: 유저의 active 비율만 오늘 체크를 했고, 그 유저는 각 게임 숙제를 density 확률로 체크
+    rng = random.Random(seed)
+    games = [(game, data.get("daily", []), data.get("weekly", [])) for game, data in quests.items()]
+    records = []
+    for user_id in users:
+        if rng.random() >= active:
+            continue
+        for game, daily, weekly in games:
+            for task in daily:
+                if rng.random() < density:
+                    records.append({"user_id": user_id, "period": "daily", "date": today_key, "game": game, "task": task})
+            for task in weekly:
+                if rng.random() < density / 2:
+                    records.append({"user_id": user_id, "period": "weekly", "date": week_key, "game": game, "task": task})
+    return records
+
+def make_stale_checks(quests, users, days_ago=1, fraction=0.3, seed=3):
+    # 지난 날짜 기록 (초기화/정리 벤치마크용)
+    rng = random.Random(seed)
+    day = (date.today() - timedelta(days=days_ago)).isoformat()
+    records = []
+    for user_id in users:
+        if rng.random() >= fraction:
+            continue
+        for game, data in quests.items():
+            for task in data.get("daily", [])[:2]:
+                records.append({"user_id": user_id, "period": "daily", "date": day, "game": game, "task": task})
+    return records
+
+def populate(storage, users_module, users, records, chunk=20_000):
+    # 저장소에 한 번에 넣고 인덱스를 다시 구축 (초기 적재는 측정 대상이 아님)
+    for i in range(0, len(records), chunk):
+        storage.backend.insert_many(records[i:i + chunk])
+    storage.flush()
+    storage.build_index()
+
+    # 유저도 한 번에 삽입 (add_user를 유저마다 부르면 파일 전체 쓰기가 유저 수만큼 반복됨)
+    rows = [{"user_id": user_id, "day_streak": 0, "last_day_complete": None} for user_id in users]
+    backend = users_module.backend
+    if hasattr(backend, "db"):
+        backend.db.insert_multiple(rows)
+    else:
+        with backend._lock:
+            backend.conn.executemany(
+                "INSERT OR IGNORE INTO users (user_id, day_streak, last_day_complete) VALUES (?, ?, ?)",
+                [(r["user_id"], r["day_streak"], r["last_day_complete"]) for r in rows],
+            )
+            backend.conn.commit()
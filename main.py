@@ -1,20 +1,27 @@
 import os
-import json
+import hmac
+import signal
 import asyncio
 import threading
 import aiohttp
 from aiohttp import web
-from datetime import datetime, timedelta, date
+from datetime import datetime, timedelta
 from pytz import timezone
-from utils.backup import rolling_backup, cleanup_old_backups, load_or_restore_db
+from utils.backup import rolling_backup, cleanup_old_backups, load_or_restore_db, sqlite_backup, submit as submit_backup, get_backup_stats
 from utils.storage import normalize_task
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update, InlineKeyboardButton
 from telegram.constants import ParseMode
 from telegram.ext import ApplicationBuilder, CommandHandler, CallbackQueryHandler, ContextTypes, ConversationHandler, MessageHandler, filters
-from apscheduler.schedulers.background import BackgroundScheduler
-from utils import users, storage  
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from utils import users, storage, config, migrations, keyboards, edits, callbacks, webhook, metrics, instrument, profiling, log, overlays
+from utils import periods, timewheel
+from utils import progress as day_progress  # /progress 핸들러와 이름이 겹치지 않도록
+from utils.broadcast import broadcast
+from utils.catalog import compile_catalog
+from utils.quests import QuestRepository
+from utils.updates import PerUserUpdateProcessor
 
-print(timezone("Asia/Seoul"))
+log.info("스케줄러 시간대", timezone=config.RESET_TIMEZONE)
 
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 
@@ -24,121 +31,194 @@ if not BOT_TOKEN:
 SELF_URL = os.getenv("SELF_URL")
 
 if not SELF_URL:
-    print("⚠️ SELF_URL 환경변수가 설정되지 않아 슬립 방지 ping이 비활성화됩니다.")
+    log.warning("⚠️ SELF_URL 환경변수가 설정되지 않아 슬립 방지 ping이 비활성화됩니다.")
 
-QUESTS_PATH = "/data/quests.json"
+QUESTS_PATH = os.path.join(config.DATA_DIR, "quests.json")
 
 async def handle_ping(request):
     return web.Response(text="pong")
 
-async def start_http_server():
+def _authorized(request):
+    # METRICS_TOKEN이 있으면 Bearer 토큰 또는 ?token= 으로 확인
+    if not config.METRICS_TOKEN:
+        return True
+    token = request.query.get("token") or request.headers.get("Authorization", "").removeprefix("Bearer ")
+    return hmac.compare_digest(token.encode(), config.METRICS_TOKEN.encode())
+
+async def handle_metrics(request):
+    # Prometheus 텍스트 형식
+    if not _authorized(request):
+        return web.Response(status=401, text="unauthorized")
+    return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8",
+                        headers={"Cache-Control": "no-store"})
+
+async def handle_profile(request):
+    # PROFILE_ENABLED=1일 때만 열림
+    # ?format=handlers → 핸들러 / 작업별 누적 시간, 그 외에는 ?seconds=N 동안 이벤트 루프 스레드를 샘플링
+    # (format=collapsed: flamegraph용, format=top: 함수별 비율)
+    if not _authorized(request):
+        return web.Response(status=401, text="unauthorized")
+    fmt = request.query.get("format", "top")
+    if fmt == "handlers":
+        return web.Response(text=profiling.summary(), content_type="text/plain", charset="utf-8")
+    try:
+        seconds = min(60.0, max(0.1, float(request.query.get("seconds", "10"))))
+    except ValueError:
+        return web.Response(status=400, text="seconds must be a number")
+    stacks = await asyncio.to_thread(profiling.sample, seconds, threading.get_ident())
+    if stacks is None:
+        return web.Response(status=409, text="another profile is running")
+    text = profiling.format_collapsed(stacks) if fmt == "collapsed" else profiling.format_top(stacks)
+    return web.Response(text=text, content_type="text/plain", charset="utf-8")
+
+async def start_http_server(application=None):
+    # 봇과 같은 이벤트 루프에서 실행, 종료 시 cleanup()할 runner를 반환
+    # application을 넘기면 (웹훅 모드) 텔레그램 업데이트 수신 경로도 함께 연다
     app = web.Application()
     app.router.add_get("/", handle_ping)
+    app.router.add_get("/metrics", handle_metrics)
+    if config.PROFILE_ENABLED:
+        app.router.add_get("/debug/profile", handle_profile)
+    if application is not None:
+        webhook.mount(app, application)
     runner = web.AppRunner(app)
     await runner.setup()
     site = web.TCPSite(runner, host="0.0.0.0", port=8080)
     await site.start()
-    print("[HTTP] Ping server running on port 8080")
+    log.info("[HTTP] Ping server running", port=8080)
+    return runner
 
 async def ping_self():
     url = os.getenv("SELF_URL")  # Fly.io에 배포된 본인 주소를 환경변수로 지정
     if not url:
-        print("[경고] SELF_URL 환경변수가 설정되지 않음. 슬립 방지 ping을 건너뜀.")
+        log.warning("SELF_URL 환경변수가 설정되지 않음. 슬립 방지 ping을 건너뜀.")
         return
     try:
         async with aiohttp.ClientSession() as session:
             async with session.get(url) as resp:
-                print(f"[슬립방지 ping] 상태 코드: {resp.status}")
+                log.info("[슬립방지 ping]", status=resp.status)
     except Exception as e:
-        print(f"[슬립방지 ping 실패] {e}")
+        log.warning("[슬립방지 ping 실패]", error=str(e))
+
+QUEST_REPO = QuestRepository(QUESTS_PATH)  # quests.json 원자적 + 지연 저장 (version = 캐시 키)
+QUESTS = QUEST_REPO.data  # 모든 채팅이 공유하는 기본 카탈로그, 채팅별 수정분은 overlays
+CATALOG = compile_catalog(QUESTS, QUEST_REPO.version)  # 조회용 컴파일 카탈로그 (QUESTS가 원본)
+
+def _rebuild_catalog():
+    # 새 카탈로그를 완성한 뒤 한 번에 교체 → 조회 쪽은 항상 완전한 카탈로그만 봄
+    global CATALOG
+    CATALOG = compile_catalog(QUESTS, QUEST_REPO.version)
+    callbacks.register(CATALOG)  # 예전 키보드 버튼도 당분간 해석할 수 있도록 보관
+    overlays.set_base(QUESTS, CATALOG)  # 채팅별 카탈로그도 새 기본 카탈로그 위에서 다시 컴파일
+    day_progress.recount()  # 필요한 daily 숙제가 바뀌었으니 오늘 완료 카운터 재계산
+
+def save_quests():
+    # 기본 카탈로그(QUESTS)를 수정하면 반드시 이 함수로 저장 → 버전 증가 + 카탈로그 재컴파일로 캐시 자동 무효화
+    # 파일 기록은 저장 스레드가 연속 수정을 모아 임시 파일 + rename으로 처리 (이벤트 루프를 막지 않음)
+    QUEST_REPO.save()
+    _rebuild_catalog()
+
+def save_overlay(scope):
+    # 채팅별 카탈로그를 수정한 핸들러는 이 함수로 저장 → 그 채팅의 캐시만 무효화 + 완료 카운터 재계산
+    # (관리자 /basemode로 기본 카탈로그를 고쳤으면 save_quests)
+    if scope is overlays.BASE:
+        save_quests()
+        return
+    overlays.save(scope)
+    if scope > 0:  # 개인 채팅 id = 유저 id (그룹 채팅 id는 음수, 완료 카운터는 유저 본인 카탈로그 기준)
+        day_progress.recount(scope)
 
 def load_quests():
     global QUESTS
-    os.makedirs("/data", exist_ok=True)
+    os.makedirs(config.DATA_DIR, exist_ok=True)
 
     # quests.json 복원 또는 로드
     try:
         load_or_restore_db(QUESTS_PATH)  # 복구만 시도
     except Exception as e:
-        print(f"⚠️ quests.json 복구 시도 실패: {e}")
+        log.warning("⚠️ quests.json 복구 시도 실패", error=str(e))
 
+    # 밀린 스키마 마이그레이션만 실행 (이미 최신이면 파일을 다시 훑지 않음)
     try:
-        with open(QUESTS_PATH, "r", encoding="utf-8") as f:
-            QUESTS = json.load(f)
-        if not isinstance(QUESTS, dict):
-            raise ValueError("quests.json이 딕셔너리 형태가 아닙니다.")
-        print("✅ quests.json 로드 성공")
-    except Exception as e:
-        print(f"❌ quests.json 로드 실패: {e}")
-        QUESTS = {}
-
-def normalize_quests():
-    global QUESTS
-    modified = False
+        migrations.migrate_json_file("quests", QUESTS_PATH, indent=2)
+    except Exception:
+        log.exception("⚠️ quests.json 마이그레이션 실패")
 
-    for game, data in QUESTS.items():
-        # 이벤트 정규화
-        events = data.get("events", [])
-        new_events = []
-        for evt in events:
-            evt_copy = evt.copy()
-            if isinstance(evt_copy.get("tasks"), list):
-                new_tasks = []
-                for task in evt_copy["tasks"]:
-                    if isinstance(task, str):
-                        new_tasks.append({"name": task, "type": "once"})
-                        modified = True
-                    elif isinstance(task, dict):
-                        if "name" in task:
-                            if "type" not in task:
-                                task["type"] = "once"
-                                modified = True
-                            new_tasks.append(task)
-                evt_copy["tasks"] = new_tasks
-            new_events.append(evt_copy)
-        data["events"] = new_events
-
-        # ✅ daily 정규화 추가
-        daily = data.get("daily", [])
-        new_daily = []
-        for task in daily:
-            if isinstance(task, str):
-                new_daily.append(task)
-            elif isinstance(task, dict) and "name" in task:
-                new_daily.append(task["name"])
-                modified = True
-        data["daily"] = new_daily
+    try:
+        QUESTS = QUEST_REPO.load()
+        log.info("✅ quests.json 로드 성공", games=len(QUESTS))
+    except Exception:
+        log.exception("❌ quests.json 로드 실패")
+        QUESTS = QUEST_REPO.reset()
+    _rebuild_catalog()
+
+# 초기화 작업: 지난 기간의 체크 기록 정리
+# 일일/주간 초기화 자체는 storage의 기간 키가 바뀌는 순간 반영되므로,
+# 여기서는 더 이상 조회되지 않는 지난 파티션만 백그라운드에서 지운다.
+def purge_old_checks():
+    partitions, removed = storage.purge_stale_partitions()
+    if partitions:
+        log.info("지난 체크 기록 정리", partitions=partitions, removed=removed)
+
+# 대화형 명령의 입력값은 유저 × 채팅별로 따로 보관 (다른 유저/채팅의 입력과 섞이지 않음)
+def conv_data(update: Update, context: ContextTypes.DEFAULT_TYPE, name: str):
+    return context.user_data.setdefault((name, update.effective_chat.id), {})
+
+def end_conv(update: Update, context: ContextTypes.DEFAULT_TYPE, name: str):
+    context.user_data.pop((name, update.effective_chat.id), None)
+    return ConversationHandler.END
 
-    if modified:
-        with open(QUESTS_PATH, "w", encoding="utf-8") as f:
-            json.dump(QUESTS, f, indent=2, ensure_ascii=False)
-        print("🔧 quests.json 자동 정규화 완료됨.")
+# 숙제 목록은 채팅마다 따로 (개인 채팅은 유저 id, 그룹은 그룹 id 기준 overlay, 수정 안 했으면 기본 카탈로그 공유)
+def is_admin(user_id: int):
+    return user_id in config.ADMIN_USER_IDS
+
+def chat_scope(update: Update, context: ContextTypes.DEFAULT_TYPE = None):
+    # 수정 대상: 관리자가 /basemode를 켜 두었으면 공유 기본 카탈로그(quests.json), 아니면 이 채팅
+    if context is not None and context.user_data.get("base_mode") and is_admin(update.effective_user.id):
+        return overlays.BASE
+    return update.effective_chat.id
+
+def chat_quests(update: Update, context: ContextTypes.DEFAULT_TYPE = None):
+    # 읽기 전용 dict. 수정은 overlays.edit_game(chat_scope(update, context), game) 후 save_overlay
+    # 수정 대화에서는 context를 넘겨 수정 대상 카탈로그로 확인
+    return overlays.quests(chat_scope(update, context))
+
+async def base_mode(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # 관리자 전용: 이후 숙제 수정 명령을 공유 기본 카탈로그에 적용할지 전환 (/basemode on|off, 인자 없으면 토글)
+    if not is_admin(update.effective_user.id):
+        await update.message.reply_text("⛔ 관리자만 사용할 수 있는 명령어입니다.")
+        return
+    arg = context.args[0].lower() if context.args else None
+    if arg not in (None, "on", "off"):
+        await update.message.reply_text("❗ 사용법: /basemode [on|off]")
+        return
+    enabled = not context.user_data.get("base_mode") if arg is None else arg == "on"
+    context.user_data["base_mode"] = enabled
+    if enabled:
+        await update.message.reply_text("🌐 기본 숙제 목록 수정 모드: 이제 숙제/게임 수정과 /importquests가 *모든 채팅이 공유하는 quests.json*에 적용됩니다. 끄려면 /basemode off", parse_mode=ParseMode.MARKDOWN)
     else:
-        print("✅ quests.json 정규화 불필요")
-
+        await update.message.reply_text("💬 기본 숙제 목록 수정 모드를 껐습니다. 수정은 이 채팅에만 적용됩니다.")
 
-# 초기화 작업: 일일 숙제 리셋
-def reset_daily_tasks():
-    # "daily" 기간에 해당하는 모든 기록 삭제
-    storage.db.remove(storage.User.period == "daily")
-    print(f"[{datetime.datetime.now()}] Daily tasks reset.")
+def chat_catalog(update: Update):
+    return overlays.catalog(update.effective_chat.id)
 
-# 초기화 작업: 주간 숙제 리셋
-def reset_weekly_tasks():
-    # "weekly" 기간에 해당하는 모든 기록 삭제
-    storage.db.remove(storage.User.period == "weekly")
-    print(f"[{datetime.datetime.now()}] Weekly tasks reset.")
+async def reply_game_gone(update: Update, game: str):
+    # 대화 도중 다른 관리자가 게임을 바꾸거나 지운 경우
+    await update.message.reply_text(f"❌ 그 사이 '{game}' 게임이 변경되거나 삭제되었습니다. 처음부터 다시 시도해주세요.")
 
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    for key in [k for k in context.user_data if isinstance(k, tuple) and k[1] == chat_id]:
+        del context.user_data[key]
     await update.message.reply_text("🚫 이벤트 추가가 취소되었습니다.")
     return ConversationHandler.END
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    print(f"/start called by user {update.effective_user.id}")
+    log.info("/start", user_id=update.effective_user.id)
     await update.message.reply_text("봇 살아있음!")
     user_id = update.effective_user.id
     users.add_user(user_id)
-    game_list = "\n".join(f"- {game}" for game in QUESTS.keys())
+    game_list = "\n".join(f"- {game.name}" for game in chat_catalog(update).games)
     await update.message.reply_text(
         "🎮 안녕하세요! 게임 숙제 체크봇입니다.\n"
         "현재 일일 숙제 진행 중인 게임 목록:\n\n"
@@ -146,61 +226,55 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "/daily 명령어로 오늘 숙제를 확인해보세요!"
     )
 
-def get_week_of_month(date: datetime.date):
-    first_day = date.replace(day=1)
-    adjusted_dom = date.day + first_day.weekday()  # 요일 보정
-    return int(adjusted_dom / 7) + 1
-
-def build_daily_keyboard(user_id: int):
+def _build_daily_template(catalog):
     keyboard = []
 
-    # print("[디버그] QUESTS 구조 확인")
-    # print(type(QUESTS))
-    # for game, tasks in QUESTS.items():
-    #     print(f"  - {game}: {type(tasks)}")
-
-    for game, tasks in QUESTS.items():
-        daily_tasks = tasks.get("daily", [])
-        if not daily_tasks:
+    for game_index, game_info in enumerate(catalog.games):
+        game = game_info.name
+        if not game_info.daily:
             continue
-        keyboard.append([InlineKeyboardButton(f"🎮 {game}", callback_data="noop")])
+        keyboard.append([InlineKeyboardButton(f"🎮 {game}", callback_data=callbacks.NOOP)])
         row = []
-        for task in daily_tasks:
+        for task_index, task_name in enumerate(game_info.daily):
             try:
-                task_name = normalize_task(task)  # dict or str 구분해서 처리
-                checked = storage.is_checked(user_id, game, task_name)  # ⬅ 이걸로 고쳐야 함
-                checkmark = "✅" if checked else "☐"
-                btn_text = f"{checkmark} {task_name}"
-                callback_data = f"{game}|{task_name}"
-                row.append(InlineKeyboardButton(btn_text, callback_data=callback_data))
+                callback_data = callbacks.daily(catalog, game_index, task_index)
+                row.append(keyboards.toggle_cell((game, task_name), task_name, callback_data))
                 if len(row) == 2:
                     keyboard.append(row)
                     row = []
             except Exception as e:
-                print(f"[버튼 생성 실패] game={game}, task={task}, 오류={e}")
+                log.warning("버튼 생성 실패", game=game, task=task_name, error=str(e))
         if row:
             keyboard.append(row)
-    return InlineKeyboardMarkup(keyboard)
-
+    return keyboards.Template(keyboard)
+
+@profiling.traced("keyboard")
+def build_daily_keyboard(user_id: int, catalog=None):
+    # 레이아웃은 카탈로그 내용/날짜별로 캐시하고, 유저별로는 체크 표시만 채운다
+    # catalog: 키보드를 보낼 채팅의 카탈로그 (없으면 유저 본인 카탈로그)
+    if catalog is None:
+        catalog = overlays.catalog(user_id)
+    template = keyboards.get_template("daily", catalog.fingerprint, storage.get_today(user_id=user_id),
+                                      lambda: _build_daily_template(catalog))
+    return keyboards.render(template, storage.get_user_checks(user_id, "daily"))
+
+
+async def send_daily_to_all_users(app, user_ids=None):
+    # user_ids: 현지 아침이 된 유저 묶음 (타임 휠), None이면 전체
+    def build_message(user_id):
+        return {
+            "text": "☀️ 새로운 하루입니다!\n오늘의 일일 숙제를 확인해보세요!",
+            "reply_markup": build_daily_keyboard(user_id),
+            "parse_mode": ParseMode.MARKDOWN,
+        }
 
-async def send_daily_to_all_users(app):
-    from telegram.constants import ParseMode
-    for user_id in users.get_all_users():
-        try:
-            reply_markup = build_daily_keyboard(user_id)
-            await app.bot.send_message(
-                chat_id=user_id,
-                text="☀️ 새로운 하루입니다!\n오늘의 일일 숙제를 확인해보세요!",
-                reply_markup=reply_markup,
-                parse_mode=ParseMode.MARKDOWN
-            )
-        except Exception as e:
-            print(f"[ERROR] {user_id}에게 메시지 전송 실패: {e}")
+    recipients = users.get_all_users() if user_ids is None else user_ids
+    return await broadcast(app.bot, recipients, build_message, name="daily")
 
 async def daily(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     users.add_user(user_id)
-    reply_markup = build_daily_keyboard(user_id)
+    reply_markup = build_daily_keyboard(user_id, chat_catalog(update))
     await update.message.reply_text(
         "📅 오늘의 일일 숙제 체크리스트입니다.\n숙제를 완료하면 눌러서 체크하세요!",
         reply_markup=reply_markup
@@ -208,100 +282,116 @@ async def daily(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def weekly(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    reply_markup = build_weekly_keyboard(user_id)
+    reply_markup = build_weekly_keyboard(user_id, chat_catalog(update))
     await update.message.reply_text(
         "🗓️ 이번 주의 주간 숙제 체크리스트입니다.\n숙제를 완료하면 눌러서 체크하세요!",
         reply_markup=reply_markup
     )
 
-def build_weekly_keyboard(user_id: int):
+def _build_weekly_template(catalog):
     keyboard = []
-    for game, tasks in QUESTS.items():
-        weekly_tasks = tasks.get("weekly", [])
-        if not weekly_tasks:
+    for game_index, game_info in enumerate(catalog.games):
+        game = game_info.name
+        if not game_info.weekly:
             continue
-        keyboard.append([InlineKeyboardButton(f"📘 {game}", callback_data="noop")])
+        keyboard.append([InlineKeyboardButton(f"📘 {game}", callback_data=callbacks.NOOP)])
         row = []
-        for task in weekly_tasks:
-            checked = storage.is_checked(user_id, game, task, period="weekly")
-            checkmark = "✅" if checked else "☐"
-            btn_text = f"{checkmark} {task}"
-            callback_data = f"weekly|{game}|{task}"
-            row.append(InlineKeyboardButton(btn_text, callback_data=callback_data))
+        for task_index, task in enumerate(game_info.weekly):
+            callback_data = callbacks.weekly(catalog, game_index, task_index)
+            row.append(keyboards.toggle_cell((game, task), task, callback_data))
             if len(row) == 2:
                 keyboard.append(row)
                 row = []
         if row:
             keyboard.append(row)
-    return InlineKeyboardMarkup(keyboard)
+    return keyboards.Template(keyboard)
+
+@profiling.traced("keyboard")
+def build_weekly_keyboard(user_id: int, catalog=None):
+    if catalog is None:
+        catalog = overlays.catalog(user_id)
+    template = keyboards.get_template("weekly", catalog.fingerprint, storage.get_week_key(user_id=user_id),
+                                      lambda: _build_weekly_template(catalog))
+    return keyboards.render(template, storage.get_user_checks(user_id, "weekly"))
 
 (ADD_GAME, ADD_PERIOD, ADD_TASKS) = range(3)
 (DEL_GAME, DEL_PERIOD, DEL_TASKS) = range(3, 6)
 
-add_data = {}
-del_data = {}
-
 async def addtask_start(update, context):
     await update.message.reply_text("📥 숙제를 추가할 게임명을 입력해주세요:")
     return ADD_GAME
 
 async def addtask_period(update, context):
+    data = conv_data(update, context, "addtask")
     game = update.message.text.strip()
-    if game not in QUESTS:
+    if game not in chat_quests(update, context):
         await update.message.reply_text("❌ 존재하지 않는 게임입니다. 다시 입력해주세요:")
         return ADD_GAME
-    add_data["game"] = game
+    data["game"] = game
     await update.message.reply_text("📂 추가할 숙제의 유형을 선택해주세요 (daily 또는 weekly):")
     return ADD_PERIOD
 
 async def addtask_tasks(update, context):
+    data = conv_data(update, context, "addtask")
     period = update.message.text.strip().lower()
     if period not in ["daily", "weekly"]:
         await update.message.reply_text("❗ 유형은 daily 또는 weekly 중 하나만 입력해주세요:")
         return ADD_PERIOD
-    add_data["period"] = period
+    data["period"] = period
     await update.message.reply_text("📝 추가할 숙제들을 쉼표로 구분하여 입력해주세요:")
     return ADD_TASKS
 
 async def addtask_save(update, context):
+    data = conv_data(update, context, "addtask")
     tasks = [t.strip() for t in update.message.text.split(",") if t.strip()]
-    game, period = add_data["game"], add_data["period"]
-    QUESTS[game].setdefault(period, []).extend(t for t in tasks if t not in QUESTS[game][period])
-    with open(QUESTS_PATH, "w", encoding="utf-8") as f:
-        json.dump(QUESTS, f, indent=2, ensure_ascii=False)
+    game, period = data["game"], data["period"]
+    scope = chat_scope(update, context)
+    game_data = overlays.edit_game(scope, game)
+    if game_data is None:
+        await reply_game_gone(update, game)
+        return end_conv(update, context, "addtask")
+    game_data.setdefault(period, []).extend(t for t in tasks if t not in game_data[period])
+    save_overlay(scope)
     await update.message.reply_text(f"✅ '{game}'의 {period} 숙제에 항목을 추가했습니다!")
-    return ConversationHandler.END
+    return end_conv(update, context, "addtask")
 
 async def deltask_start(update, context):
     await update.message.reply_text("📤 숙제를 삭제할 게임명을 입력해주세요:")
     return DEL_GAME
 
 async def deltask_period(update, context):
+    data = conv_data(update, context, "deltask")
     game = update.message.text.strip()
-    if game not in QUESTS:
+    if game not in chat_quests(update, context):
         await update.message.reply_text("❌ 존재하지 않는 게임입니다. 다시 입력해주세요:")
         return DEL_GAME
-    del_data["game"] = game
+    data["game"] = game
     await update.message.reply_text("📂 삭제할 숙제의 유형을 선택해주세요 (daily 또는 weekly):")
     return DEL_PERIOD
 
 async def deltask_tasks(update, context):
+    data = conv_data(update, context, "deltask")
     period = update.message.text.strip().lower()
     if period not in ["daily", "weekly"]:
         await update.message.reply_text("❗ 유형은 daily 또는 weekly 중 하나만 입력해주세요:")
         return DEL_PERIOD
-    del_data["period"] = period
+    data["period"] = period
     await update.message.reply_text("🧹 삭제할 숙제들을 쉼표로 구분하여 입력해주세요:")
     return DEL_TASKS
 
 async def deltask_save(update, context):
+    data = conv_data(update, context, "deltask")
     tasks = [t.strip() for t in update.message.text.split(",") if t.strip()]
-    game, period = del_data["game"], del_data["period"]
-    QUESTS[game][period] = [t for t in QUESTS[game].get(period, []) if t not in tasks]
-    with open(QUESTS_PATH, "w", encoding="utf-8") as f:
-        json.dump(QUESTS, f, indent=2, ensure_ascii=False)
+    game, period = data["game"], data["period"]
+    scope = chat_scope(update, context)
+    game_data = overlays.edit_game(scope, game)
+    if game_data is None:
+        await reply_game_gone(update, game)
+        return end_conv(update, context, "deltask")
+    game_data[period] = [t for t in game_data.get(period, []) if t not in tasks]
+    save_overlay(scope)
     await update.message.reply_text(f"🗑️ '{game}'의 {period} 숙제에서 항목을 삭제했습니다!")
-    return ConversationHandler.END
+    return end_conv(update, context, "deltask")
 
 # 등록
 addtask_handler = ConversationHandler(
@@ -324,36 +414,78 @@ deltask_handler = ConversationHandler(
     fallbacks=[CommandHandler("cancel", cancel)],
 )
 
+# 콜백 처리: 체크 상태를 바꾸고, 키보드를 다시 그리는 함수를 반환
+# catalog: 버튼이 있는 메시지의 채팅 카탈로그 (키보드도 같은 카탈로그로 다시 그림)
+def _toggle_daily(user_id, catalog, game, task):
+    storage.toggle_check(user_id, game, task, period="daily")
+    return lambda: build_daily_keyboard(user_id, catalog)
+
+def _toggle_weekly(user_id, catalog, game, task):
+    storage.toggle_check(user_id, game, task, period="weekly")
+    return lambda: build_weekly_keyboard(user_id, catalog)
+
+def _toggle_event(user_id, catalog, game, evt_name, task, date_key):
+    storage.toggle_event_check(user_id, game, evt_name, task, date_key)
+    return lambda: build_event_keyboard(user_id, catalog)
+
+CALLBACK_ACTIONS = {
+    callbacks.DAILY: _toggle_daily,
+    callbacks.WEEKLY: _toggle_weekly,
+    callbacks.EVENT: _toggle_event,
+}
+
+# 카탈로그가 바뀌어 해석할 수 없는 예전 키보드는 현재 키보드로 교체만 한다
+CALLBACK_REFRESH = {
+    callbacks.DAILY: lambda user_id, catalog: build_daily_keyboard(user_id, catalog),
+    callbacks.WEEKLY: lambda user_id, catalog: build_weekly_keyboard(user_id, catalog),
+    callbacks.EVENT: lambda user_id, catalog: build_event_keyboard(user_id, catalog),  # 아래에서 정의됨
+}
+
+# /metrics 라벨용 콜백 동작 이름
+CALLBACK_ACTION_NAMES = {
+    callbacks.NOOP: "noop",
+    callbacks.DAILY: "daily",
+    callbacks.WEEKLY: "weekly",
+    callbacks.EVENT: "event",
+}
+
 async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     user_id = query.from_user.id
-    await query.answer()
-    if query.data == "noop":
+    # 인라인 모드처럼 메시지가 없으면 유저 본인 카탈로그
+    catalog = overlays.catalog(query.message.chat_id if query.message is not None else user_id)
+    try:
+        kind, args = callbacks.decode(query.data, catalog)
+    except ValueError:
+        kind, args = callbacks.legacy_kind(query.data), None
+        if kind is None:
+            log.warning("[콜백 무시] 해석할 수 없는 데이터", user_id=query.from_user.id, data=query.data)
+            await query.answer()
+            return
+    action = CALLBACK_ACTION_NAMES[kind] if args is not None else "stale"
+    with metrics.CALLBACK_SECONDS.time(action=action):
+        await _apply_callback(query, user_id, catalog, kind, args)
+
+async def _apply_callback(query, user_id, catalog, kind, args):
+    if kind == callbacks.NOOP:
+        await query.answer()
         return
 
-    if query.data.startswith("weekly|"):
-        _, game, task = query.data.split("|")
-        storage.toggle_check(user_id, game, task, period="weekly")
-        reply_markup = build_weekly_keyboard(user_id)
-    elif query.data.startswith("event|"):
-        # 이벤트 콜백 데이터 형식: "event|game|evt_name|task|date_key"
-        parts = query.data.split("|")
-        if len(parts) == 5:
-            _, game, evt_name, task, date_key = parts
-            storage.toggle_event_check(user_id, game, evt_name, task, date_key)
-            reply_markup = build_event_keyboard(user_id)
-        else:
-            reply_markup = None
+    if args is None:
+        await query.answer("🔄 숙제 목록이 바뀌어 키보드를 새로 고쳤어요. 다시 눌러주세요!")
+        refresh = CALLBACK_REFRESH[kind]
+        build_markup = lambda: refresh(user_id, catalog)
     else:
-        try:
-            game, task = query.data.split("|")
-        except ValueError:
-            return
-        storage.toggle_check(user_id, game, task, period="daily")
-        reply_markup = build_daily_keyboard(user_id)
-
-    if reply_markup is not None:
-        await query.edit_message_reply_markup(reply_markup=reply_markup)
+        await query.answer()
+        build_markup = CALLBACK_ACTIONS[kind](user_id, catalog, *args)
+
+    # 체크는 이미 반영됨 → 키보드 수정은 메시지별로 모아서 최신 상태만, 바뀐 경우에만 전송
+    edit = lambda markup: query.edit_message_reply_markup(reply_markup=markup)
+    message = query.message
+    if message is None:
+        await edit(build_markup())
+        return
+    await edits.request_edit((message.chat_id, message.message_id), build_markup, edit, current=message.reply_markup)
 
 async def complete(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
@@ -371,11 +503,12 @@ async def complete(update: Update, context: ContextTypes.DEFAULT_TYPE):
         game = " ".join(context.args)
         period = "daily"
 
-    if game not in QUESTS:
+    game_info = chat_catalog(update).game(game)
+    if game_info is None:
         await update.message.reply_text(f"❌ 존재하지 않는 게임입니다: {game}")
         return
 
-    task_list = QUESTS[game].get(period, [])
+    task_list = game_info.daily if period == "daily" else game_info.weekly
     if not task_list:
         await update.message.reply_text(f"📭 '{game}'에는 {period} 숙제가 없습니다.")
         return
@@ -386,19 +519,9 @@ async def complete(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def done(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     users.add_user(user_id)
-    today = date.today()
-    all_completed = True
-
-    for game, data in QUESTS.items():
-        # 일반 daily 숙제만 확인 (이벤트는 이미 daily에 병합됨)
-        for task in data.get("daily", []):
-            if not storage.is_checked(user_id, game, task, period="daily"):
-                all_completed = False
-                break
-        if not all_completed:
-            break
-
-    if all_completed:
+
+    # 일반 daily 숙제만 확인 (이벤트는 이미 daily에 병합됨), 체크할 때마다 갱신되는 카운터로 바로 판정
+    if day_progress.is_day_complete(user_id, chat_catalog(update)):
         day_n = users.update_day_complete(user_id)
         await update.message.reply_text(f"🎉 오늘의 숙제를 모두 완료했습니다!\n🔥 Day {day_n} 클리어!")
     else:
@@ -408,102 +531,147 @@ async def progress(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     users.add_user(user_id)
     msg = "📊 오늘의 진행 상황\n"
-    for game, tasks in QUESTS.items():
-        daily_tasks = tasks.get("daily", [])
+    checks = storage.get_user_checks(user_id, "daily")
+    for game_info in chat_catalog(update).games:
+        game, daily_tasks = game_info.name, game_info.daily
         if not daily_tasks:
             continue
         total = len(daily_tasks)
-        completed = sum(1 for task in daily_tasks if storage.is_checked(user_id, game, task, period="daily"))
+        completed = sum(1 for task in daily_tasks if (game, task) in checks)
         checkmark = " ✅" if completed == total else ""
         msg += f"\n🎮 {game}: {completed} / {total} 완료{checkmark}"
     await update.message.reply_text(msg)
 
+# 유저별 시간대 / 초기화 시각 (날짜 기준, 아침 알림 시각에 반영)
+def _clock_text(clock):
+    return (f"🌏 시간대: {clock.timezone}\n"
+            f"🔄 초기화: 매일 {clock.reset_hour}시 (주간은 월요일)\n"
+            f"⏰ 아침 알림: {config.REMINDER_HOUR}시")
+
+def _parse_hour(text):
+    try:
+        return int(text)
+    except ValueError:
+        raise ValueError(f"초기화 시각은 0~23 사이 숫자여야 합니다: {text}") from None
+
+async def _apply_clock(update: Update, tz_name=None, reset_hour=None):
+    user_id = update.effective_user.id
+    try:
+        clock = users.set_clock_settings(user_id, tz_name, reset_hour)
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {e}")
+        return
+    day_progress.recount(user_id)  # 오늘 날짜가 바뀌었을 수 있으니 완료 카운터 다시 계산
+    await update.message.reply_text(
+        f"✅ 설정을 바꿨습니다.\n{_clock_text(clock)}\n\n⚠️ 날짜 기준이 바뀌면 오늘 체크 기록이 초기화될 수 있어요."
+    )
+
+async def set_timezone(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_id = update.effective_user.id
+    users.add_user(user_id)
+    if not context.args:
+        await update.message.reply_text(
+            f"{_clock_text(periods.clock_for(user_id))}\n\n"
+            "❗ 사용법: /timezone [시간대] [초기화 시각(optional)]\n예) /timezone America/New_York 6"
+        )
+        return
+    try:
+        reset_hour = _parse_hour(context.args[1]) if len(context.args) > 1 else None
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {e}")
+        return
+    await _apply_clock(update, context.args[0], reset_hour)
+
+async def set_reset_hour(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_id = update.effective_user.id
+    users.add_user(user_id)
+    if len(context.args) != 1:
+        await update.message.reply_text(
+            f"{_clock_text(periods.clock_for(user_id))}\n\n❗ 사용법: /resethour [0~23]\n예) /resethour 5"
+        )
+        return
+    try:
+        reset_hour = _parse_hour(context.args[0])
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {e}")
+        return
+    await _apply_clock(update, reset_hour=reset_hour)
+
 async def event(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     users.add_user(user_id)
-    today = date.today()
-    keyboard = []
-    for game, data in QUESTS.items():
-        events = data.get("events", [])
-        for evt in events:
-            evt_name = evt["name"]
-            evt_type = evt.get("type", "once")
-            until = date.fromisoformat(evt["until"])
-            if today > until:
-                continue  # 종료된 이벤트
-            date_key = today.strftime("%Y-%m-%d") if evt_type == "daily" else evt["until"]
-            keyboard.append([InlineKeyboardButton(f"🎉 {game} - {evt_name}", callback_data="noop")])
-            row = []
-            for task in evt["tasks"]:
-                checked = storage.is_event_checked(user_id, game, evt_name, task["name"], date_key)
-                mark = "✅" if checked else "☐"
-                callback_data = f"event|{game}|{evt_name}|{task['name']}|{date_key}"
-                row.append(InlineKeyboardButton(f"{mark} {task['name']}", callback_data=callback_data))
-                if len(row) == 2:
-                    keyboard.append(row)
-                    row = []
-            if row:
-                keyboard.append(row)
-    if not keyboard:
+    reply_markup = build_event_keyboard(user_id, chat_catalog(update))
+    if not reply_markup.inline_keyboard:
         await update.message.reply_text("📭 현재 진행 중인 이벤트가 없습니다.")
         return
-    reply_markup = InlineKeyboardMarkup(keyboard)
     await update.message.reply_text("📅 진행 중인 이벤트 목록입니다!", reply_markup=reply_markup)
 
-def build_event_keyboard(user_id: int):
-    # 이벤트 목록을 다시 빌드하는 함수
+def _build_event_template(catalog, today):
+    # 이벤트 목록 레이아웃 (today에 진행 중인 이벤트만)
     keyboard = []
-    today = date.today()
-    for game, data in QUESTS.items():
-        events = data.get("events", [])
-        for evt in events:
-            evt_name = evt["name"]
-            evt_type = evt.get("type", "once")
-            until = date.fromisoformat(evt["until"])
-            if today > until:
-                continue
-            date_key = today.strftime("%Y-%m-%d") if evt_type == "daily" else evt["until"]
-            keyboard.append([InlineKeyboardButton(f"🎉 {game} - {evt_name}", callback_data="noop")])
-            row = []
-            for task in evt["tasks"]:
-                checked = storage.is_event_checked(user_id, game, evt_name, task["name"], date_key)
-                mark = "✅" if checked else "☐"
-                callback_data = f"event|{game}|{evt_name}|{task['name']}|{date_key}"
-                row.append(InlineKeyboardButton(f"{mark} {task['name']}", callback_data=callback_data))
-                if len(row) == 2:
-                    keyboard.append(row)
-                    row = []
-            if row:
+    date_keys = []
+    for evt in catalog.events_active_on(today):
+        game, evt_name = evt.game, evt.name
+        date_key = evt.date_key(today)
+        if date_key not in date_keys:
+            date_keys.append(date_key)
+        keyboard.append([InlineKeyboardButton(f"🎉 {game} - {evt_name}", callback_data=callbacks.NOOP)])
+        row = []
+        for task_index, task in enumerate(evt.tasks):
+            callback_data = callbacks.event(catalog, evt, task_index, date_key)
+            entry = (date_key, game, evt_name, task.name)
+            row.append(keyboards.toggle_cell(entry, task.name, callback_data))
+            if len(row) == 2:
                 keyboard.append(row)
-    return InlineKeyboardMarkup(keyboard)
+                row = []
+        if row:
+            keyboard.append(row)
+    return keyboards.Template(keyboard, date_keys)
+
+@profiling.traced("keyboard")
+def build_event_keyboard(user_id: int, catalog=None):
+    if catalog is None:
+        catalog = overlays.catalog(user_id)
+    today = periods.get_game_date(user_id=user_id)
+    template = keyboards.get_template("event", catalog.fingerprint, today.isoformat(),
+                                      lambda: _build_event_template(catalog, today))
+    # date_key별 체크 목록 (이벤트마다 키가 다를 수 있음)
+    checks = {
+        (date_key,) + entry
+        for date_key in template.date_keys
+        for entry in storage.get_user_checks(user_id, "event", date_key)
+    }
+    return keyboards.render(template, checks)
 
 (ASK_GAME, ASK_EVENT_NAME, ASK_UNTIL, ASK_TASK_NAME, ASK_TASK_TYPE, ASK_MORE_TASKS) = range(6)
-event_data = {}
 
 async def addevent_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("🎮 이벤트를 추가할 게임명을 입력해주세요:")
     return ASK_GAME
 
 async def ask_event_name(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    data = conv_data(update, context, "addevent")
     game = update.message.text
-    if game not in QUESTS:
+    if game not in chat_quests(update, context):
         await update.message.reply_text("❌ 존재하지 않는 게임입니다. 다시 입력해주세요:")
         return ASK_GAME
-    event_data.clear()
-    event_data["game"] = game
+    data.clear()
+    data["game"] = game
     await update.message.reply_text("📛 이벤트 이름을 입력해주세요:")
     return ASK_EVENT_NAME
 
 async def ask_until(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    event_data["name"] = update.message.text
+    data = conv_data(update, context, "addevent")
+    data["name"] = update.message.text
     await update.message.reply_text("📅 이벤트 종료일을 입력해주세요 (예: 2025-04-15):")
     return ASK_UNTIL
 
 async def ask_task_name(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    data = conv_data(update, context, "addevent")
     try:
         until_date = datetime.fromisoformat(update.message.text).date()
-        event_data["until"] = str(until_date)
-        event_data["tasks"] = []
+        data["until"] = str(until_date)
+        data["tasks"] = []
     except:
         await update.message.reply_text("❗날짜 형식이 올바르지 않아요. 예: 2025-04-15")
         return ASK_UNTIL
@@ -511,36 +679,43 @@ async def ask_task_name(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return ASK_TASK_NAME
 
 async def ask_task_type(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    event_data["current_task"] = update.message.text.strip()
+    data = conv_data(update, context, "addevent")
+    data["current_task"] = update.message.text.strip()
     await update.message.reply_text("📂 숙제 타입을 선택해주세요 (daily / once):")
     return ASK_TASK_TYPE
 
 async def ask_more_tasks(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    data = conv_data(update, context, "addevent")
     task_type = update.message.text.strip().lower()
     if task_type not in ["daily", "once"]:
         await update.message.reply_text("❌ daily 또는 once 중에 선택해주세요:")
         return ASK_TASK_TYPE
-    event_data["tasks"].append({
-        "name": event_data["current_task"],
+    data["tasks"].append({
+        "name": data["current_task"],
         "type": task_type
     })
     await update.message.reply_text("➕ 숙제를 더 추가하시겠습니까? (예/아니오):")
     return ASK_MORE_TASKS
 
 async def save_event_or_continue(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    data = conv_data(update, context, "addevent")
     answer = update.message.text.strip().lower()
     if answer in ["아니오", "n", "no"]:
-        game = event_data["game"]
+        game = data["game"]
+        scope = chat_scope(update, context)
+        game_data = overlays.edit_game(scope, game)
+        if game_data is None:
+            await reply_game_gone(update, game)
+            return end_conv(update, context, "addevent")
         new_event = {
-            "name": event_data["name"],
-            "until": event_data["until"],
-            "tasks": event_data["tasks"]
+            "name": data["name"],
+            "until": data["until"],
+            "tasks": data["tasks"]
         }
-        QUESTS[game].setdefault("events", []).append(new_event)
-        with open(QUESTS_PATH, "w", encoding="utf-8") as f:
-            json.dump(QUESTS, f, indent=2, ensure_ascii=False)
-        await update.message.reply_text(f"✅ 이벤트가 추가되었습니다!\n📌 {event_data['name']} ({len(event_data['tasks'])}개 숙제)")
-        return ConversationHandler.END
+        game_data.setdefault("events", []).append(new_event)
+        save_overlay(scope)
+        await update.message.reply_text(f"✅ 이벤트가 추가되었습니다!\n📌 {data['name']} ({len(data['tasks'])}개 숙제)")
+        return end_conv(update, context, "addevent")
     else:
         await update.message.reply_text("📝 다음 숙제명을 입력해주세요:")
         return ASK_TASK_NAME
@@ -559,74 +734,88 @@ addevent_handler = ConversationHandler(
 )
 
 (RENAME_OLD_NAME, RENAME_NEW_NAME) = range(10, 12)
-rename_data = {}
 
 async def renamegame_start(update, context):
     await update.message.reply_text("✏️ 변경할 기존 게임명을 입력해주세요:")
     return RENAME_OLD_NAME
 
 async def renamegame_new(update, context):
+    data = conv_data(update, context, "renamegame")
     old_name = update.message.text.strip()
-    if old_name not in QUESTS:
+    if old_name not in chat_quests(update, context):
         await update.message.reply_text("❌ 해당 게임이 존재하지 않습니다. 다시 입력해주세요:")
         return RENAME_OLD_NAME
-    rename_data["old"] = old_name
+    data["old"] = old_name
     await update.message.reply_text("📛 새 게임명을 입력해주세요:")
     return RENAME_NEW_NAME
 
 async def renamegame_apply(update, context):
+    data = conv_data(update, context, "renamegame")
     new_name = update.message.text.strip()
-    old_name = rename_data["old"]
-    QUESTS[new_name] = QUESTS.pop(old_name)
-    with open(QUESTS_PATH, "w", encoding="utf-8") as f:
-        json.dump(QUESTS, f, indent=2, ensure_ascii=False)
+    old_name = data["old"]
+    scope = chat_scope(update, context)
+    if not overlays.rename_game(scope, old_name, new_name):
+        await reply_game_gone(update, old_name)
+        return end_conv(update, context, "renamegame")
+    save_overlay(scope)
     await update.message.reply_text(f"✅ '{old_name}' → '{new_name}' 로 이름이 변경되었습니다.")
-    return ConversationHandler.END
+    return end_conv(update, context, "renamegame")
 
 (EDIT_GAME, EDIT_PERIOD, EDIT_OLD_TASK, EDIT_NEW_TASK) = range(20, 24)
-edit_data = {}
 
 async def editquest_start(update, context):
     await update.message.reply_text("🛠 수정할 게임명을 입력해주세요:")
     return EDIT_GAME
 
 async def editquest_period(update, context):
+    data = conv_data(update, context, "editquest")
     game = update.message.text.strip()
-    if game not in QUESTS:
+    if game not in chat_quests(update, context):
         await update.message.reply_text("❌ 해당 게임이 존재하지 않습니다. 다시 입력해주세요:")
         return EDIT_GAME
-    edit_data["game"] = game
+    data["game"] = game
     await update.message.reply_text("📂 수정할 숙제 유형을 입력해주세요 (daily / weekly):")
     return EDIT_PERIOD
 
 async def editquest_old(update, context):
+    data = conv_data(update, context, "editquest")
     period = update.message.text.strip().lower()
     if period not in ["daily", "weekly"]:
         await update.message.reply_text("❗ daily 또는 weekly 중에서 입력해주세요:")
         return EDIT_PERIOD
-    edit_data["period"] = period
+    data["period"] = period
     await update.message.reply_text("✏️ 수정할 기존 숙제명을 입력해주세요:")
     return EDIT_OLD_TASK
 
 async def editquest_new(update, context):
+    data = conv_data(update, context, "editquest")
     old_task = update.message.text.strip()
-    game, period = edit_data["game"], edit_data["period"]
-    if old_task not in QUESTS[game].get(period, []):
+    game, period = data["game"], data["period"]
+    game_data = chat_quests(update, context).get(game)
+    if game_data is None:
+        await reply_game_gone(update, game)
+        return end_conv(update, context, "editquest")
+    if old_task not in game_data.get(period, []):
         await update.message.reply_text("❌ 해당 숙제가 존재하지 않습니다. 다시 입력해주세요:")
         return EDIT_OLD_TASK
-    edit_data["old"] = old_task
+    data["old"] = old_task
     await update.message.reply_text("🆕 새 숙제명을 입력해주세요:")
     return EDIT_NEW_TASK
 
 async def editquest_apply(update, context):
+    data = conv_data(update, context, "editquest")
     new_task = update.message.text.strip()
-    game, period, old = edit_data["game"], edit_data["period"], edit_data["old"]
-    tasks = QUESTS[game][period]
-    QUESTS[game][period] = [new_task if t == old else t for t in tasks]
-    with open(QUESTS_PATH, "w", encoding="utf-8") as f:
-        json.dump(QUESTS, f, indent=2, ensure_ascii=False)
+    game, period, old = data["game"], data["period"], data["old"]
+    scope = chat_scope(update, context)
+    game_data = overlays.edit_game(scope, game)
+    if game_data is None:
+        await reply_game_gone(update, game)
+        return end_conv(update, context, "editquest")
+    tasks = game_data.get(period, [])
+    game_data[period] = [new_task if t == old else t for t in tasks]
+    save_overlay(scope)
     await update.message.reply_text(f"✅ '{old}' → '{new_task}' 로 숙제명이 수정되었습니다!")
-    return ConversationHandler.END
+    return end_conv(update, context, "editquest")
 
 renamegame_handler = ConversationHandler(
     entry_points=[CommandHandler("renamegame", renamegame_start)],
@@ -649,91 +838,120 @@ editquest_handler = ConversationHandler(
 )
 
 # 이벤트 만료 후 제거 + daily type은 daily에 반영 (단 제거는 하지 않음)
-def refresh_event_tasks():
-    today = date.today()
+def _refresh_events(quests, catalog, today):
+    # quests: 수정할 게임 dict 모음, catalog: 그 quests를 컴파일한 카탈로그. 바뀐 게 있으면 True
     modified = False
-    for game, data in QUESTS.items():
-        events = data.get("events", [])
-        new_events = []
-        daily_from_events = set(data.get("daily", []))  # 기존 daily 숙제들
 
-        for evt in events:
-            until = datetime.fromisoformat(evt["until"]).date()
-            if today > until:
-                modified = True  # 만료된 이벤트는 제거
-                continue
-
-            for task in evt.get("tasks", []):
-                if task["type"] == "daily":
-                    task_name = task["name"]
-                    if task_name not in daily_from_events:
-                        daily_from_events.add(task_name)
-                        modified = True
-            new_events.append(evt)
-
-        # 중복 없이 업데이트
-        original_daily = set(data.get("daily", []))
-        data["daily"] = list(original_daily.union(daily_from_events))
+    # 종료일 인덱스로 만료된 이벤트만 골라 제거
+    expired = {}
+    for evt in catalog.events_expired_before(today):
+        expired.setdefault(evt.game, set()).add(evt.name)
+    for game, names in expired.items():
+        quests[game]["events"] = [e for e in quests[game].get("events", []) if e.get("name") not in names]
+        modified = True
+
+    # 진행 중인 이벤트의 daily 숙제를 게임 daily 목록 뒤에 (중복 없이, 순서 유지) 추가
+    for evt in catalog.events_active_on(today):
+        daily = quests[evt.game].setdefault("daily", [])
+        existing = {normalize_task(t) for t in daily}
+        for task in evt.tasks:
+            if task.type == "daily" and task.name not in existing:
+                daily.append(task.name)
+                existing.add(task.name)
+                modified = True
+    return modified
 
+def refresh_event_tasks():
+    # 날짜가 가장 늦게 바뀌는 시간대 기준 (다른 유저에게 아직 진행 중인 이벤트를 지우지 않도록)
+    today = periods.earliest_game_date()
+    modified = _refresh_events(QUESTS, CATALOG, today)
     if modified:
-        with open(QUESTS_PATH, "w", encoding="utf-8") as f:
-            json.dump(QUESTS, f, indent=2, ensure_ascii=False)
-        print("✅ daily 이벤트 반영 및 만료 제거 완료")
+        save_quests()
+
+    # 채팅별로 복사해 둔 게임도 같은 규칙으로 (공유하는 기본 게임은 위에서 이미 반영됨)
+    scopes = 0
+    for scope in overlays.scopes():
+        games = overlays.own_games(scope)
+        if games and _refresh_events(games, compile_catalog(games), today):
+            save_overlay(scope)
+            scopes += 1
+
+    if modified or scopes:
+        log.info("✅ daily 이벤트 반영 및 만료 제거 완료", base=modified, scopes=scopes)
     else:
-        print("✅ 업데이트 필요 없음")
+        log.info("✅ 업데이트 필요 없음")
 
 # 이벤트 알림용 함수
-async def notify_once_event_tasks(app):
-    today = date.today()
-    tomorrow = today + timedelta(days=1)
-    for user_id in users.get_all_users():
-        try:
-            msg = "📢 내일 마감되는 one-time 이벤트 숙제가 있어요!\n"
-            found = False
-            for game, data in QUESTS.items():
-                for evt in data.get("events", []):
-                    until = datetime.fromisoformat(evt["until"]).date()
-                    if until == tomorrow:
-                        once_tasks = [t["name"] for t in evt.get("tasks", []) if t["type"] == "once"]
-                        if once_tasks:
-                            found = True
-                            msg += f"\n🎮 {game} - {evt['name']}\n- " + "\n- ".join(once_tasks)
-            if found:
-                await app.bot.send_message(chat_id=user_id, text=msg)
-        except Exception as e:
-            print(f"[ERROR] {user_id}에게 one-time 알림 실패: {e}")
+def _deadline_message(catalog, day):
+    msg = "📢 내일 마감되는 one-time 이벤트 숙제가 있어요!\n"
+    found = False
+    for evt in catalog.events_ending_on(day):
+        once_tasks = [t.name for t in evt.tasks if t.type == "once"]
+        if once_tasks:
+            found = True
+            msg += f"\n🎮 {evt.game} - {evt.name}\n- " + "\n- ".join(once_tasks)
+    return msg if found else None
+
+async def notify_once_event_tasks(app, user_ids=None):
+    # user_ids: 현지 아침이 된 유저 묶음 (타임 휠), None이면 전체. '내일'은 유저 시간대 기준
+    recipients = users.get_all_users() if user_ids is None else user_ids
+    tomorrows = {periods.get_game_date(clock=clock) + timedelta(days=1) for clock in periods.clocks()}
+
+    # 같은 카탈로그 + 같은 날짜인 유저끼리는 같은 메시지 → (fingerprint, 날짜)마다 한 번만 만든다
+    messages = {}
+    def message_for(catalog, tomorrow):
+        key = (catalog.fingerprint, tomorrow)
+        if key not in messages:
+            messages[key] = _deadline_message(catalog, tomorrow)
+        return messages[key]
+
+    catalogs = [CATALOG] + [overlays.catalog(scope) for scope in overlays.scopes()]
+    if not any([message_for(catalog, tomorrow) for catalog in catalogs for tomorrow in tomorrows]):
+        return None
+
+    def build_message(user_id):
+        tomorrow = periods.get_game_date(user_id=user_id) + timedelta(days=1)
+        msg = message_for(overlays.catalog(user_id), tomorrow)
+        return {"text": msg} if msg else None
+
+    return await broadcast(app.bot, recipients, build_message, name="event_deadline")
 
 # 이벤트 삭제 핸들러
 (DEL_EVT_GAME, DEL_EVT_NAME) = range(30, 32)
-del_event_data = {}
 
 async def delevent_start(update, context):
     await update.message.reply_text("🗑️ 삭제할 이벤트의 게임명을 입력해주세요:")
     return DEL_EVT_GAME
 
 async def delevent_name(update, context):
+    data = conv_data(update, context, "delevent")
     game = update.message.text.strip()
-    if game not in QUESTS or not QUESTS[game].get("events"):
+    game_data = chat_quests(update, context).get(game)
+    if game_data is None or not game_data.get("events"):
         await update.message.reply_text("❌ 이벤트가 존재하지 않는 게임입니다.")
-        return ConversationHandler.END
-    del_event_data["game"] = game
-    event_names = [evt["name"] for evt in QUESTS[game]["events"]]
+        return end_conv(update, context, "delevent")
+    data["game"] = game
+    event_names = [evt["name"] for evt in game_data["events"]]
     await update.message.reply_text(f"🔍 삭제할 이벤트 이름을 입력해주세요:\n현재 이벤트: {', '.join(event_names)}")
     return DEL_EVT_NAME
 
 async def delevent_confirm(update, context):
+    data = conv_data(update, context, "delevent")
     evt_name = update.message.text.strip()
-    game = del_event_data["game"]
-    before_count = len(QUESTS[game]["events"])
-    QUESTS[game]["events"] = [evt for evt in QUESTS[game]["events"] if evt["name"] != evt_name]
-    after_count = len(QUESTS[game]["events"])
-    if before_count == after_count:
+    game = data["game"]
+    game_data = chat_quests(update, context).get(game)
+    if game_data is None:
+        await reply_game_gone(update, game)
+        return end_conv(update, context, "delevent")
+    if not any(evt["name"] == evt_name for evt in game_data.get("events", [])):
         await update.message.reply_text("❗ 해당 이벤트를 찾을 수 없습니다.")
     else:
-        with open(QUESTS_PATH, "w", encoding="utf-8") as f:
-            json.dump(QUESTS, f, indent=2, ensure_ascii=False)
+        scope = chat_scope(update, context)
+        game_data = overlays.edit_game(scope, game)
+        game_data["events"] = [evt for evt in game_data.get("events", []) if evt["name"] != evt_name]
+        save_overlay(scope)
         await update.message.reply_text(f"✅ '{evt_name}' 이벤트가 삭제되었습니다.")
-    return ConversationHandler.END
+    return end_conv(update, context, "delevent")
 
 delevent_handler = ConversationHandler(
     entry_points=[CommandHandler("delevent", delevent_start)],
@@ -746,53 +964,66 @@ delevent_handler = ConversationHandler(
 
 # 이벤트 수정 핸들러
 (EDIT_EVT_GAME, EDIT_EVT_NAME, EDIT_EVT_OLD_TASK, EDIT_EVT_NEW_TASK) = range(40, 44)
-edit_event_data = {}
 
 async def editevent_start(update, context):
     await update.message.reply_text("🛠 이벤트 숙제를 수정할 게임명을 입력해주세요:")
     return EDIT_EVT_GAME
 
 async def editevent_name(update, context):
+    data = conv_data(update, context, "editevent")
     game = update.message.text.strip()
-    if game not in QUESTS or not QUESTS[game].get("events"):
+    game_data = chat_quests(update, context).get(game)
+    if game_data is None or not game_data.get("events"):
         await update.message.reply_text("❌ 이벤트가 존재하지 않는 게임입니다.")
-        return ConversationHandler.END
-    edit_event_data["game"] = game
-    event_names = [evt["name"] for evt in QUESTS[game]["events"]]
+        return end_conv(update, context, "editevent")
+    data["game"] = game
+    event_names = [evt["name"] for evt in game_data["events"]]
     await update.message.reply_text(f"📝 이벤트 이름을 입력해주세요:\n{', '.join(event_names)}")
     return EDIT_EVT_NAME
 
+def _find_event_task(game_data, name, task_name=None):
+    # 대화 단계 사이에 다른 관리자가 수정했을 수 있으므로 매번 채팅 카탈로그에서 다시 찾는다
+    evt = next((e for e in (game_data or {}).get("events", []) if e["name"] == name), None)
+    if evt is None or task_name is None:
+        return evt, None
+    return evt, next((t for t in evt["tasks"] if t["name"] == task_name), None)
+
 async def editevent_old_task(update, context):
+    data = conv_data(update, context, "editevent")
     name = update.message.text.strip()
-    game = edit_event_data["game"]
-    evt = next((e for e in QUESTS[game]["events"] if e["name"] == name), None)
+    evt, _ = _find_event_task(chat_quests(update, context).get(data["game"]), name)
     if not evt:
         await update.message.reply_text("❌ 이벤트를 찾을 수 없습니다.")
-        return ConversationHandler.END
-    edit_event_data["name"] = name
+        return end_conv(update, context, "editevent")
+    data["name"] = name
     task_names = [t["name"] for t in evt["tasks"]]
     await update.message.reply_text(f"✏️ 수정할 숙제명을 입력해주세요:\n{', '.join(task_names)}")
     return EDIT_EVT_OLD_TASK
 
 async def editevent_new_task(update, context):
+    data = conv_data(update, context, "editevent")
     old_task = update.message.text.strip()
-    game, name = edit_event_data["game"], edit_event_data["name"]
-    evt = next((e for e in QUESTS[game]["events"] if e["name"] == name), None)
-    task = next((t for t in evt["tasks"] if t["name"] == old_task), None)
+    _, task = _find_event_task(chat_quests(update, context).get(data["game"]), data["name"], old_task)
     if not task:
         await update.message.reply_text("❌ 해당 숙제가 없습니다.")
-        return ConversationHandler.END
-    edit_event_data["old_task"] = task
+        return end_conv(update, context, "editevent")
+    data["old_task"] = old_task
     await update.message.reply_text("🆕 새 숙제명을 입력해주세요:")
     return EDIT_EVT_NEW_TASK
 
 async def editevent_apply(update, context):
+    data = conv_data(update, context, "editevent")
     new_name = update.message.text.strip()
-    edit_event_data["old_task"]["name"] = new_name
-    with open(QUESTS_PATH, "w", encoding="utf-8") as f:
-        json.dump(QUESTS, f, indent=2, ensure_ascii=False)
+    _, task = _find_event_task(chat_quests(update, context).get(data["game"]), data["name"], data["old_task"])
+    if not task:
+        await update.message.reply_text("❌ 그 사이 이벤트 숙제가 변경되거나 삭제되었습니다. 처음부터 다시 시도해주세요.")
+        return end_conv(update, context, "editevent")
+    scope = chat_scope(update, context)
+    _, task = _find_event_task(overlays.edit_game(scope, data["game"]), data["name"], data["old_task"])
+    task["name"] = new_name
+    save_overlay(scope)
     await update.message.reply_text("✅ 숙제명이 수정되었습니다.")
-    return ConversationHandler.END
+    return end_conv(update, context, "editevent")
 
 editevent_handler = ConversationHandler(
     entry_points=[CommandHandler("editevent", editevent_start)],
@@ -807,69 +1038,82 @@ editevent_handler = ConversationHandler(
 
 # 숙제 목록 출력
 async def listtasks(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    today = date.today()
+    today = periods.get_game_date(user_id=update.effective_user.id)
     msg = "📋 현재 등록된 숙제 목록입니다:\n"
 
-    # 기본 숙제 출력
-    for game, tasks in QUESTS.items():
-        msg += f"\n🎮 {game}\n"
-        daily = tasks.get("daily", [])
-        weekly = tasks.get("weekly", [])
-        if daily:
-            msg += f"- Daily: {', '.join(daily)}\n"
-        if weekly:
-            msg += f"- Weekly: {', '.join(weekly)}\n"
-
-    # 이벤트 D-DAY 정렬 후 출력
-    event_lines = []
-    for game, data in QUESTS.items():
-        for evt in data.get("events", []):
-            until = datetime.fromisoformat(evt["until"]).date()
-            dday = (until - today).days
-            dday_text = f"D-{dday}" if dday >= 0 else f"D+{abs(dday)}"
-            line = f"[ {dday_text} ] {game} - {evt['name']}\n"
-            for task in evt["tasks"]:
-                line += f"  • [{task['type']}] {task['name']}\n"
-            event_lines.append((dday, line))
+    catalog = chat_catalog(update)
 
-    if event_lines:
+    # 기본 숙제 출력
+    for game_info in catalog.games:
+        msg += f"\n🎮 {game_info.name}\n"
+        if game_info.daily:
+            msg += f"- Daily: {', '.join(game_info.daily)}\n"
+        if game_info.weekly:
+            msg += f"- Weekly: {', '.join(game_info.weekly)}\n"
+
+    # 이벤트 D-DAY 순서 출력 (카탈로그의 종료일 인덱스가 이미 정렬되어 있음)
+    events = catalog.events_by_deadline()
+    if events:
         msg += "\n📅 진행 중인 이벤트:\n"
-        for _, line in sorted(event_lines, key=lambda x: x[0]):
-            msg += line
+        for evt in events:
+            dday = (evt.until - today).days
+            dday_text = f"D-{dday}" if dday >= 0 else f"D+{abs(dday)}"
+            msg += f"[ {dday_text} ] {evt.game} - {evt.name}\n"
+            for task in evt.tasks:
+                msg += f"  • [{task.type}] {task.name}\n"
 
     await update.message.reply_text(msg)
 
 async def test_notify(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.effective_user.id
     refresh_event_tasks()
     await update.message.reply_text("📨 테스트 알림을 전송합니다.")
-    await send_daily_to_all_users(context.application)
+    stats = await send_daily_to_all_users(context.application)
+    await update.message.reply_text(
+        f"📊 전송 {stats['sent']}/{stats['total']}건, 실패 {stats['failed']}건, "
+        f"재시도 {stats['retried']}회 ({stats['elapsed']}초, {stats['rate']}건/초)"
+    )
 
-# 백업 함수
+# 백업 함수 (전용 백업 스레드에서 실행됨)
 
 def backup_quests():
     try:
-        rolling_backup("/data/quests.json")
-        cleanup_old_backups("/data")
-        print("📦 quests.json 백업 완료")
-    except Exception as e:
-        print(f"[백업 실패] {e}")
+        QUEST_REPO.flush()  # 지연 저장 중인 최신 상태를 먼저 반영
+        rolling_backup(QUESTS_PATH)
+        overlays.flush()
+        if os.path.exists(overlays.OVERLAYS_PATH):
+            rolling_backup(overlays.OVERLAYS_PATH)
+    except Exception:
+        log.exception("quests.json 백업 실패")
 
 def backup_checklist():
     try:
-        rolling_backup("/data/checklist.json")
-        cleanup_old_backups("/data")
-        print("📦 checklist.json 백업 완료")
-    except Exception as e:
-        print(f"[checklist 백업 실패] {e}")
+        storage.flush()  # 지연 쓰기 중인 변경분을 먼저 반영
+        if config.STORAGE_BACKEND == "sqlite":
+            sqlite_backup(config.SQLITE_PATH)  # checklist + users 한 파일
+        elif config.STORAGE_BACKEND == "journal":
+            storage.compact()  # 저널을 스냅샷에 합친 뒤 스냅샷만 백업
+            rolling_backup(config.JOURNAL_SNAPSHOT_PATH)
+        else:
+            # flush 스레드가 파일을 다시 쓰는 도중에 읽지 않도록 쓰기 락 안에서 뜬 내용을 백업
+            rolling_backup(config.CHECKLIST_PATH, data=storage.snapshot())
+    except Exception:
+        log.exception("checklist 백업 실패")
 
 def backup_users():
+    if config.STORAGE_BACKEND == "sqlite":
+        return  # backup_checklist에서 DB 전체를 백업함
     try:
-        rolling_backup("/data/users.json")
-        cleanup_old_backups("/data")
-        print("📦 users.json 백업 완료")
-    except Exception as e:
-        print(f"[users 백업 실패] {e}")
+        # 이벤트 루프의 유저 갱신이 파일을 다시 쓰는 도중에 읽지 않도록 users 락 안에서 뜬 내용을 백업
+        rolling_backup(config.USERS_PATH, data=users.snapshot())
+    except Exception:
+        log.exception("users 백업 실패")
+
+def backup_all():
+    # 스케줄러 스레드는 작업만 넘기고 바로 반환, 백업 스레드에서 순서대로 실행
+    submit_backup(backup_quests)
+    submit_backup(backup_checklist)
+    submit_backup(backup_users)
+    submit_backup(cleanup_old_backups)
 
 # help 명령어
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -882,18 +1126,21 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "/complete [게임명] [weekly(optional)] - 게임 숙제 일괄 완료 처리\n"
         "/done - 모든 일일 숙제 완료 시 Day 클리어 처리\n"
         "/progress - 오늘의 숙제 진행 상황 확인\n"
-        "/listtasks - 전체 게임 및 이벤트 숙제 보기 (D-Day 정렬 포함)\n\n"
+        "/listtasks - 전체 게임 및 이벤트 숙제 보기 (D-Day 정렬 포함)\n"
+        "/timezone [시간대] [시각] - 내 시간대 / 초기화 시각 보기·변경\n"
+        "/resethour [0~23] - 내 일일 초기화 시각 변경\n\n"
         "📆 _이벤트 관련_\n"
         "/addevent - 이벤트 추가 (대화형)\n"
         "/event - 진행 중인 이벤트 목록 보기\n"
         "/delevent - 이벤트 삭제 (입력형)\n"
         "/editevent - 이벤트 숙제 이름 수정\n\n"
-        "🛠 _숙제/게임 관리_\n"
+        "🛠 _숙제/게임 관리 (이 채팅에만 적용)_\n"
         "/addtask - 숙제 항목 추가 (입력형)\n"
         "/deltask - 숙제 항목 삭제 (입력형)\n"
         "/renamegame - 게임 이름 변경\n"
         "/editquest - 숙제 이름 수정 (입력형)\n\n"
-        "/importquests - 로컬의 quests.json 파일을 첨부해 업로드\n"
+        "/importquests - quests.json 형식 파일을 첨부해 이 채팅의 숙제 목록 교체\n"
+        "/basemode - (관리자) 수정 명령을 모든 채팅이 공유하는 기본 목록에 적용\n"
         "❓ /help - 이 도움말 보기"
     )
     await update.message.reply_text(help_text, parse_mode=ParseMode.MARKDOWN)
@@ -903,37 +1150,184 @@ async def import_quests(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("📎 *quests.json* 파일을 첨부해서 `/importquests` 명령어로 보내주세요.", parse_mode=ParseMode.MARKDOWN)
         return
 
+    # 업로드한 목록은 이 채팅의 카탈로그가 됨 (기본 quests.json과 다른 게임만 overlay로 저장)
     file = await context.bot.get_file(update.message.document.file_id)
-    file_path = "/data/quests.json"
+    scope = chat_scope(update, context)
+    file_path = os.path.join(config.DATA_DIR, f"import-{'base' if scope is overlays.BASE else scope}.json")
     try:
         await file.download_to_drive(file_path)
-        load_quests()  # ✅ 여기에만 있으면 안 됨
-        normalize_quests()  # ✅ 강제 정규화 필요
-        await update.message.reply_text("✅ *quests.json*이 성공적으로 덮어씌워졌습니다!", parse_mode=ParseMode.MARKDOWN)
+        migrations.set_version(file_path, 0)  # 외부 파일이므로 모든 마이그레이션을 다시 적용
+        migrations.migrate_json_file("quests", file_path, indent=2)
+        imported = QuestRepository(file_path).load()
+        overlays.replace(scope, imported)
+        save_overlay(scope)
+        target = "기본 숙제 목록" if scope is overlays.BASE else "이 채팅의 숙제 목록"
+        await update.message.reply_text(f"✅ {target}을 *quests.json*으로 교체했습니다!", parse_mode=ParseMode.MARKDOWN)
     except Exception as e:
         await update.message.reply_text(f"❌ 파일 저장 실패: {e}")
+    finally:
+        for path in (file_path, f"{file_path}.version"):
+            if os.path.exists(path):
+                os.remove(path)
+
+# 스케줄 작업 (모두 봇과 같은 이벤트 루프에서 실행)
+# 디스크를 오래 붙잡는 작업만 명시적으로 스레드 풀(asyncio.to_thread)로 보낸다.
+async def purge_old_checks_job():
+    await asyncio.to_thread(purge_old_checks)
+
+async def time_wheel_job(app):
+    # TIMEWHEEL_TICK_MINUTES마다: 지금 현지 초기화 시각 / 아침 알림 시각이 된 유저 묶음만 처리
+    # 유저 저장소는 핸들러와 같은 루프에서만 건드리도록 루프에서 실행
+    batches = timewheel.due(datetime.now(timezone("UTC")), users.users_by_clock())
+    if any(kind == timewheel.RESET for kind, _, _ in batches):
+        # 어느 시간대든 날짜가 바뀌었으면 이벤트 만료 / daily 이벤트 반영 (메모리의 카탈로그만 수정)
+        refresh_event_tasks()
+    for kind, clock, user_ids in batches:
+        if kind == timewheel.RESET:
+            reset = day_progress.on_rollover(clock, user_ids)
+            log.info("🌅 일일 초기화: 연속 기록이 끊긴 유저 streak 초기화", timezone=clock.timezone,
+                     reset_hour=clock.reset_hour, users=len(user_ids), reset=reset)
+        else:
+            # 알림 전송은 백그라운드로 (큰 묶음은 수십 분 걸림 → 다음 tick이 밀려 건너뛰어지지 않도록 바로 반환)
+            app.create_task(send_reminders(app, user_ids), name=f"reminders:{clock.timezone}:{clock.reset_hour}")
+
+async def send_reminders(app, user_ids):
+    await send_daily_to_all_users(app, user_ids)
+    await notify_once_event_tasks(app, user_ids)
+
+async def backup_all_job():
+    backup_all()  # 백업 스레드에 작업만 넘기고 바로 반환
+
+def build_scheduler(app):
+    scheduler = AsyncIOScheduler(timezone=timezone(config.RESET_TIMEZONE))
+
+    def add_job(fn, **kwargs):
+        # 모든 작업의 실행 시간 / 예외를 /metrics에 기록
+        job = instrument.timed_job(fn.__name__, fn)
+        if config.PROFILE_ENABLED:
+            job = profiling.profiled_job(fn.__name__, job)
+        scheduler.add_job(job, **kwargs)
+
+    # 유저별 시간대에 맞춘 일일 초기화(streak 정리, 이벤트 반영) + 아침 알림 / 이벤트 마감 알림
+    # 밀린 실행은 한 번으로 합치고 (coalesce), 건너뛴 tick의 배치는 timewheel.due()가 다음 실행에서 함께 처리
+    add_job(time_wheel_job, trigger="cron", minute=f"*/{config.TIMEWHEEL_TICK_MINUTES}", second=5,
+            timezone=timezone("UTC"), args=[app], coalesce=True,
+            misfire_grace_time=config.TIMEWHEEL_TICK_MINUTES * 60)
+    # 지난 일일/주간/이벤트 체크 기록 정리 (초기화 자체는 기간 키 변경으로 즉시 반영됨)
+    add_job(purge_old_checks_job, trigger="cron", minute=10)
+    # 10분 주기 슬립 방지 ping (웹훅 모드는 업데이트가 올 때 깨어나므로 필요 없음)
+    if not config.WEBHOOK_URL:
+        add_job(ping_self, trigger="interval", minutes=10)
+    # 매일 오전 5시 quests / checklist / users 백업 + 오래된 백업 정리
+    add_job(backup_all_job, trigger="cron", hour=5, minute=0)
+    return scheduler
+
+async def on_startup(app):
+    # run_polling이 만든 이벤트 루프 안에서 HTTP 서버와 스케줄러를 함께 시작
+    app.bot_data["http_runner"] = await start_http_server(app if config.WEBHOOK_URL else None)
+    scheduler = build_scheduler(app)
+    scheduler.start()
+    app.bot_data["scheduler"] = scheduler
+    register_metrics_collectors(app)
+    log.info("Bot is running with scheduler...")
+
+def register_metrics_collectors(app):
+    # 스크레이프할 때마다 읽는 값들 (큐 길이, 대기 중인 쓰기, 캐시 적중 등)
+    @metrics.collector
+    def collect():
+        checklist = storage.get_write_stats()
+        quests = QUEST_REPO.get_write_stats()
+        catalogs = overlays.get_stats()
+        backup = get_backup_stats()
+        processor = app.update_processor
+        return [
+            ("dailyquest_update_queue_depth", "gauge", "Updates waiting in the Application queue",
+             [({}, app.update_queue.qsize())]),
+            ("dailyquest_active_users", "gauge", "Users with an update being processed or queued",
+             [({}, processor.active_users() if hasattr(processor, "active_users") else 0)]),
+            ("dailyquest_checklist_pending_writes", "gauge", "Checklist changes not yet flushed to disk",
+             [({}, checklist["pending"])]),
+            ("dailyquest_checklist_writes_total", "counter", "Checklist changes written",
+             [({}, checklist["writes"])]),
+            ("dailyquest_checklist_flushes_total", "counter", "Checklist disk flushes",
+             [({}, checklist["flushes"])]),
+            ("dailyquest_quests_pending_writes", "gauge", "quests.json snapshots waiting for the writer thread",
+             [({}, quests["pending"])]),
+            ("dailyquest_quests_writes_total", "counter", "quests.json files written",
+             [({}, quests["writes"])]),
+            ("dailyquest_backup_runs_total", "counter", "Backup attempts", [({}, backup["runs"])]),
+            ("dailyquest_backup_skipped_total", "counter", "Backups skipped because content was unchanged",
+             [({}, backup["skipped"])]),
+            ("dailyquest_keyboard_cache_total", "counter", "Keyboard layout cache lookups",
+             [({"result": "hit"}, keyboards.stats["hits"]), ({"result": "miss"}, keyboards.stats["misses"])]),
+            ("dailyquest_catalog_overlays", "gauge", "Chats with their own catalog overlay",
+             [({}, catalogs["scopes"])]),
+            ("dailyquest_catalog_overlay_games", "gauge", "Games copied or hidden in chat overlays",
+             [({}, catalogs["games"])]),
+            ("dailyquest_catalog_cache_total", "counter", "Per-chat catalog lookups",
+             [({"result": k}, catalogs[k]) for k in ("shared", "hits", "misses", "evictions")]),
+            ("dailyquest_timewheel_buckets", "gauge", "User groups by timezone and reset hour",
+             [({}, timewheel.stats["buckets"])]),
+            ("dailyquest_timewheel_batches_total", "counter", "Time wheel batches run by kind",
+             [({"kind": k}, timewheel.stats[k]) for k in (timewheel.RESET, timewheel.REMIND)]),
+            ("dailyquest_keyboard_edits_total", "counter", "Inline keyboard edit requests by outcome",
+             [({"result": k}, v) for k, v in edits.stats.items()]),
+            ("dailyquest_users", "gauge", "Registered users", [({}, len(users.get_all_users()))]),
+            ("dailyquest_log_queue_depth", "gauge", "Log records waiting for the writer thread",
+             [({}, log.queue_depth())]),
+            ("dailyquest_log_records_total", "counter", "Log records by outcome",
+             [({"result": k}, v) for k, v in log.stats.items()]),
+        ]
+
+async def on_shutdown(app):
+    scheduler = app.bot_data.pop("scheduler", None)
+    if scheduler is not None:
+        scheduler.shutdown(wait=False)
+    runner = app.bot_data.pop("http_runner", None)
+    if runner is not None:
+        await runner.cleanup()
+
+    # 종료 시 남은 checklist / quests 변경분 기록
+    flushed = await asyncio.to_thread(storage.flush)
+    log.info("💾 종료 전 checklist flush 완료", flushed=flushed)
+    await asyncio.to_thread(QUEST_REPO.flush)
+    await asyncio.to_thread(overlays.flush)
+
+async def run_webhook(app):
+    # run_polling 대신: 같은 루프에서 Application을 직접 시작하고 aiohttp 서버가 받은 업데이트를 처리
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
 
-loop = asyncio.new_event_loop()
-
-def safe_run(coro):
-    future = asyncio.run_coroutine_threadsafe(coro, loop)
-
-    def handle_exception(f):
-        exception = f.exception()
-        if exception:
-            print("[스케줄러 예외]", exception)
-
-    future.add_done_callback(handle_exception)
-    return future
-
-def start_loop(loop):
-    asyncio.set_event_loop(loop)
-    loop.run_forever()
-
-def main():           
-    load_quests()
-    normalize_quests()
-    app = ApplicationBuilder().token(BOT_TOKEN).build()
+    await app.initialize()
+    try:
+        await app.post_init(app)
+        await webhook.register(app)
+        await app.start()
+        log.info("[웹훅] 업데이트 대기 중...")
+        await stop.wait()
+    finally:
+        if app.running:
+            await app.stop()
+        await app.post_shutdown(app)
+        await app.shutdown()
+
+def build_application(builder=None):
+    # 핸들러까지 등록된 Application. 부하 테스트는 base_url을 가짜 Bot API로 바꾼 builder를 넘긴다
+    if builder is None:
+        builder = ApplicationBuilder().token(BOT_TOKEN).post_init(on_startup).post_shutdown(on_shutdown)
+    if config.PROFILE_ENABLED:
+        builder = builder.request(profiling.TracedRequest(connection_pool_size=256))  # Bot API 시간 기록
+    app = (
+        builder
+        # 유저끼리는 동시에, 같은 유저의 업데이트는 순서대로 처리
+        .concurrent_updates(PerUserUpdateProcessor(config.UPDATE_CONCURRENCY))
+        .build()
+    )
 
     # 핸들러 등록
     app.add_handler(CommandHandler("start", start))
@@ -947,6 +1341,9 @@ def main():
     app.add_handler(CommandHandler("help", help_command))
     app.add_handler(CommandHandler("test", test_notify))
     app.add_handler(CommandHandler("listtasks", listtasks))
+    app.add_handler(CommandHandler("timezone", set_timezone))
+    app.add_handler(CommandHandler("resethour", set_reset_hour))
+    app.add_handler(CommandHandler("basemode", base_mode))
     app.add_handler(MessageHandler(filters.Document.ALL & filters.CaptionRegex(r"^/importquests$"), import_quests))
     app.add_handler(renamegame_handler)
     app.add_handler(editquest_handler)
@@ -956,49 +1353,27 @@ def main():
     app.add_handler(delevent_handler)
     app.add_handler(editevent_handler)
 
-    # 전용 이벤트 루프 생성 후 별도 스레드에서 실행
-    t = threading.Thread(target=start_loop, args=(loop,), daemon=True)
-    t.start()
-
-    # HTTP 서버도 이벤트 루프에서 함께 실행
-    safe_run(start_http_server())
-
-    # BackgroundScheduler 사용
-    scheduler = BackgroundScheduler()
-
-    # 매일 오전 8시 알림 전송 (KST)
-    scheduler.add_job(
-        lambda: safe_run(send_daily_to_all_users(app)),
-        trigger="cron",
-        hour=8,
-        minute=0,
-        timezone=timezone("Asia/Seoul")
-    )
-
-    # 매일 오전 5시 일일 숙제 초기화
-    scheduler.add_job(reset_daily_tasks, trigger="cron", hour=5, minute=0, timezone=timezone("Asia/Seoul"))
-    # 매주 월요일 오전 5시 주간 숙제 초기화
-    scheduler.add_job(reset_weekly_tasks, trigger="cron", day_of_week="mon", hour=5, minute=0, timezone=timezone("Asia/Seoul"))
-    # 10분 주기 슬립 방지 ping
-    scheduler.add_job(lambda: asyncio.run_coroutine_threadsafe(ping_self(), loop), trigger="interval",minutes=10)
-    # 이벤트 만료 및 daily 이벤트 반영
-    scheduler.add_job(lambda: safe_run(notify_once_event_tasks(app)), trigger="cron", hour=8, minute=0, timezone=timezone("Asia/Seoul"))
-    scheduler.add_job(refresh_event_tasks, trigger="cron", hour=5, minute=0, timezone=timezone("Asia/Seoul"))
-
-    # 매일 오전 5시 quests.json 백업
-    scheduler.add_job(backup_quests, trigger="cron", hour=5, minute=0, timezone=timezone("Asia/Seoul"))
-
-    # 매일 오전 5시 checklist.json 백업
-    scheduler.add_job(backup_checklist, trigger="cron", hour=5, minute=0, timezone=timezone("Asia/Seoul"))
-
-    # 매일 오전 5시 users.json 백업
-    scheduler.add_job(backup_users, trigger="cron", hour=5, minute=0, timezone=timezone("Asia/Seoul"))
-
-
-    scheduler.start()
+    # 모든 핸들러의 지연 시간 / 예외를 /metrics에 기록
+    instrument.wrap_handlers(app)
+    if config.PROFILE_ENABLED:
+        # 핸들러별 wall / CPU 시간 + storage / keyboard / telegram 구간 내역, 느린 처리 로그
+        instrument.wrap_handlers(app, wrap=profiling.profiled_handler)
+    return app
+
+def main():
+    storage.init()
+    users.init()
+    day_progress.init()
+    overlays.load()
+    load_quests()
+    day_progress.on_rollover()  # 꺼져 있는 동안 지나간 초기화 반영
+    app = build_application()
 
-    print("Bot is running with scheduler...")
-    app.run_polling()
+    # 봇, HTTP 서버, 스케줄러가 모두 하나의 이벤트 루프에서 동작
+    if config.WEBHOOK_URL:
+        asyncio.run(run_webhook(app))
+    else:
+        app.run_polling()
 
 if __name__ == "__main__":
     main()
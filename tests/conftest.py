@@ -0,0 +1,54 @@
+# tests/conftest.py
+# 공용 fixture: 실제 /data 대신 임시 폴더, storage / users / overlays를 테스트마다 새 상태로 연결
+import os
+import copy
+import tempfile
+
+# config는 import 시점에 DATA_DIR을 읽으므로 utils를 불러오기 전에 지정
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="dailyquest-test-"))
+
+from collections import OrderedDict
+import pytest
+from utils import backends, overlays, periods, storage, users
+from utils.catalog import compile_catalog
+from utils.quests import QuestRepository
+
+QUESTS = {
+    "니케": {"daily": ["출석", "상점"], "weekly": ["보스"]},
+    "원신": {"daily": ["레진"], "weekly": []},
+}
+
+@pytest.fixture
+def checklist(tmp_path, monkeypatch):
+    # tmp_path의 tinydb 백엔드를 storage에 연결 (init()의 flush 스레드 없이, flush는 테스트가 직접)
+    monkeypatch.setattr(storage, "_partitions", {})
+    monkeypatch.setattr(storage, "_listeners", [])
+    monkeypatch.setattr(periods, "_clocks", {})
+    backend = backends.TinyDBChecklistBackend(str(tmp_path / "checklist.json"), storage._lock, True)
+    monkeypatch.setattr(storage, "backend", backend)
+    storage.build_index()
+    yield storage
+    backend.db.close()
+
+@pytest.fixture
+def user_db(tmp_path, monkeypatch):
+    backend = backends.TinyDBUserBackend(str(tmp_path / "users.json"))
+    monkeypatch.setattr(users, "backend", backend)
+    yield users
+    backend.db.close()
+
+@pytest.fixture
+def base_quests(tmp_path, monkeypatch):
+    # 기본 카탈로그 = QUESTS 사본, overlay는 비어 있고 즉시 저장 (delay=0)
+    repo = QuestRepository(str(tmp_path / "overlays.json"), delay=0, indent=None)
+    monkeypatch.setattr(overlays, "REPO", repo)
+    monkeypatch.setattr(overlays, "_overlays", repo.data)
+    monkeypatch.setattr(overlays, "_versions", {})
+    monkeypatch.setattr(overlays, "_cache", OrderedDict())
+    monkeypatch.setattr(overlays, "stats", dict.fromkeys(overlays.stats, 0))
+    monkeypatch.setattr(overlays, "_base_quests", {})
+    monkeypatch.setattr(overlays, "_base_catalog", compile_catalog({}))
+    monkeypatch.setattr(overlays, "_base_version", 0)
+    quests = copy.deepcopy(QUESTS)
+    overlays.set_base(quests, compile_catalog(quests))
+    return quests
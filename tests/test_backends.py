@@ -0,0 +1,117 @@
+# tests/test_backends.py
+# checklist 백엔드(tinydb / sqlite / journal)가 같은 결과를 내는지, 저널 재생 / 압축, 원자적 파일 기록
+import os
+import json
+import threading
+import pytest
+from utils import backends
+
+def record(user_id, task, period="daily", date="2026-10-17"):
+    return {"user_id": user_id, "period": period, "date": date, "game": "니케", "task": task}
+
+def open_backend(kind, tmp_path, write_behind=True, lock=None, **kwargs):
+    lock = lock or threading.RLock()
+    if kind == "tinydb":
+        return backends.TinyDBChecklistBackend(str(tmp_path / "checklist.json"), lock, write_behind)
+    if kind == "sqlite":
+        return backends.SQLiteChecklistBackend(str(tmp_path / "dailyquest.db"), lock, write_behind)
+    options = {"compact_interval": 3600, "compact_lines": 1000, **kwargs}
+    return backends.JournalChecklistBackend(
+        str(tmp_path / "checklist.snapshot.json"), str(tmp_path / "checklist.journal.jsonl"),
+        lock, write_behind, options["compact_interval"], options["compact_lines"],
+        legacy_path=options.get("legacy_path"),
+    )
+
+def close(backend):
+    backend.close()
+    if isinstance(backend, backends.TinyDBChecklistBackend):
+        backend.db.close()
+
+def apply_changes(backend):
+    first = backend.insert(record(1, "출석"))
+    ids = backend.insert_many([record(1, "상점"), record(2, "출석"), record(2, "보스", "weekly", "2026-W42")])
+    backend.remove([first, ids[1]])
+    return {ids[0]: record(1, "상점"), ids[2]: record(2, "보스", "weekly", "2026-W42")}
+
+@pytest.mark.parametrize("kind", ["tinydb", "sqlite", "journal"])
+@pytest.mark.parametrize("write_behind", [True, False])
+def test_backends_agree_after_reopen(kind, write_behind, tmp_path):
+    backend = open_backend(kind, tmp_path, write_behind)
+    expected = apply_changes(backend)
+    assert dict(backend.load()) == expected
+    if write_behind:
+        assert backend.pending() > 0
+    backend.flush()
+    assert backend.pending() == 0
+    close(backend)
+
+    backend = open_backend(kind, tmp_path, write_behind)
+    assert dict(backend.load()) == expected
+    new_id = backend.insert(record(3, "출석"))
+    assert new_id not in expected  # 삭제된 id도 다시 쓰지 않음
+    close(backend)
+
+def test_tinydb_write_behind_replaces_file_atomically(tmp_path):
+    backend = open_backend("tinydb", tmp_path)
+    backend.insert_many([record(i, "출석") for i in range(5)])
+    backend._middleware.storage.CHUNK = 2  # 여러 조각으로 나눠 써도 같은 JSON
+    assert backend.flush() == 5
+    with open(tmp_path / "checklist.json", encoding="utf-8") as f:
+        table = json.load(f)["_default"]
+    assert sorted(r["user_id"] for r in table.values()) == list(range(5))
+    assert json.loads(backend.snapshot())["_default"] == table
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
+    close(backend)
+
+def test_journal_replay_skips_torn_last_line(tmp_path):
+    backend = open_backend("journal", tmp_path, write_behind=False)
+    expected = apply_changes(backend)
+    close(backend)
+    with open(tmp_path / "checklist.journal.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"op": "add", "id": 99, "r": {"user_')  # 기록 도중 죽은 줄
+
+    backend = open_backend("journal", tmp_path)
+    assert dict(backend.load()) == expected
+    close(backend)
+
+def test_journal_compaction(tmp_path):
+    backend = open_backend("journal", tmp_path, compact_lines=3)
+    expected = apply_changes(backend)  # 저널 3줄
+    assert backend.maybe_compact()
+    assert not backend.maybe_compact()
+    assert os.path.getsize(tmp_path / "checklist.journal.jsonl") == 0
+    assert not os.path.exists(tmp_path / "checklist.journal.jsonl.compacting")
+    with open(tmp_path / "checklist.snapshot.json", encoding="utf-8") as f:
+        assert {int(k): v for k, v in json.load(f)["records"].items()} == expected
+    expected[backend.insert(record(3, "출석"))] = record(3, "출석")
+    close(backend)
+
+    backend = open_backend("journal", tmp_path)
+    assert dict(backend.load()) == expected
+    close(backend)
+
+def test_journal_replay_is_idempotent_after_interrupted_compaction(tmp_path):
+    # 압축 도중 죽으면 교체된 저널(.compacting)과 스냅샷에 같은 변경이 남을 수 있음
+    backend = open_backend("journal", tmp_path, write_behind=False)
+    expected = apply_changes(backend)
+    close(backend)
+    journal = tmp_path / "checklist.journal.jsonl"
+    os.replace(journal, tmp_path / "checklist.journal.jsonl.compacting")
+    backends._fsync_write(str(tmp_path / "checklist.snapshot.json"), json.dumps({
+        "next_id": max(expected) + 1, "records": {str(k): v for k, v in expected.items()},
+    }))
+
+    backend = open_backend("journal", tmp_path)
+    assert dict(backend.load()) == expected
+    close(backend)
+
+def test_journal_imports_legacy_checklist(tmp_path):
+    legacy = tmp_path / "checklist.json"
+    legacy.write_text(json.dumps({"_default": {
+        "3": dict(record(1, "출석"), task={"name": "출석"}),
+        "7": record(2, "상점"),
+    }}), encoding="utf-8")
+    backend = open_backend("journal", tmp_path, legacy_path=str(legacy))
+    assert dict(backend.load()) == {3: record(1, "출석"), 7: record(2, "상점")}
+    assert backend.insert(record(3, "레진")) == 8
+    close(backend)
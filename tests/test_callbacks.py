@@ -0,0 +1,62 @@
+# tests/test_callbacks.py
+# callback_data 인코딩 / 디코딩 왕복, 오래된 키보드, 이전 형식 데이터
+import pytest
+from utils import callbacks
+from utils.catalog import compile_catalog
+
+QUESTS = {
+    "nikke": {
+        "daily": ["출석", {"name": "상점 | 무료"}],
+        "weekly": ["보스"],
+        "events": [{"name": "할로윈", "until": "2026-10-31", "type": "daily", "tasks": ["미니게임"]}],
+    },
+    "원신": {"daily": [f"숙제{i}" for i in range(40)]},
+}
+
+@pytest.fixture
+def catalog(monkeypatch):
+    monkeypatch.setattr(callbacks, "_catalogs", callbacks.OrderedDict())
+    catalog = compile_catalog(QUESTS)
+    callbacks.register(catalog)
+    return catalog
+
+def test_daily_and_weekly_round_trip(catalog):
+    data = callbacks.daily(catalog, 0, 1)
+    assert len(data.encode("utf-8")) <= callbacks.MAX_LENGTH
+    assert callbacks.decode(data) == (callbacks.DAILY, ("nikke", "상점 | 무료"))
+    assert callbacks.decode(callbacks.daily(catalog, 1, 39)) == (callbacks.DAILY, ("원신", "숙제39"))
+    assert callbacks.decode(callbacks.weekly(catalog, 0, 0)) == (callbacks.WEEKLY, ("nikke", "보스"))
+
+def test_event_round_trip(catalog):
+    evt = catalog.events[0]
+    data = callbacks.event(catalog, evt, 0, "2026-10-17")
+    assert callbacks.decode(data) == (callbacks.EVENT, ("nikke", "할로윈", "미니게임", "2026-10-17"))
+
+def test_chat_catalog_is_used_without_registering(catalog):
+    overlay = compile_catalog({"nikke": {"daily": ["개인 숙제"]}})
+    data = callbacks.daily(overlay, 0, 0)
+    assert callbacks.decode(data) == (callbacks.DAILY, None)  # 등록 안 됨 → 오래된 키보드 취급
+    assert callbacks.decode(data, overlay) == (callbacks.DAILY, ("nikke", "개인 숙제"))
+
+def test_old_catalogs_are_evicted(catalog, monkeypatch):
+    monkeypatch.setattr(callbacks, "KEEP_CATALOGS", 2)
+    data = callbacks.daily(catalog, 0, 0)
+    for i in range(2):
+        callbacks.register(compile_catalog({f"game{i}": {"daily": ["a"]}}))
+    assert callbacks.decode(data) == (callbacks.DAILY, None)
+
+def test_noop_is_matched_exactly(catalog):
+    assert callbacks.decode(callbacks.NOOP) == (callbacks.NOOP, ())
+    # "n"으로 시작하는 이전 형식 데이터는 구분선이 아님 → ValueError 후 legacy_kind()로 해석
+    for data, kind in [("nikke|출석", callbacks.DAILY), ("noop", callbacks.NOOP)]:
+        with pytest.raises(ValueError):
+            callbacks.decode(data)
+        assert callbacks.legacy_kind(data) == kind
+
+def test_malformed_data_raises(catalog):
+    with pytest.raises(ValueError):
+        callbacks.decode(f"{callbacks.DAILY}{catalog.fingerprint}.9.0")
+    with pytest.raises(ValueError):
+        callbacks.decode(f"{callbacks.DAILY}{catalog.fingerprint}.0")
+    with pytest.raises(ValueError):
+        callbacks.decode("x123")
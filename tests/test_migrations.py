@@ -0,0 +1,84 @@
+# tests/test_migrations.py
+# 스키마 마이그레이션: 버전 마커, checklist / quests 데이터 변환, SQLite 스키마
+import json
+import sqlite3
+from datetime import date
+import pytest
+from utils import migrations, periods
+
+def weekly(key, user_id=1, task="t"):
+    return {"user_id": user_id, "period": "weekly", "date": key, "game": "g", "task": task}
+
+@pytest.fixture
+def today(monkeypatch):
+    def set_today(day):
+        monkeypatch.setattr(periods, "get_game_date", lambda now=None, user_id=None, clock=None: day)
+    return set_today
+
+def test_week_keys_of_current_iso_week_move_to_iso_key(today):
+    today(date(2026, 10, 14))  # 수요일, 옛 키로는 10-W3
+    tables = {"_default": {
+        "1": weekly("10-W3"),
+        "2": weekly("10-W2"),                       # 지난 주 → 그대로 두고 정리 대상
+        "3": dict(weekly("2026-10-14"), period="daily"),
+        "4": weekly("2026-W42"),                    # 이미 새 형식
+    }}
+    assert migrations._checklist_iso_week_keys(tables)
+    records = tables["_default"]
+    assert records["1"]["date"] == "2026-W42"
+    assert records["2"]["date"] == "10-W2"
+    assert records["3"]["date"] == "2026-10-14"
+    assert records["4"]["date"] == "2026-W42"
+
+def test_week_keys_across_month_boundary(today):
+    today(date(2026, 10, 1))  # 목요일, 이번 ISO 주는 9/28(09-W5)부터
+    tables = {"_default": {"1": weekly("09-W5"), "2": weekly("10-W1"), "3": weekly("09-W4")}}
+    migrations._checklist_iso_week_keys(tables)
+    assert [r["date"] for r in tables["_default"].values()] == ["2026-W40", "2026-W40", "09-W4"]
+
+def test_migrate_json_file_runs_pending_steps_once(tmp_path, today):
+    today(date(2026, 10, 14))
+    path = str(tmp_path / "checklist.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"_default": {"1": dict(weekly("10-W3"), task={"name": "보스"})}}, f)
+
+    assert migrations.migrate_json_file("checklist", path) == migrations.latest_version("checklist")
+    with open(path, encoding="utf-8") as f:
+        record = json.load(f)["_default"]["1"]
+    assert record["task"] == "보스"
+    assert record["date"] == "2026-W42"
+    assert migrations.get_version(path) == migrations.latest_version("checklist")
+    assert migrations.migrate_json_file("checklist", path) == 0
+
+def test_quests_tasks_are_normalized():
+    quests = {"니케": {
+        "daily": ["출석", {"name": "상점"}],
+        "events": [{"name": "할로윈", "until": "2026-10-31", "tasks": ["미니게임", {"name": "출석"}, {"name": "보스", "type": "daily"}]}],
+    }}
+    assert migrations._quests_normalize_tasks(quests)
+    assert quests["니케"]["daily"] == ["출석", "상점"]
+    assert quests["니케"]["events"][0]["tasks"] == [
+        {"name": "미니게임", "type": "once"}, {"name": "출석", "type": "once"}, {"name": "보스", "type": "daily"},
+    ]
+    assert not migrations._quests_normalize_tasks(quests)
+
+def test_checklist_task_dicts_become_names():
+    tables = {"_default": {"1": {"task": {"name": "출석"}}, "2": {"task": "상점"}}}
+    assert migrations._checklist_task_name(tables)
+    assert [r["task"] for r in tables["_default"].values()] == ["출석", "상점"]
+    assert not migrations._checklist_task_name(tables)
+
+def test_sqlite_schema_upgrades_from_version_1(tmp_path):
+    # user_version 1 (시간대 열 없음)인 기존 DB → 열 추가, 이후 연결에서는 다시 실행하지 않음
+    path = str(tmp_path / "dailyquest.db")
+    conn = sqlite3.connect(path)
+    migrations._sqlite_initial_schema(conn)
+    conn.execute("INSERT INTO users (user_id, day_streak) VALUES (1, 3)")
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    assert migrations.migrate_sqlite(conn) == migrations.latest_version("sqlite") - 1
+    row = conn.execute("SELECT day_streak, timezone, reset_hour FROM users").fetchone()
+    assert row == (3, None, None)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == migrations.latest_version("sqlite")
+    assert migrations.migrate_sqlite(conn) == 0
+    conn.close()
@@ -0,0 +1,71 @@
+# tests/test_overlays.py
+# 채팅별 카탈로그: copy-on-write, 기본과 같아진 overlay 정리, 관리자 BASE scope, scope별 캐시
+import json
+from utils import overlays
+from utils.catalog import compile_catalog
+
+def test_unmodified_scope_shares_base_catalog(base_quests):
+    assert overlays.catalog(5) is overlays._base_catalog
+    assert overlays.quests(5) is base_quests
+
+def test_edit_copies_game_only_for_that_scope(base_quests):
+    overlays.edit_game(5, "니케")["daily"].append("특별 숙제")
+    overlays.save(5)
+    assert overlays.catalog(5).game("니케").daily == ("출석", "상점", "특별 숙제")
+    assert base_quests["니케"]["daily"] == ["출석", "상점"]
+    assert overlays.catalog(6) is overlays._base_catalog
+    assert list(overlays.own_games(5)) == ["니케"]  # 고치지 않은 게임은 복사하지 않음
+    with open(overlays.REPO.path, encoding="utf-8") as f:
+        assert json.load(f) == {"5": {"니케": {"daily": ["출석", "상점", "특별 숙제"], "weekly": ["보스"]}}}
+
+def test_save_prunes_games_equal_to_base(base_quests):
+    overlays.edit_game(5, "니케")["daily"].append("특별 숙제")
+    overlays.save(5)
+    overlays.edit_game(5, "니케")["daily"].remove("특별 숙제")
+    overlays.save(5)
+    assert overlays.scopes() == []
+    assert overlays.catalog(5) is overlays._base_catalog
+
+def test_remove_and_rename_keep_base_order(base_quests):
+    overlays.rename_game(5, "니케", "NIKKE")
+    overlays.save(5)
+    assert [g.name for g in overlays.catalog(5).games] == ["원신", "NIKKE"]
+    overlays.remove_game(5, "원신")
+    overlays.save(5)
+    assert [g.name for g in overlays.catalog(5).games] == ["NIKKE"]
+    assert overlays._overlays["5"]["원신"] is None
+    assert list(base_quests) == ["니케", "원신"]
+
+def test_replace_keeps_only_differences(base_quests):
+    overlays.replace(5, {"원신": {"daily": ["레진"], "weekly": []}, "붕괴": {"daily": ["개척력"]}})
+    overlays.save(5)
+    assert overlays._overlays["5"] == {"니케": None, "붕괴": {"daily": ["개척력"]}}
+    assert [g.name for g in overlays.catalog(5).games] == ["원신", "붕괴"]
+
+def test_base_scope_edits_shared_catalog(base_quests):
+    overlays.edit_game(6, "원신")["daily"].append("일일 의뢰")
+    overlays.save(6)
+    game = overlays.edit_game(overlays.BASE, "니케")
+    assert game is base_quests["니케"]  # 복사 없이 기본 카탈로그 자체
+    game["daily"].append("새 숙제")
+    overlays.set_base(base_quests, compile_catalog(base_quests))  # main._rebuild_catalog
+    assert overlays.catalog(5).game("니케").daily == ("출석", "상점", "새 숙제")
+    # overlay가 있는 채팅도 고치지 않은 게임은 새 기본값을 따름
+    assert overlays.catalog(6).game("니케").daily == ("출석", "상점", "새 숙제")
+    assert overlays.catalog(6).game("원신").daily == ("레진", "일일 의뢰")
+    assert overlays.scopes() == [6]
+
+def test_catalog_cache_is_invalidated_by_changes(base_quests):
+    overlays.edit_game(5, "니케")["weekly"] = []
+    overlays.save(5)
+    first = overlays.catalog(5)
+    assert overlays.catalog(5) is first
+    assert overlays.stats["hits"] == 1
+    overlays.set_base(base_quests, compile_catalog(base_quests))
+    second = overlays.catalog(5)
+    assert second is not first
+    assert second.fingerprint == first.fingerprint  # 내용이 같으면 콜백 데이터도 그대로
+    overlays.edit_game(5, "니케")["weekly"] = ["보스", "레이드"]
+    overlays.save(5)
+    assert overlays.catalog(5).game("니케").weekly == ("보스", "레이드")
+    assert overlays.stats["misses"] == 3
@@ -0,0 +1,76 @@
+# tests/test_progress.py
+# 오늘 daily 완료 카운터와 streak: 체크 리스너, 자동 완료, 카탈로그 변경 후 재계산, 날짜 변경 처리
+from datetime import date, timedelta
+import pytest
+from utils import overlays, periods, progress
+
+@pytest.fixture
+def tracker(checklist, user_db, base_quests, monkeypatch):
+    monkeypatch.setattr(progress, "_done", {})
+    monkeypatch.setattr(progress, "stats", dict.fromkeys(progress.stats, 0))
+    progress.init()
+    for user_id in (1, 2):
+        user_db.add_user(user_id)
+    return progress
+
+def days_ago(n):
+    return (date.fromisoformat(periods.get_today()) - timedelta(days=n)).isoformat()
+
+def test_counter_follows_checks(tracker, checklist):
+    assert tracker.total(1) == 3
+    checklist.add_check(1, "니케", "출석")
+    checklist.add_check(1, "니케", "보스", "weekly")  # 주간은 세지 않음
+    checklist.add_check(1, "없는 게임", "출석")          # 카탈로그에 없는 항목도
+    assert tracker.remaining(1) == 2
+    checklist.remove_check(1, "니케", "출석")
+    assert tracker.remaining(1) == 3
+    assert 1 not in tracker._done
+
+def test_completing_the_day_updates_streak_once(tracker, checklist, user_db):
+    user_db.backend.update(1, {"day_streak": 4, "last_day_complete": days_ago(1)})
+    checklist.complete_all(1, "니케", ["출석", "상점"])
+    assert not tracker.is_day_complete(1)
+    checklist.add_check(1, "원신", "레진")
+    assert tracker.is_day_complete(1)
+    assert user_db.get_day_streak(1) == 5
+    # 해제 후 다시 완료해도 같은 날은 한 번만
+    checklist.toggle_check(1, "원신", "레진")
+    checklist.toggle_check(1, "원신", "레진")
+    assert user_db.get_day_streak(1) == 5
+    assert tracker.stats["auto_completed"] == 2
+
+def test_streak_restarts_after_a_missed_day(tracker, checklist, user_db):
+    user_db.backend.update(1, {"day_streak": 4, "last_day_complete": days_ago(2)})
+    checklist.complete_all(1, "니케", ["출석", "상점"])
+    checklist.add_check(1, "원신", "레진")
+    assert user_db.get_day_streak(1) == 1
+
+def test_group_catalog_is_compared_directly(tracker, checklist):
+    group = overlays.catalog(-100)
+    checklist.complete_all(1, "니케", ["출석", "상점"])
+    assert not tracker.is_day_complete(1, group)
+    overlays.remove_game(-100, "원신")
+    overlays.save(-100)
+    assert tracker.is_day_complete(1, overlays.catalog(-100))
+    assert not tracker.is_day_complete(1)
+
+def test_recount_after_catalog_change(tracker, checklist):
+    checklist.complete_all(1, "니케", ["출석", "상점"])
+    checklist.add_check(2, "니케", "출석")
+    overlays.edit_game(1, "니케")["daily"].remove("상점")
+    overlays.save(1)
+    tracker.recount(1)
+    assert (tracker.total(1), tracker.remaining(1)) == (2, 1)
+    tracker._done.clear()
+    tracker.recount()
+    assert tracker.remaining(1) == 1
+    assert tracker.remaining(2) == 2
+
+def test_rollover_resets_missed_streaks_and_stale_counters(tracker, user_db):
+    user_db.backend.update(1, {"day_streak": 3, "last_day_complete": days_ago(1)})
+    user_db.backend.update(2, {"day_streak": 5, "last_day_complete": days_ago(2)})
+    tracker._done[1] = (days_ago(1), 2)
+    assert tracker.on_rollover(periods.DEFAULT_CLOCK, [1, 2]) == 1
+    assert (user_db.get_day_streak(1), user_db.get_day_streak(2)) == (3, 0)
+    assert 1 not in tracker._done
+    assert tracker.on_rollover() == 0  # 기동 시 전체 묶음: 이미 정리됨
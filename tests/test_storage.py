@@ -0,0 +1,98 @@
+# tests/test_storage.py
+# checklist 파티션 인덱스: 체크/해제, 일괄 완료, 리스너 알림, 재기동 후 재구축, 지난 파티션 정리
+import json
+from utils import periods
+
+def changes_of(storage):
+    changes = []
+    storage.add_listener(lambda *change: changes.append(change))
+    return changes
+
+def test_toggle_updates_index_and_notifies(checklist):
+    changes = changes_of(checklist)
+    today = periods.get_today(user_id=1)
+    checklist.toggle_check(1, "니케", "출석")
+    assert checklist.is_checked(1, "니케", "출석")
+    assert checklist.get_user_checks(1) == {("니케", "출석")}
+    assert checklist.get_user_checks(2) == frozenset()
+    checklist.toggle_check(1, "니케", "출석")
+    assert not checklist.is_checked(1, "니케", "출석")
+    assert changes == [
+        (1, "daily", today, ("니케", "출석"), 1),
+        (1, "daily", today, ("니케", "출석"), -1),
+    ]
+    assert checklist._partitions[("daily", today)] == {}
+
+def test_weekly_checks_use_week_partition(checklist):
+    checklist.add_check(1, "니케", "보스", "weekly")
+    assert checklist.is_checked(1, "니케", "보스", "weekly")
+    assert not checklist.is_checked(1, "니케", "보스")
+    assert ("weekly", periods.get_week_key(user_id=1)) in checklist._partitions
+
+def test_complete_all_skips_checked_tasks(checklist):
+    changes = changes_of(checklist)
+    checklist.add_check(1, "니케", "출석")
+    checklist.complete_all(1, "니케", ["출석", {"name": "상점"}])
+    assert checklist.get_user_checks(1) == {("니케", "출석"), ("니케", "상점")}
+    assert [entry for _, _, _, entry, _ in changes] == [("니케", "출석"), ("니케", "상점")]
+    assert len(checklist.backend.load()) == 2
+    checklist.complete_all(1, "니케", ["출석", "상점"])  # 이미 다 체크 → 아무것도 쓰지 않음
+    assert len(checklist.backend.load()) == 2
+
+def test_event_checks(checklist):
+    checklist.toggle_event_check(1, "니케", "할로윈", "미니게임", "2026-10-31")
+    assert checklist.is_event_checked(1, "니케", "할로윈", "미니게임", "2026-10-31")
+    assert checklist.get_user_checks(1, "event", "2026-10-31") == {("니케", "할로윈", "미니게임")}
+    checklist.toggle_event_check(1, "니케", "할로윈", "미니게임", "2026-10-31")
+    assert not checklist.is_event_checked(1, "니케", "할로윈", "미니게임", "2026-10-31")
+
+def test_index_is_rebuilt_from_flushed_file(checklist):
+    checklist.add_check(1, "니케", "출석")
+    checklist.add_check(2, "원신", "레진")
+    checklist.remove_check(1, "니케", "출석")
+    assert checklist.get_write_stats()["pending"] == 3
+    assert checklist.flush() == 3
+    with open(checklist.backend._path, encoding="utf-8") as f:
+        records = list(json.load(f)["_default"].values())
+    assert [(r["user_id"], r["task"]) for r in records] == [(2, "레진")]
+
+    checklist.build_index()
+    assert checklist.get_user_checks(1) == frozenset()
+    assert checklist.get_user_checks(2) == {("원신", "레진")}
+
+def test_purge_drops_only_stale_partitions(checklist):
+    stale = [
+        {"user_id": 1, "period": "daily", "date": "2000-01-01", "game": "니케", "task": "출석"},
+        {"user_id": 2, "period": "daily", "date": "2000-01-01", "game": "니케", "task": "상점"},
+        {"user_id": 1, "period": "weekly", "date": "2000-W01", "game": "니케", "task": "보스"},
+        {"user_id": 1, "period": "weekly", "date": "10-W3", "game": "니케", "task": "보스"},  # 옛 주간 키
+        {"user_id": 1, "period": "event", "date": "2000-01-01", "game": "니케", "event": "할로윈", "task": "a"},
+    ]
+    checklist.backend.insert_many(stale)
+    checklist.build_index()
+    checklist.add_check(1, "니케", "출석")
+    checklist.add_check(1, "니케", "보스", "weekly")
+    checklist.toggle_event_check(1, "니케", "할로윈", "a", "9999-12-31")
+
+    assert checklist.purge_stale_partitions(batch_size=2) == (4, 5)
+    checklist.flush()
+    kept = sorted((r["period"], r["date"]) for _, r in checklist.backend.load())
+    assert kept == sorted([
+        ("daily", periods.get_today()),
+        ("weekly", periods.get_week_key()),
+        ("event", "9999-12-31"),
+    ])
+    assert checklist.is_checked(1, "니케", "출석")
+    assert checklist.purge_stale_partitions() == (0, 0)
+
+def test_purge_keeps_today_of_every_clock(checklist, monkeypatch):
+    # 시간대가 다른 유저의 '오늘'도 현재 파티션 → 정리 대상이 아님
+    far = periods.Clock("Pacific/Kiritimati", 5)  # UTC+14
+    near = periods.Clock("Pacific/Pago_Pago", 5)  # UTC-11
+    periods.set_clock(1, far)
+    periods.set_clock(2, near)
+    checklist.add_check(1, "니케", "출석")
+    checklist.add_check(2, "니케", "출석")
+    assert checklist.purge_stale_partitions() == (0, 0)
+    assert checklist.is_checked(1, "니케", "출석")
+    assert checklist.is_checked(2, "니케", "출석")
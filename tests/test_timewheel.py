@@ -0,0 +1,65 @@
+# tests/test_timewheel.py
+# timewheel.due(): 버킷별 초기화 / 알림 배치, 중복 방지, 건너뛴 tick 따라잡기
+from datetime import datetime
+import pytest
+from pytz import utc
+from utils import config, timewheel
+from utils.periods import Clock
+
+SEOUL = Clock("Asia/Seoul", 5)       # UTC+9, 05시 초기화 → 20:00 UTC
+LONDON = Clock("Europe/London", 5)   # 10월 중순은 UTC+1 → 04:00 UTC
+
+@pytest.fixture(autouse=True)
+def wheel(monkeypatch):
+    monkeypatch.setattr(config, "TIMEWHEEL_TICK_MINUTES", 15)
+    monkeypatch.setattr(config, "REMINDER_HOUR", 8)
+    monkeypatch.setattr(config, "REMINDER_SPREAD_MINUTES", 30)
+    monkeypatch.setattr(timewheel, "_fired", {})
+    monkeypatch.setattr(timewheel, "_last_tick", None)
+
+def at(hour, minute, day=17):
+    return datetime(2026, 10, day, hour, minute, 5, tzinfo=utc)
+
+def kinds(batches):
+    return [(kind, clock.timezone, sorted(user_ids)) for kind, clock, user_ids in batches]
+
+def test_reset_only_for_bucket_whose_local_hour_matches():
+    buckets = {SEOUL: [1, 2], LONDON: [3]}
+    assert timewheel.due(at(19, 45, day=16), buckets) == []
+    assert kinds(timewheel.due(at(20, 0, day=16), buckets)) == [("reset", "Asia/Seoul", [1, 2])]
+    timewheel.due(at(3, 45), buckets)  # 그 사이 서울 알림
+    assert kinds(timewheel.due(at(4, 0), buckets)) == [("reset", "Europe/London", [3])]
+
+def test_same_tick_runs_once():
+    buckets = {SEOUL: [1]}
+    assert timewheel.due(at(20, 0), buckets)
+    assert timewheel.due(at(20, 0), buckets) == []
+    assert timewheel.due(at(20, 14), buckets) == []
+
+def test_reminders_are_spread_over_ticks_by_user_id():
+    buckets = {SEOUL: [1, 2, 3, 4]}
+    timewheel.due(at(22, 45), buckets)  # 07:45 KST
+    assert kinds(timewheel.due(at(23, 0), buckets)) == [("remind", "Asia/Seoul", [2, 4])]
+    assert kinds(timewheel.due(at(23, 15), buckets)) == [("remind", "Asia/Seoul", [1, 3])]
+    assert timewheel.due(at(23, 30), buckets) == []
+
+def test_skipped_ticks_are_caught_up():
+    # 앞 tick이 길어져 20:00 ~ 23:15 UTC tick을 건너뛰어도 그 사이 초기화 / 알림 배치를 모두 돌려줌
+    buckets = {SEOUL: [1, 2]}
+    assert timewheel.due(at(19, 45), buckets) == []
+    assert kinds(timewheel.due(at(23, 30), buckets)) == [
+        ("reset", "Asia/Seoul", [1, 2]),
+        ("remind", "Asia/Seoul", [2]),
+        ("remind", "Asia/Seoul", [1]),
+    ]
+
+def test_first_call_does_not_replay_the_past():
+    # 기동 직후에는 지금 tick만 본다 (꺼져 있던 동안의 초기화는 progress.on_rollover()가 처리)
+    assert timewheel.due(at(23, 30), {SEOUL: [1, 2]}) == []
+
+def test_catch_up_is_bounded():
+    buckets = {SEOUL: [1]}
+    timewheel.due(at(19, 45, day=10), buckets)
+    batches = timewheel.due(at(19, 45, day=17), buckets)
+    # 최대 MAX_CATCH_UP(하루)만 따라잡음 → 초기화는 한 번
+    assert [kind for kind, _, _ in batches].count("reset") == 1
@@ -0,0 +1,76 @@
+# tests/test_updates.py
+# PerUserUpdateProcessor: 한 유저가 업데이트를 몰아 보내도 다른 유저의 처리가 막히지 않는지
+import asyncio
+from datetime import datetime
+from telegram import Chat, Message, Update, User
+from utils.updates import PerUserUpdateProcessor
+
+SLOTS = 4
+FLOOD = 40
+DELAY = 0.01
+
+def make_update(update_id, user_id):
+    message = Message(
+        message_id=update_id,
+        date=datetime.now(),
+        chat=Chat(user_id, Chat.PRIVATE),
+        from_user=User(user_id, "user", False),
+    )
+    return Update(update_id, message=message)
+
+def test_flooding_user_does_not_block_others():
+    async def scenario():
+        processor = PerUserUpdateProcessor(SLOTS)
+        order = []
+        running = {1: 0}
+        done = {}
+
+        async def handle(update_id, user_id):
+            if user_id == 1:
+                running[1] += 1
+                assert running[1] == 1  # 같은 유저는 하나씩
+            await asyncio.sleep(DELAY)
+            if user_id == 1:
+                running[1] -= 1
+            order.append((user_id, update_id))
+            done[(user_id, update_id)] = asyncio.get_running_loop().time()
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        tasks = [
+            asyncio.create_task(processor.process_update(make_update(i, 1), handle(i, 1)))
+            for i in range(FLOOD)
+        ]
+        await asyncio.sleep(0)  # 폭주 유저의 업데이트가 먼저 도착
+        tasks.append(asyncio.create_task(processor.process_update(make_update(FLOOD, 2), handle(FLOOD, 2))))
+        await asyncio.gather(*tasks)
+        return start, order, done, processor
+
+    start, order, done, processor = asyncio.run(scenario())
+
+    # 다른 유저는 폭주 유저의 대기열(FLOOD * DELAY)을 기다리지 않고 바로 처리됨
+    assert done[(2, FLOOD)] - start < FLOOD * DELAY / 4
+    # 폭주 유저의 업데이트는 들어온 순서대로 모두 처리
+    assert [update_id for user_id, update_id in order if user_id == 1] == list(range(FLOOD))
+    assert processor.active_users() == 0
+
+def test_failed_update_does_not_stall_queue():
+    async def scenario():
+        processor = PerUserUpdateProcessor(SLOTS)
+        handled = []
+
+        async def fail():
+            raise RuntimeError("boom")
+
+        async def handle(update_id):
+            handled.append(update_id)
+
+        await asyncio.gather(
+            processor.process_update(make_update(0, 1), fail()),
+            processor.process_update(make_update(1, 1), handle(1)),
+        )
+        return handled, processor
+
+    handled, processor = asyncio.run(scenario())
+    assert handled == [1]
+    assert processor.active_users() == 0
@@ -0,0 +1,678 @@
+# utils/backends.py
+# checklist / users 저장소 백엔드
+# - tinydb: 기존 JSON 파일 (/data/checklist.json, /data/users.json)
+# - sqlite: WAL 모드 단일 DB 파일 (/data/dailyquest.db), 행 단위 쓰기 + 인덱스 조회
+# - journal: checklist 변경을 JSONL 저널에 한 줄씩 추가 + 주기적 스냅샷 압축 (users는 tinydb)
+import os
+import itertools
+import tempfile
+import json
+import time
+import sqlite3
+import threading
+from tinydb import Query
+from tinydb.middlewares import CachingMiddleware
+from tinydb.storages import JSONStorage
+from utils.backup import load_or_restore_db
+from utils import config, migrations, log
+
+CHECKLIST_FIELDS = ("user_id", "period", "date", "game", "event", "task")
+USER_FIELDS = ("user_id", "day_streak", "last_day_complete", "timezone", "reset_hour")
+
+def connect_sqlite(path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    migrations.migrate_sqlite(conn)
+    return conn
+
+# checklist와 users는 같은 DB 파일 → 연결 하나와 락 하나를 함께 쓴다
+# (연결이 따로면 checklist의 지연 commit 트랜잭션이 쓰기 락을 잡고 있어 users 쓰기가 flush까지 기다리게 됨)
+# users에 쓰면 그때까지 쌓인 checklist 변경도 같이 commit 된다.
+_sqlite_connections = {}  # path → (conn, RLock)
+_sqlite_guard = threading.Lock()
+
+def shared_sqlite(path: str):
+    with _sqlite_guard:
+        if path not in _sqlite_connections:
+            _sqlite_connections[path] = (connect_sqlite(path), threading.RLock())
+        return _sqlite_connections[path]
+
+def close_shared_sqlite(path: str):
+    with _sqlite_guard:
+        entry = _sqlite_connections.pop(path, None)
+    if entry is not None:
+        conn, lock = entry
+        with lock:
+            conn.commit()
+            conn.close()
+
+# ---------------------------------------------------------------------------
+# 인터페이스
+# ---------------------------------------------------------------------------
+
+class ChecklistBackend:
+    # record: {"user_id", "period", "date", "game", "task"[, "event"]}
+    # record_id: 백엔드가 발급하는 정수 ID (삭제 시 사용)
+
+    def load(self):
+        # 전체 기록을 [(record_id, record), ...] 로 반환 (시작 시 인덱스 구축용)
+        raise NotImplementedError
+
+    def insert(self, record) -> int:
+        raise NotImplementedError
+
+    def insert_many(self, records) -> list:
+        return [self.insert(record) for record in records]
+
+    def remove(self, record_ids):
+        raise NotImplementedError
+
+    def pending(self) -> int:
+        # 아직 디스크에 반영되지 않은 변경 수
+        return 0
+
+    def flush(self) -> int:
+        # 대기 중인 변경을 디스크에 반영하고 반영한 변경 수를 반환
+        return 0
+
+    def snapshot(self):
+        # 백업용 파일 내용(bytes): 파일을 다시 쓰는 도중에 읽지 않도록 쓰기와 같은 락 안에서 읽음
+        # 파일 백업을 따로 하는 백엔드(sqlite 온라인 백업, journal 스냅샷)는 None
+        return None
+
+    def maybe_compact(self):
+        # 백그라운드 정리 작업용 훅 (journal 백엔드만 사용)
+        return False
+
+    def close(self):
+        self.flush()
+
+class UserBackend:
+    def all_user_ids(self) -> list:
+        raise NotImplementedError
+
+    def get(self, user_id: int):
+        # 유저 기록(dict) 또는 None
+        raise NotImplementedError
+
+    def insert(self, record):
+        raise NotImplementedError
+
+    def update(self, user_id: int, fields: dict):
+        raise NotImplementedError
+
+    def reset_streaks(self, before: str, user_ids=None) -> int:
+        # last_day_complete가 before(YYYY-MM-DD)보다 이전인 유저의 streak를 0으로 (한 번에 처리)
+        # user_ids: 이 유저들만 (같은 시각에 날짜가 바뀐 유저 묶음), None이면 전체
+        raise NotImplementedError
+
+    def all_settings(self) -> dict:
+        # 시간대 / 초기화 시각을 직접 설정한 유저만: user_id → (timezone, reset_hour), 없는 값은 None
+        raise NotImplementedError
+
+    def snapshot(self):
+        # 백업용 파일 내용(bytes): 쓰기 도중의 반쯤 기록된 파일을 읽지 않도록 쓰기 락 안에서 읽음
+        # 파일 백업이 필요 없는 백엔드(sqlite: DB 전체를 온라인 백업)는 None
+        return None
+
+# ---------------------------------------------------------------------------
+# TinyDB (JSON)
+# ---------------------------------------------------------------------------
+
+class ChunkedJSONStorage(JSONStorage):
+    # JSONStorage와 같은 형식이지만 테이블을 CHUNK건씩 나눠 직렬화하며 씀
+    # - json.dumps 한 번은 끝날 때까지 GIL을 놓지 않음 (18만 건 ≈ 0.5초) → 조각 사이에서 이벤트 루프가 돌 수 있게
+    # - 같은 디렉터리의 임시 파일에 쓰고 fsync 후 os.replace → 기록 도중 죽어도 기존 파일은 온전함
+    #   (열어 둔 핸들은 처음 한 번 읽을 때만 씀: WriteBehindMiddleware가 캐시에서만 읽음)
+    CHUNK = 2000
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(path, **kwargs)
+        self.path = path
+
+    def _write_chunks(self, f, data):
+        f.write("{")
+        for t, (name, table) in enumerate(data.items()):
+            f.write(("" if t == 0 else ", ") + json.dumps(name) + ": {")
+            items = iter(table.items())
+            first = True
+            while True:
+                chunk = dict(itertools.islice(items, self.CHUNK))
+                if not chunk:
+                    break
+                f.write(("" if first else ", ") + json.dumps(chunk, **self.kwargs)[1:-1])
+                first = False
+            f.write("}")
+        f.write("}")
+
+    def write(self, data):
+        directory = os.path.dirname(self.path) or "."
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.path) + ".", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                self._write_chunks(f, data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        try:
+            # rename 자체도 디스크에 남도록 디렉터리 fsync (지원하지 않는 환경은 무시)
+            dir_fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass
+
+class WriteBehindMiddleware(CachingMiddleware):
+    # 변경은 메모리 캐시에만 즉시 반영하고, 파일 기록은 flush()에서 모아서 처리
+    # - put/pop: 캐시된 테이블 dict를 제자리에서 고치고 변경 로그에 남김 (레코드당 O(1))
+    #   TinyDB Table.insert/remove는 쓸 때마다 테이블 전체를 새 dict로 다시 만들어서 레코드 수에 비례해 느려짐
+    # - flush: 락 안에서는 변경 로그만 떼어내고, 파일용 사본(_persisted)에 반영 + 직렬화/fsync는 락 밖에서
+    #   (문서는 넣은 뒤 고치지 않으므로 캐시와 사본이 같은 문서 객체를 공유해도 안전)
+    def __init__(self, storage_cls, lock):
+        super().__init__(storage_cls)
+        self._lock = lock
+        self._flush_lock = threading.Lock()
+        self._changes = []      # [(테이블, doc_id 문자열, 문서 | None)], None이면 전체를 다시 기록
+        self._persisted = {}    # 마지막으로 파일에 기록한 상태 (flush 중에만 사용)
+
+    def read(self):
+        if self.cache is None:
+            self.cache = self.storage.read() or {}
+            self._persisted = {name: dict(table) for name, table in self.cache.items()}
+        return self.cache
+
+    def write(self, data):
+        # TinyDB를 통한 쓰기 (테이블 전체 교체) → 다음 flush는 전체 기록
+        self.cache = data
+        self._changes = None
+        self._cache_modified_count += 1
+
+    def table(self, name):
+        return self.read().setdefault(name, {})
+
+    def put(self, name, doc_id, document):
+        # 호출하는 쪽이 lock을 잡고 있어야 함
+        key = str(doc_id)
+        self.table(name)[key] = document
+        self._log(name, key, document)
+
+    def pop(self, name, doc_id):
+        key = str(doc_id)
+        if self.table(name).pop(key, None) is not None:
+            self._log(name, key, None)
+
+    def _log(self, name, key, document):
+        if self._changes is not None:
+            self._changes.append((name, key, document))
+        self._cache_modified_count += 1
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if self._cache_modified_count == 0:
+                    return 0
+                pending = self._cache_modified_count
+                changes = self._changes
+                if changes is None:
+                    snapshot = {name: dict(table) for name, table in self.cache.items()}
+                self._changes = []
+                self._cache_modified_count = 0
+            if changes is None:
+                self._persisted = snapshot
+            else:
+                for name, key, document in changes:
+                    table = self._persisted.setdefault(name, {})
+                    if document is None:
+                        table.pop(key, None)
+                    else:
+                        table[key] = document
+            self.storage.write(self._persisted)
+            return pending
+
+    def snapshot(self):
+        # flush의 파일 기록과 겹치지 않게 (_flush_lock) 디스크의 현재 내용을 읽음
+        with self._flush_lock:
+            with open(self.storage.path, "rb") as f:
+                return f.read()
+
+class TinyDBChecklistBackend(ChecklistBackend):
+    def __init__(self, path: str, lock, write_behind: bool):
+        self._path = path
+        self._lock = lock
+        self._write_behind = write_behind
+        try:
+            migrated = True
+            migrations.migrate_json_file("checklist", path)
+        except Exception:
+            migrated = False  # 손상된 파일 → 아래에서 백업으로 복구한 뒤 다시 적용
+            log.exception("⚠️ checklist.json 마이그레이션 실패")
+        self._open()
+        if not migrated:
+            self.db.close()
+            migrations.migrate_json_file("checklist", path)
+            self._open()
+
+    def _open(self):
+        # 손상된 파일이면 최신 백업에서 복구해서 연다 (users.json과 같은 방식)
+        if self._write_behind:
+            self._middleware = WriteBehindMiddleware(ChunkedJSONStorage, self._lock)
+            self.db = load_or_restore_db(self._path, storage=self._middleware)
+            # 지연 쓰기에서는 TinyDB Table을 거치지 않고 캐시 테이블에 직접 넣고 뺌 (id는 여기서 증가)
+            self._table = self.db.default_table_name
+            self._next_id = max(map(int, self._middleware.table(self._table)), default=0) + 1
+        else:
+            self._middleware = None
+            self.db = load_or_restore_db(self._path)
+
+    def load(self):
+        return [(record.doc_id, dict(record)) for record in self.db]
+
+    def insert(self, record) -> int:
+        if self._middleware is None:
+            return self.db.insert(record)
+        record_id = self._next_id
+        self._next_id += 1
+        self._middleware.put(self._table, record_id, dict(record))
+        return record_id
+
+    def insert_many(self, records) -> list:
+        if self._middleware is None:
+            return self.db.insert_multiple(records)
+        return [self.insert(record) for record in records]
+
+    def remove(self, record_ids):
+        if self._middleware is None:
+            self.db.remove(doc_ids=list(record_ids))
+            return
+        for record_id in record_ids:
+            self._middleware.pop(self._table, record_id)
+
+    def pending(self) -> int:
+        if self._middleware is None:
+            return 0
+        return self._middleware._cache_modified_count
+
+    def flush(self) -> int:
+        if self._middleware is None:
+            return 0
+        return self._middleware.flush()
+
+    def snapshot(self):
+        if self._middleware is not None:
+            return self._middleware.snapshot()
+        with self._lock:  # 즉시 쓰기: 파일 기록은 storage 락 안에서 일어남
+            with open(self._path, "rb") as f:
+                return f.read()
+
+class TinyDBUserBackend(UserBackend):
+    # 쓰기는 파일 전체를 제자리에서 다시 쓰므로 (seek → write → truncate) 백업 스레드의 읽기와 락으로 분리
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.Lock()
+        self.db = load_or_restore_db(path)
+        self.User = Query()
+
+    def all_user_ids(self):
+        return [entry['user_id'] for entry in self.db.all() if 'user_id' in entry]
+
+    def get(self, user_id: int):
+        result = self.db.search(self.User.user_id == user_id)
+        if result and isinstance(result[0], dict):
+            return dict(result[0])
+        return None
+
+    def insert(self, record):
+        with self._lock:
+            self.db.insert(record)
+
+    def update(self, user_id: int, fields: dict):
+        with self._lock:
+            self.db.update(fields, self.User.user_id == user_id)
+
+    def reset_streaks(self, before: str, user_ids=None) -> int:
+        missed = (self.User.day_streak > 0) & self.User.last_day_complete.test(lambda day: not day or day < before)
+        if user_ids is not None:
+            ids = set(user_ids)
+            missed = missed & self.User.user_id.test(lambda user_id: user_id in ids)
+        with self._lock:
+            return len(self.db.update({"day_streak": 0}, missed))
+
+    def all_settings(self):
+        return {
+            entry["user_id"]: (entry.get("timezone"), entry.get("reset_hour"))
+            for entry in self.db.all()
+            if "user_id" in entry and (entry.get("timezone") or entry.get("reset_hour") is not None)
+        }
+
+    def snapshot(self):
+        with self._lock:
+            with open(self._path, "rb") as f:
+                return f.read()
+
+# ---------------------------------------------------------------------------
+# SQLite (WAL)
+# ---------------------------------------------------------------------------
+
+class SQLiteChecklistBackend(ChecklistBackend):
+    # write_behind=True 이면 변경마다 commit하지 않고 flush()에서 한 번에 commit (group commit)
+    def __init__(self, path: str, lock, write_behind: bool):
+        self._lock = lock
+        self._write_behind = write_behind
+        self._pending = 0
+        self._path = path
+        self.conn, self._conn_lock = shared_sqlite(path)
+
+    def load(self):
+        with self._conn_lock:
+            rows = self.conn.execute(
+                "SELECT id, user_id, period, date, game, event, task FROM checklist"
+            ).fetchall()
+        records = []
+        for row in rows:
+            record = {field: row[field] for field in CHECKLIST_FIELDS}
+            if record["event"] is None:
+                del record["event"]
+            records.append((row["id"], record))
+        return records
+
+    def _changed(self, count=1):
+        if self._write_behind:
+            self._pending += count
+        else:
+            self.conn.commit()
+
+    def _insert_row(self, record):
+        cur = self.conn.execute(
+            "INSERT INTO checklist (user_id, period, date, game, event, task) VALUES (?, ?, ?, ?, ?, ?)",
+            tuple(record.get(field) for field in CHECKLIST_FIELDS),
+        )
+        return cur.lastrowid
+
+    def insert(self, record) -> int:
+        with self._conn_lock:
+            record_id = self._insert_row(record)
+            self._changed()
+        return record_id
+
+    def insert_many(self, records) -> list:
+        with self._conn_lock:
+            record_ids = [self._insert_row(record) for record in records]
+            self._changed(len(records))
+        return record_ids
+
+    def remove(self, record_ids):
+        record_ids = list(record_ids)
+        with self._conn_lock:
+            self.conn.executemany("DELETE FROM checklist WHERE id = ?", [(i,) for i in record_ids])
+            self._changed(len(record_ids))
+
+    def pending(self) -> int:
+        return self._pending
+
+    def flush(self) -> int:
+        with self._lock, self._conn_lock:
+            if self._pending == 0:
+                return 0
+            pending = self._pending
+            self.conn.commit()
+            self._pending = 0
+            return pending
+
+    def close(self):
+        self.flush()
+        close_shared_sqlite(self._path)
+
+class SQLiteUserBackend(UserBackend):
+    def __init__(self, path: str):
+        self.conn, self._lock = shared_sqlite(path)  # checklist와 같은 연결 / 락
+
+    def all_user_ids(self):
+        with self._lock:
+            return [row["user_id"] for row in self.conn.execute("SELECT user_id FROM users")]
+
+    def get(self, user_id: int):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT user_id, day_streak, last_day_complete, timezone, reset_hour FROM users WHERE user_id = ?",
+                (user_id,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def insert(self, record):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO users (user_id, day_streak, last_day_complete, timezone, reset_hour) "
+                "VALUES (?, ?, ?, ?, ?)",
+                tuple(record.get(field) for field in USER_FIELDS),
+            )
+            self.conn.commit()
+
+    def update(self, user_id: int, fields: dict):
+        columns = [name for name in fields if name in USER_FIELDS and name != "user_id"]
+        if not columns:
+            return
+        with self._lock:
+            self.conn.execute(
+                f"UPDATE users SET {', '.join(f'{c} = ?' for c in columns)} WHERE user_id = ?",
+                [fields[c] for c in columns] + [user_id],
+            )
+            self.conn.commit()
+
+    def reset_streaks(self, before: str, user_ids=None) -> int:
+        query = ("UPDATE users SET day_streak = 0 "
+                 "WHERE day_streak > 0 AND (last_day_complete IS NULL OR last_day_complete < ?)")
+        if user_ids is None:
+            batches = [()]
+        else:
+            # SQLite 변수 개수 제한 때문에 나눠서 실행 (한 트랜잭션)
+            user_ids = list(user_ids)
+            batches = [tuple(user_ids[i:i + 500]) for i in range(0, len(user_ids), 500)]
+        reset = 0
+        with self._lock:
+            for batch in batches:
+                sql = query if user_ids is None else f"{query} AND user_id IN ({', '.join('?' * len(batch))})"
+                reset += self.conn.execute(sql, (before, *batch)).rowcount
+            self.conn.commit()
+        return reset
+
+    def all_settings(self):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT user_id, timezone, reset_hour FROM users "
+                "WHERE timezone IS NOT NULL OR reset_hour IS NOT NULL"
+            ).fetchall()
+        return {row["user_id"]: (row["timezone"], row["reset_hour"]) for row in rows}
+
+# ---------------------------------------------------------------------------
+# Journal (append-only JSONL + snapshot)
+# ---------------------------------------------------------------------------
+
+def _fsync_write(path: str, text: str):
+    # 임시 파일에 쓰고 fsync 후 rename → 쓰는 도중 죽어도 기존 파일은 온전함
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class JournalChecklistBackend(ChecklistBackend):
+    # 체크/해제 1건 = 저널 1줄 (약 100바이트 append)
+    #   {"op": "add", "id": 12, "r": {...}}  /  {"op": "del", "ids": [12, 13]}
+    # 시작 시 스냅샷 → (압축 중이던 저널) → 저널 순서로 재생한다. 재생은 멱등이라
+    # 압축 도중 죽어서 같은 변경이 두 번 재생되어도 결과가 같다.
+    def __init__(self, snapshot_path: str, journal_path: str, lock, write_behind: bool,
+                 compact_interval: float, compact_lines: int, legacy_path: str = None):
+        self._lock = lock
+        self._write_behind = write_behind
+        self._snapshot_path = snapshot_path
+        self._journal_path = journal_path
+        self._rotated_path = f"{journal_path}.compacting"
+        self._compact_interval = compact_interval
+        self._compact_lines = compact_lines
+        self._records = {}
+        self._next_id = 1
+        self._buffer = []          # 아직 저널 파일에 쓰지 않은 줄
+        self._journal_lines = 0    # 마지막 압축 이후 저널 줄 수
+        self._last_compact = time.monotonic()
+        self._flush_lock = threading.Lock()
+
+        if legacy_path and not os.path.exists(snapshot_path) and not os.path.exists(journal_path):
+            self._import_legacy(legacy_path)
+        self._replay()
+        self._journal = open(journal_path, "a", encoding="utf-8")
+
+    def _import_legacy(self, path: str):
+        # 기존 checklist.json(TinyDB)을 첫 스냅샷으로 사용
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+        migrations.migrate_json_file("checklist", path)  # 옛 기록 형식(주간 키 등)부터 맞춤
+        with open(path, "r", encoding="utf-8") as f:
+            table = json.load(f).get("_default", {})
+        records = {}
+        for doc_id, record in table.items():
+            task = record.get("task")
+            if isinstance(task, dict):
+                record["task"] = task.get("name", "UNKNOWN")
+            records[int(doc_id)] = record
+        self._write_snapshot(records, max(records, default=0) + 1)
+        log.info("✅ checklist.json → 저널 스냅샷 이전 완료", records=len(records))
+
+    def _apply(self, entry):
+        if entry.get("op") == "add":
+            record_id = entry["id"]
+            self._records[record_id] = entry["r"]
+            self._next_id = max(self._next_id, record_id + 1)
+        elif entry.get("op") == "del":
+            for record_id in entry["ids"]:
+                self._records.pop(record_id, None)
+
+    def _replay_journal(self, path: str):
+        if not os.path.exists(path):
+            return 0
+        count = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # 기록 도중 죽어서 잘린 마지막 줄은 버린다
+                    log.warning("저널의 손상된 줄을 건너뜀", path=path)
+                    continue
+                self._apply(entry)
+                count += 1
+        return count
+
+    def _replay(self):
+        if os.path.exists(self._snapshot_path):
+            with open(self._snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self._records = {int(k): v for k, v in snapshot.get("records", {}).items()}
+            self._next_id = snapshot.get("next_id", max(self._records, default=0) + 1)
+        replayed = self._replay_journal(self._rotated_path)
+        self._journal_lines = self._replay_journal(self._journal_path)
+        log.info("✅ checklist 저널 재생 완료", records=len(self._records), journal_lines=replayed + self._journal_lines)
+
+    def _write_snapshot(self, records, next_id):
+        payload = {"next_id": next_id, "records": {str(k): v for k, v in records.items()}}
+        _fsync_write(self._snapshot_path, json.dumps(payload, ensure_ascii=False))
+
+    def _append(self, entry):
+        self._apply(entry)
+        self._buffer.append(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._journal_lines += 1
+        if not self._write_behind:
+            self._write_buffer(sync=True)
+
+    def _write_buffer(self, sync: bool):
+        lines, self._buffer = self._buffer, []
+        if lines:
+            self._journal.write("".join(lines))
+            self._journal.flush()
+            if sync:
+                os.fsync(self._journal.fileno())
+        return len(lines)
+
+    def load(self):
+        return list(self._records.items())
+
+    def insert(self, record) -> int:
+        record_id = self._next_id
+        self._append({"op": "add", "id": record_id, "r": record})
+        return record_id
+
+    def remove(self, record_ids):
+        record_ids = list(record_ids)
+        if record_ids:
+            self._append({"op": "del", "ids": record_ids})
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                return self._write_buffer(sync=True)
+
+    def maybe_compact(self):
+        due = time.monotonic() - self._last_compact >= self._compact_interval
+        if self._journal_lines == 0 or (not due and self._journal_lines < self._compact_lines):
+            return False
+        self.compact()
+        return True
+
+    def compact(self):
+        # 락 안에서는 저널 교체와 레코드 복사만 하고, 스냅샷 기록은 락 밖에서 수행
+        with self._flush_lock:
+            with self._lock:
+                self._write_buffer(sync=True)
+                self._journal.close()
+                os.replace(self._journal_path, self._rotated_path)
+                self._journal = open(self._journal_path, "a", encoding="utf-8")
+                records, next_id = dict(self._records), self._next_id
+                lines, self._journal_lines = self._journal_lines, 0
+                self._last_compact = time.monotonic()
+            self._write_snapshot(records, next_id)
+            os.remove(self._rotated_path)
+        log.info("🗜️ checklist 저널 압축 완료", journal_lines=lines, records=len(records))
+
+    def close(self):
+        self.flush()
+        self._journal.close()
+
+# ---------------------------------------------------------------------------
+# 백엔드 선택 (STORAGE_BACKEND=tinydb | sqlite | journal)
+# ---------------------------------------------------------------------------
+
+def _ensure_sqlite_migrated():
+    from utils.migrate_sqlite import migrate_json_to_sqlite
+    migrate_json_to_sqlite()
+
+def open_checklist_backend(lock) -> ChecklistBackend:
+    if config.STORAGE_BACKEND == "sqlite":
+        _ensure_sqlite_migrated()
+        return SQLiteChecklistBackend(config.SQLITE_PATH, lock, config.CHECKLIST_WRITE_BEHIND)
+    if config.STORAGE_BACKEND == "journal":
+        return JournalChecklistBackend(
+            config.JOURNAL_SNAPSHOT_PATH, config.JOURNAL_PATH, lock, config.CHECKLIST_WRITE_BEHIND,
+            config.JOURNAL_COMPACT_INTERVAL, config.JOURNAL_COMPACT_LINES,
+            legacy_path=config.CHECKLIST_PATH,
+        )
+    return TinyDBChecklistBackend(config.CHECKLIST_PATH, lock, config.CHECKLIST_WRITE_BEHIND)
+
+def open_user_backend() -> UserBackend:
+    if config.STORAGE_BACKEND == "sqlite":
+        _ensure_sqlite_migrated()
+        return SQLiteUserBackend(config.SQLITE_PATH)
+    return TinyDBUserBackend(config.USERS_PATH)
@@ -1,43 +1,236 @@
 # utils/backup.py
+# 증분/압축/내용 주소 기반 백업
+# - 백업 파일은 /data/backups/objects/<sha256>.gz 로 저장 (같은 내용은 한 번만 저장)
+# - 직전 백업과 내용 해시가 같으면 건너뜀
+# - /data/backups/manifest.json 에 원본별 백업 목록을 기록 → 조회/정리에 디렉터리 스캔 불필요
+# - 실제 작업은 전용 백업 스레드에서 수행해 스케줄러/이벤트 루프를 막지 않음
 import os
+import gzip
+import json
 import shutil
+import sqlite3
+import hashlib
+import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from glob import glob
 from tinydb import TinyDB
+from utils import config, log
 
-def rolling_backup(file_path: str):
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-    backup_path = f"{file_path}.{timestamp}.bak"
+MANIFEST_PATH = os.path.join(config.BACKUP_DIR, "manifest.json")
+OBJECTS_DIR = os.path.join(config.BACKUP_DIR, "objects")
+
+_manifest_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="backup")
+_stats = {
+    "runs": 0,          # 백업 시도 횟수
+    "skipped": 0,       # 내용이 같아 건너뛴 횟수
+    "bytes_in": 0,      # 원본 크기 합계
+    "bytes_out": 0,     # 새로 저장한 압축 파일 크기 합계
+    "last_duration_ms": 0.0,
+}
+
+def _load_manifest():
     try:
-        shutil.copyfile(file_path, backup_path)
-        print(f"📦 롤링 백업 완료: {backup_path}")
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"version": 1, "sources": {}}
     except Exception as e:
-        print(f"[백업 실패] {file_path} → {backup_path} : {e}")
+        log.warning("백업 manifest 읽기 실패, 새로 만듭니다", error=str(e))
+        return {"version": 1, "sources": {}}
+
+def _save_manifest(manifest):
+    os.makedirs(config.BACKUP_DIR, exist_ok=True)
+    tmp_path = f"{MANIFEST_PATH}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, MANIFEST_PATH)
+
+def _object_path(digest: str):
+    return os.path.join(OBJECTS_DIR, f"{digest}.gz")
+
+def _read_source(path: str, sqlite: bool):
+    if not sqlite:
+        with open(path, "rb") as f:
+            return f.read()
+    # WAL 모드 DB는 파일 복사 대신 SQLite 온라인 백업 API로 일관된 스냅샷을 뜬다
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".sqlite-backup")
+    os.close(fd)
+    try:
+        src = sqlite3.connect(path)
+        dst = sqlite3.connect(tmp_path)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+            src.close()
+        with open(tmp_path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(tmp_path)
 
-def cleanup_old_backups(directory="/data", keep_days=7):
-    now = time.time()
-    for fname in os.listdir(directory):
-        if fname.endswith(".bak") and ("checklist" in fname or "quests" in fname):
-            fpath = os.path.join(directory, fname)
+def backup_file(path: str, sqlite: bool = False, data: bytes = None):
+    # 백업을 수행하고 manifest 항목(dict)을 반환. 변경이 없어 건너뛰면 None
+    # data: 호출한 쪽이 일관된 시점에 미리 떠 둔 원본 내용 (없으면 여기서 파일을 읽음)
+    started = time.perf_counter()
+    if data is None:
+        data = _read_source(path, sqlite)
+    digest = hashlib.sha256(data).hexdigest()
+
+    with _manifest_lock:
+        manifest = _load_manifest()
+        source = manifest["sources"].setdefault(path, {"last_hash": None, "backups": []})
+        _stats["runs"] += 1
+        _stats["bytes_in"] += len(data)
+        if source["last_hash"] == digest:
+            _stats["skipped"] += 1
+            _stats["last_duration_ms"] = (time.perf_counter() - started) * 1000
+            log.info("📦 백업 생략 (변경 없음)", path=path)
+            return None
+
+        object_path = _object_path(digest)
+        stored = 0
+        if not os.path.exists(object_path):
+            os.makedirs(OBJECTS_DIR, exist_ok=True)
+            tmp_path = f"{object_path}.tmp"
+            with gzip.open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, object_path)
+            stored = os.path.getsize(object_path)
+
+        entry = {
+            "sha256": digest,
+            "created": time.time(),
+            "timestamp": datetime.now().strftime("%Y%m%d_%H%M"),
+            "size": len(data),
+            "stored": stored,
+        }
+        source["backups"].append(entry)
+        source["last_hash"] = digest
+        _save_manifest(manifest)
+
+        duration_ms = (time.perf_counter() - started) * 1000
+        _stats["bytes_out"] += stored
+        _stats["last_duration_ms"] = duration_ms
+    log.info("📦 백업 완료", path=path, bytes_in=len(data), bytes_out=stored, duration_ms=round(duration_ms, 1))
+    return entry
+
+def rolling_backup(file_path: str, data: bytes = None):
+    try:
+        return backup_file(file_path, data=data)
+    except Exception:
+        log.exception("백업 실패", path=file_path)
+
+def sqlite_backup(db_path: str):
+    try:
+        return backup_file(db_path, sqlite=True)
+    except Exception:
+        log.exception("백업 실패", path=db_path)
+
+def _prune_legacy(path: str, newest: float):
+    # 엔진 도입 이전의 .bak 파일 중 manifest의 최신 백업보다 오래된 것 삭제 (복구 후보로 쓸 일이 없음)
+    removed = 0
+    for bpath in glob(f"{path}.*.bak"):
+        try:
+            if os.path.getmtime(bpath) < newest:
+                os.remove(bpath)
+                removed += 1
+                log.info("🧹 예전 .bak 백업 삭제됨", path=bpath)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log.warning("예전 .bak 백업 삭제 실패", path=bpath, error=str(e))
+    return removed
+
+def cleanup_old_backups(keep_days: int = None):
+    # manifest 기준으로 오래된 백업 항목을 지우고, 더 이상 참조되지 않는 객체 파일만 삭제
+    # (원본별 최신 백업 1개는 항상 유지)
+    # 예전 .bak 파일은 같은 원본의 manifest 최신 백업보다 오래되면 삭제
+    keep_days = config.BACKUP_KEEP_DAYS if keep_days is None else keep_days
+    cutoff = time.time() - keep_days * 86400
+    with _manifest_lock:
+        manifest = _load_manifest()
+        before = set()
+        after = set()
+        for source in manifest["sources"].values():
+            backups = source["backups"]
+            before.update(b["sha256"] for b in backups)
+            kept = [b for b in backups[:-1] if b["created"] >= cutoff] + backups[-1:]
+            source["backups"] = kept
+            after.update(b["sha256"] for b in kept)
+        removed = before - after
+        for digest in removed:
             try:
-                if os.stat(fpath).st_mtime < now - keep_days * 86400:
-                    os.remove(fpath)
-                    print(f"🧹 오래된 백업 삭제됨: {fname}")
+                os.remove(_object_path(digest))
+                log.info("🧹 오래된 백업 삭제됨", digest=digest[:12])
+            except FileNotFoundError:
+                pass
             except Exception as e:
-                print(f"[삭제 실패] {fname}: {e}")
+                log.warning("오래된 백업 삭제 실패", digest=digest[:12], error=str(e))
+        if removed:
+            _save_manifest(manifest)
+        legacy = sum(
+            _prune_legacy(path, source["backups"][-1]["created"])
+            for path, source in manifest["sources"].items()
+            if source["backups"]
+        )
+    return len(removed) + legacy
+
+def submit(fn, *args):
+    # 백업 스레드에서 실행 (호출한 스레드는 바로 반환)
+    future = _executor.submit(fn, *args)
+
+    def handle_exception(f):
+        exception = f.exception()
+        if exception:
+            log.error("백업 스레드 예외", error=repr(exception))
+
+    future.add_done_callback(handle_exception)
+    return future
+
+def get_backup_stats():
+    return dict(_stats)
+
+def _restore_candidates(path: str):
+    manifest = _load_manifest()
+    source = manifest["sources"].get(path, {"backups": []})
+    for entry in reversed(source["backups"]):
+        yield _object_path(entry["sha256"]), True
+    # 엔진 도입 이전의 .bak 파일
+    for bpath in sorted(glob(f"{path}.*.bak"), reverse=True):
+        yield bpath, False
+
+def _open_validated(path: str, **kwargs):
+    # TinyDB는 처음 조회할 때 파일을 읽으므로, 여기서 한 번 읽어 손상 여부를 확인
+    db = TinyDB(path, **kwargs)
+    try:
+        db.storage.read()
+    except Exception:
+        db.close()
+        raise
+    return db
 
-def load_or_restore_db(path: str):
+def load_or_restore_db(path: str, **kwargs):
+    # kwargs: TinyDB에 그대로 넘김 (예: storage=미들웨어)
     try:
-        return TinyDB(path)
+        return _open_validated(path, **kwargs)
     except Exception as e:
-        print(f"[ERROR] TinyDB 로드 실패: {e}")
-        backups = sorted(glob(f"{path}.*.bak"), reverse=True)
-        for bpath in backups:
+        log.error("TinyDB 로드 실패", path=path, error=str(e))
+        for bpath, compressed in _restore_candidates(path):
             try:
-                shutil.copyfile(bpath, path)
-                print(f"🛠️ 복구 성공: {bpath}")
-                return TinyDB(path)
+                if compressed:
+                    with gzip.open(bpath, "rb") as src, open(path, "wb") as dst:
+                        shutil.copyfileobj(src, dst)
+                else:
+                    shutil.copyfile(bpath, path)
+                db = _open_validated(path, **kwargs)
+                log.info("🛠️ 복구 성공", path=path, backup=bpath)
+                return db
             except Exception as e2:
-                print(f"[복구 실패] {bpath}: {e2}")
+                log.warning("복구 실패", path=path, backup=bpath, error=str(e2))
         raise RuntimeError("🚨 모든 백업 복구 실패: 수동 조치 필요")
@@ -0,0 +1,144 @@
+# utils/broadcast.py
+# 전체 유저 대상 메시지 전송 (정기 알림, /test)
+# - 워커 N개가 동시에 전송하되, 토큰 버킷으로 전체 초당 전송량을 제한
+# - 같은 채팅에는 BROADCAST_PER_CHAT_INTERVAL 초에 한 번만 전송
+# - RetryAfter(flood control)를 받으면 모든 워커를 그 시간만큼 멈추고 재시도
+import time
+import asyncio
+from telegram.error import RetryAfter, Forbidden, BadRequest, TimedOut, NetworkError
+from utils import config, metrics, log
+
+MAX_RETRIES = 3
+PROGRESS_INTERVAL = 5.0  # 진행 상황 출력 주기(초)
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+# 동시에 도는 브로드캐스트(08:00 일일 알림 + 이벤트 알림 등)가 한도를 함께 쓰도록 공유
+_bucket = None
+_chat_next_send = {}  # chat_id → 다음 전송 가능 시각 (monotonic)
+last_stats = {}       # 브로드캐스트 이름 → 마지막 실행 결과
+
+def _get_bucket():
+    global _bucket
+    if _bucket is None:
+        _bucket = TokenBucket(config.BROADCAST_RATE)
+    return _bucket
+
+async def _wait_for_chat(chat_id):
+    now = time.monotonic()
+    next_send = _chat_next_send.get(chat_id, 0.0)
+    _chat_next_send[chat_id] = max(now, next_send) + config.BROADCAST_PER_CHAT_INTERVAL
+    if next_send > now:
+        await asyncio.sleep(next_send - now)
+
+def _prune_chat_limits():
+    now = time.monotonic()
+    for chat_id in [c for c, t in _chat_next_send.items() if t < now]:
+        del _chat_next_send[chat_id]
+
+async def _send_one(bot, bucket, chat_id, kwargs, stats):
+    for attempt in range(MAX_RETRIES + 1):
+        await _wait_for_chat(chat_id)
+        await bucket.acquire()
+        try:
+            await bot.send_message(chat_id=chat_id, **kwargs)
+            stats["sent"] += 1
+            return
+        except RetryAfter as e:
+            stats["retried"] += 1
+            bucket.pause(float(e.retry_after))
+            log.warning("[브로드캐스트] flood control", retry_after=e.retry_after)
+        except (Forbidden, BadRequest) as e:
+            # 봇 차단/잘못된 채팅 등은 재시도해도 소용없음 (유저 수만큼 쌓일 수 있어 샘플링)
+            log.warning("메시지 전송 실패", chat_id=chat_id, error=str(e), sampled=True)
+            break
+        except (TimedOut, NetworkError):
+            stats["retried"] += 1
+            await asyncio.sleep(min(2 ** attempt, 10))
+        except Exception as e:
+            log.error("메시지 전송 실패", chat_id=chat_id, error=repr(e))
+            break
+    stats["failed"] += 1
+
+async def broadcast(bot, chat_ids, build_message, name: str = "broadcast"):
+    # build_message(chat_id) → send_message 인자(dict) 또는 None(전송 안 함)
+    # 유저 수만큼 순차 대기하지 않고 워커 풀로 처리한 뒤 통계를 반환
+    bucket = _get_bucket()
+    queue = asyncio.Queue(maxsize=config.BROADCAST_CONCURRENCY * 4)
+    stats = {"total": 0, "sent": 0, "failed": 0, "skipped": 0, "retried": 0}
+    started = time.monotonic()
+    last_report = [started]
+
+    def report(final=False):
+        elapsed = time.monotonic() - started
+        rate = stats["sent"] / elapsed if elapsed > 0 else 0.0
+        label = "완료" if final else "진행 중"
+        log.info(f"📣 [{name}] {label}", broadcast=name, sent=stats["sent"], total=stats["total"],
+                 failed=stats["failed"], retried=stats["retried"], rate=round(rate, 1))
+        return elapsed, rate
+
+    async def worker():
+        while True:
+            chat_id = await queue.get()
+            try:
+                kwargs = build_message(chat_id)
+                if kwargs is None:
+                    stats["skipped"] += 1
+                else:
+                    await _send_one(bot, bucket, chat_id, kwargs, stats)
+            except Exception:
+                stats["failed"] += 1
+                log.exception("메시지 생성 실패", chat_id=chat_id)
+            finally:
+                queue.task_done()
+            now = time.monotonic()
+            if now - last_report[0] >= PROGRESS_INTERVAL:
+                last_report[0] = now
+                report()
+
+    workers = [asyncio.create_task(worker()) for _ in range(config.BROADCAST_CONCURRENCY)]
+    try:
+        for chat_id in chat_ids:
+            stats["total"] += 1
+            await queue.put(chat_id)
+        await queue.join()
+    finally:
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        _prune_chat_limits()
+
+    elapsed, rate = report(final=True)
+    stats["elapsed"] = round(elapsed, 3)
+    stats["rate"] = round(rate, 2)
+    for result in ("sent", "failed", "skipped", "retried"):
+        if stats[result]:
+            metrics.BROADCAST_MESSAGES.inc(stats[result], broadcast=name, result=result)
+    metrics.BROADCAST_SECONDS.observe(elapsed, broadcast=name)
+    metrics.BROADCAST_RATE.set(stats["rate"], broadcast=name)
+    last_stats[name] = stats
+    return stats
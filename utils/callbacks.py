@@ -0,0 +1,93 @@
+# utils/callbacks.py
+# 인라인 버튼 callback_data 인코딩 / 디코딩
+# 게임·숙제 이름 대신 카탈로그 안의 번호를 써서 텔레그램 64바이트 제한과 이름 속 "|" 문제를 피한다.
+#   일일:   d<fingerprint>.<게임 번호>.<숙제 번호>
+#   주간:   w<fingerprint>.<게임 번호>.<숙제 번호>
+#   이벤트: e<fingerprint>.<이벤트 번호>.<숙제 번호>.<date_key 서수>
+#   구분선: n
+# 숫자는 36진수, fingerprint는 카탈로그 내용 해시 → 재시작 후에도 같은 카탈로그면 그대로 해석된다.
+# 카탈로그가 바뀌어도 최근 KEEP_CATALOGS개까지는 예전 키보드의 버튼을 해석할 수 있다.
+# 채팅별 카탈로그(overlay)는 등록하지 않고, 해당 채팅의 현재 카탈로그를 decode()에 넘겨 해석한다.
+from collections import OrderedDict
+from datetime import date
+
+NOOP = "n"
+DAILY = "d"
+WEEKLY = "w"
+EVENT = "e"
+KEEP_CATALOGS = 8
+MAX_LENGTH = 64  # 텔레그램 callback_data 최대 바이트
+
+_catalogs = OrderedDict()  # fingerprint → Catalog
+
+def _b36(n: int):
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    out = ""
+    while True:
+        n, r = divmod(n, 36)
+        out = digits[r] + out
+        if n == 0:
+            return out
+
+def register(catalog):
+    # 새 카탈로그를 등록 (같은 내용이면 최신으로 갱신만)
+    _catalogs.pop(catalog.fingerprint, None)
+    _catalogs[catalog.fingerprint] = catalog
+    while len(_catalogs) > KEEP_CATALOGS:
+        _catalogs.popitem(last=False)
+
+def daily(catalog, game_index: int, task_index: int):
+    return f"{DAILY}{catalog.fingerprint}.{_b36(game_index)}.{_b36(task_index)}"
+
+def weekly(catalog, game_index: int, task_index: int):
+    return f"{WEEKLY}{catalog.fingerprint}.{_b36(game_index)}.{_b36(task_index)}"
+
+def event(catalog, evt, task_index: int, date_key: str):
+    day = date.fromisoformat(date_key).toordinal()
+    return f"{EVENT}{catalog.fingerprint}.{_b36(evt.order)}.{_b36(task_index)}.{_b36(day)}"
+
+def _decode_daily(catalog, game_index, task_index):
+    game = catalog.games[game_index]
+    return game.name, game.daily[task_index]
+
+def _decode_weekly(catalog, game_index, task_index):
+    game = catalog.games[game_index]
+    return game.name, game.weekly[task_index]
+
+def _decode_event(catalog, event_index, task_index, day):
+    evt = catalog.events[event_index]
+    return evt.game, evt.name, evt.tasks[task_index].name, date.fromordinal(day).isoformat()
+
+_DECODERS = {DAILY: _decode_daily, WEEKLY: _decode_weekly, EVENT: _decode_event}
+
+def decode(data: str, catalog=None):
+    # → (kind, args). 카탈로그를 더 이상 모르면 args는 None (오래된 키보드)
+    # catalog: 버튼이 눌린 채팅의 현재 카탈로그 (fingerprint가 같으면 등록된 카탈로그보다 먼저 사용)
+    # 형식이 잘못된 데이터는 ValueError
+    if data == NOOP:  # 구분선은 정확히 "n" 하나 (접두사로 보면 "n..."으로 시작하는 옛 데이터까지 삼킴)
+        return NOOP, ()
+    kind = data[:1]
+    decoder = _DECODERS.get(kind)
+    if decoder is None:
+        raise ValueError(f"알 수 없는 callback_data: {data!r}")
+    fingerprint, *fields = data[1:].split(".")
+    if catalog is None or catalog.fingerprint != fingerprint:
+        catalog = _catalogs.get(fingerprint)
+    if catalog is None:
+        return kind, None
+    try:
+        return kind, decoder(catalog, *(int(f, 36) for f in fields))
+    except (IndexError, TypeError, ValueError) as e:
+        raise ValueError(f"잘못된 callback_data: {data!r}") from e
+
+def legacy_kind(data: str):
+    # 이전 형식("game|task", "weekly|...", "event|...")으로 만들어진 키보드의 종류
+    if data == "noop":
+        return NOOP
+    if "|" not in data:
+        return None
+    if data.startswith("weekly|"):
+        return WEEKLY
+    if data.startswith("event|"):
+        return EVENT
+    return DAILY
@@ -0,0 +1,101 @@
+# utils/catalog.py
+# quests.json(dict)을 조회 전용으로 컴파일한 카탈로그
+# - 날짜는 미리 파싱하고, 숙제 목록은 튜플로 고정
+# - 이벤트 종료일 정렬 인덱스로 '오늘 진행 중' / '특정 날짜 마감' 이벤트를 범위 조회
+# - fingerprint: 내용 기반 식별자 (재시작해도 같은 내용이면 같은 값, 콜백 데이터에 사용)
+# QUESTS가 바뀌면 새 Catalog를 통째로 만들어 교체한다 (부분 수정 없음).
+import zlib
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date
+from utils import log
+
+@dataclass(frozen=True)
+class EventTask:
+    name: str
+    type: str  # "daily" | "once"
+
+@dataclass(frozen=True)
+class Event:
+    game: str
+    name: str
+    type: str           # 이벤트 체크 키 기준: "daily"면 날짜별, 아니면 종료일 기준
+    until: date
+    until_key: str      # "YYYY-MM-DD"
+    tasks: tuple        # (EventTask, ...)
+    order: int          # 카탈로그 내 순서 (게임 순서 → 이벤트 순서)
+
+    def date_key(self, today: date):
+        return today.strftime("%Y-%m-%d") if self.type == "daily" else self.until_key
+
+@dataclass(frozen=True)
+class Game:
+    name: str
+    daily: tuple
+    weekly: tuple
+    events: tuple       # (Event, ...)
+
+class Catalog:
+    def __init__(self, version, games):
+        self.version = version
+        self.games = tuple(games)
+        self._by_name = {g.name: g for g in self.games}
+        self.events = tuple(e for g in self.games for e in g.events)  # events[e.order] == e
+        self.daily_entries = frozenset((g.name, task) for g in self.games for task in g.daily)  # /done 기준
+        self.fingerprint = format(zlib.crc32(repr(self.games).encode("utf-8")), "x")
+        events = sorted(self.events, key=lambda e: (e.until, e.order))
+        self._deadlines = [e.until for e in events]
+        self._events_by_deadline = tuple(events)
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def game(self, name: str):
+        return self._by_name.get(name)
+
+    def events_active_on(self, day: date):
+        # 종료일이 day 이후인 이벤트 (카탈로그 순서)
+        start = bisect_left(self._deadlines, day)
+        return sorted(self._events_by_deadline[start:], key=lambda e: e.order)
+
+    def events_ending_on(self, day: date):
+        start = bisect_left(self._deadlines, day)
+        end = bisect_right(self._deadlines, day)
+        return self._events_by_deadline[start:end]
+
+    def events_expired_before(self, day: date):
+        return self._events_by_deadline[:bisect_left(self._deadlines, day)]
+
+    def events_by_deadline(self):
+        return self._events_by_deadline
+
+def _task_name(task):
+    if isinstance(task, dict):
+        return task.get("name", "UNKNOWN")
+    return str(task)
+
+def compile_catalog(quests: dict, version=0):
+    games = []
+    order = 0
+    for game_name, data in quests.items():
+        events = []
+        for evt in data.get("events", []):
+            try:
+                until = date.fromisoformat(evt["until"])
+            except (KeyError, TypeError, ValueError) as e:
+                log.warning("이벤트 종료일 파싱 실패", game=game_name, event=evt.get("name"), error=str(e))
+                continue
+            tasks = tuple(
+                EventTask(_task_name(t), t.get("type", "once") if isinstance(t, dict) else "once")
+                for t in evt.get("tasks", [])
+            )
+            events.append(Event(game_name, evt["name"], evt.get("type", "once"), until,
+                                until.isoformat(), tasks, order))
+            order += 1
+        games.append(Game(
+            game_name,
+            tuple(_task_name(t) for t in data.get("daily", [])),
+            tuple(_task_name(t) for t in data.get("weekly", [])),
+            tuple(events),
+        ))
+    return Catalog(version, games)
@@ -0,0 +1,114 @@
+# utils/config.py
+# 환경변수 기반 설정값 모음
+import os
+import secrets
+from utils import log
+
+def _env_float(name, default):
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        log.warning("설정 값이 올바르지 않아 기본값 사용", setting=name, default=default)
+        return float(default)
+
+def _env_int(name, default):
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        log.warning("설정 값이 올바르지 않아 기본값 사용", setting=name, default=default)
+        return int(default)
+
+# checklist 지연 쓰기(write-behind) 설정
+# - CHECKLIST_WRITE_BEHIND=0 이면 매 변경마다 즉시 파일에 기록
+# - CHECKLIST_FLUSH_INTERVAL: 변경분을 모아서 기록하는 주기(초) = 최대 유실 가능 구간
+# - CHECKLIST_FLUSH_THRESHOLD: 이 개수만큼 변경이 쌓이면 주기를 기다리지 않고 바로 기록
+CHECKLIST_WRITE_BEHIND = os.getenv("CHECKLIST_WRITE_BEHIND", "1") != "0"
+CHECKLIST_FLUSH_INTERVAL = _env_float("CHECKLIST_FLUSH_INTERVAL", "2")
+CHECKLIST_FLUSH_THRESHOLD = _env_int("CHECKLIST_FLUSH_THRESHOLD", "50")
+
+# 데이터 폴더 (볼륨 마운트 위치). 벤치마크/부하 테스트는 임시 폴더를 지정해 실제 데이터와 분리
+DATA_DIR = os.getenv("DATA_DIR", "/data")
+
+# 저장소 백엔드 선택: tinydb (JSON 파일, 기본) | sqlite (WAL 모드 DB) | journal (checklist만 JSONL 저널)
+# sqlite / journal 로 처음 기동하면 기존 checklist.json (sqlite는 users.json도) 내용을 1회 이전한다.
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "tinydb").lower()
+CHECKLIST_PATH = os.path.join(DATA_DIR, "checklist.json")
+USERS_PATH = os.path.join(DATA_DIR, "users.json")
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join(DATA_DIR, "dailyquest.db"))
+
+# journal 백엔드: 변경 1건당 저널 1줄, 주기(초) 또는 줄 수 기준으로 스냅샷에 압축
+JOURNAL_PATH = os.path.join(DATA_DIR, "checklist.journal.jsonl")
+JOURNAL_SNAPSHOT_PATH = os.path.join(DATA_DIR, "checklist.snapshot.json")
+JOURNAL_COMPACT_INTERVAL = _env_float("JOURNAL_COMPACT_INTERVAL", "600")
+JOURNAL_COMPACT_LINES = _env_int("JOURNAL_COMPACT_LINES", "5000")
+
+if STORAGE_BACKEND not in ("tinydb", "sqlite", "journal"):
+    log.warning("알 수 없는 STORAGE_BACKEND → tinydb 사용", value=STORAGE_BACKEND)
+    STORAGE_BACKEND = "tinydb"
+
+# 일일/주간 초기화 기준 (주간은 월요일 같은 시각), 유저가 /timezone, /resethour로 바꾸지 않았을 때의 기본값
+RESET_TIMEZONE = os.getenv("RESET_TIMEZONE", "Asia/Seoul")
+RESET_HOUR = _env_int("RESET_HOUR", "5")
+
+# 유저별 초기화 / 아침 알림 스케줄 (utils/timewheel.py)
+# - TIMEWHEEL_TICK_MINUTES마다 현지 시각이 된 유저 묶음만 처리 (60의 약수, 30분/45분 시차 시간대를 위해 기본 15)
+# - 아침 알림은 유저 현지 REMINDER_HOUR시부터 REMINDER_SPREAD_MINUTES 동안 tick마다 나눠서 전송
+TIMEWHEEL_TICK_MINUTES = _env_int("TIMEWHEEL_TICK_MINUTES", "15")
+REMINDER_HOUR = _env_int("REMINDER_HOUR", "8")
+REMINDER_SPREAD_MINUTES = _env_int("REMINDER_SPREAD_MINUTES", "30")
+
+if TIMEWHEEL_TICK_MINUTES <= 0 or 60 % TIMEWHEEL_TICK_MINUTES:
+    log.warning("TIMEWHEEL_TICK_MINUTES는 60의 약수여야 합니다 → 15 사용", value=TIMEWHEEL_TICK_MINUTES)
+    TIMEWHEEL_TICK_MINUTES = 15
+
+# 백업 (압축 + 내용 해시 기반, manifest로 관리)
+BACKUP_DIR = os.getenv("BACKUP_DIR", os.path.join(DATA_DIR, "backups"))
+BACKUP_KEEP_DAYS = _env_int("BACKUP_KEEP_DAYS", "7")
+
+# 브로드캐스트 (텔레그램 한도: 전체 약 30건/초, 같은 채팅 약 1건/초)
+BROADCAST_CONCURRENCY = _env_int("BROADCAST_CONCURRENCY", "8")
+BROADCAST_RATE = _env_float("BROADCAST_RATE", "25")
+BROADCAST_PER_CHAT_INTERVAL = _env_float("BROADCAST_PER_CHAT_INTERVAL", "1.0")
+
+# quests.json 저장: 마지막 수정 후 이 시간(초) 동안 추가 수정이 없으면 한 번에 기록 (0이면 즉시 기록)
+QUESTS_SAVE_DELAY = _env_float("QUESTS_SAVE_DELAY", "1.0")
+
+# 공유 기본 카탈로그(quests.json)를 수정할 수 있는 관리자 user id (쉼표 구분)
+# 관리자가 /basemode를 켜면 숙제 수정 명령이 채팅 overlay 대신 기본 카탈로그에 적용됨
+def _env_ids(name):
+    ids = set()
+    for part in os.getenv(name, "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            ids.add(int(part))
+        except ValueError:
+            log.warning("설정 값이 올바르지 않아 무시", setting=name, value=part)
+    return ids
+
+ADMIN_USER_IDS = _env_ids("ADMIN_USER_IDS")
+
+# 채팅별 카탈로그(overlay) 캐시: 수정된 채팅 중 최근에 쓴 이 개수만큼 컴파일된 카탈로그를 보관
+CATALOG_CACHE_SIZE = _env_int("CATALOG_CACHE_SIZE", "1024")
+
+# 인라인 키보드 수정: 같은 메시지는 이 시간(초)에 최대 1번만 수정하고, 그 사이 탭은 마지막 상태로 합쳐 전송
+EDIT_COALESCE_WINDOW = _env_float("EDIT_COALESCE_WINDOW", "0.7")
+
+# 웹훅 모드: WEBHOOK_URL(외부에서 접근 가능한 기본 주소, 예: https://dailyquest.fly.dev)이 있으면 폴링 대신 웹훅 사용
+# - 업데이트는 8080 포트의 aiohttp 서버 WEBHOOK_PATH 경로로 받음
+# - WEBHOOK_SECRET이 없으면 기동할 때마다 임의 값을 만들어 텔레그램에 등록
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET") or secrets.token_urlsafe(32)
+
+# 동시에 처리할 업데이트 수 (같은 유저의 업데이트는 항상 하나씩 순서대로 처리)
+UPDATE_CONCURRENCY = _env_int("UPDATE_CONCURRENCY", "32")
+
+# /metrics (Prometheus) 접근 토큰. 비어 있으면 누구나 조회 가능
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# 프로파일링: 1이면 핸들러 / 스케줄 작업마다 wall·CPU 시간과 구간별(storage, keyboard, telegram) 시간을 기록하고
+# SLOW_HANDLER_MS(밀리초)를 넘은 처리를 로그로 남김. 샘플링 프로파일은 /debug/profile (METRICS_TOKEN으로 보호)
+PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "0") == "1"
+SLOW_HANDLER_MS = _env_float("SLOW_HANDLER_MS", "500")
@@ -0,0 +1,74 @@
+# utils/edits.py
+# 인라인 키보드 수정(edit_message_reply_markup) 병합기
+# - 체크 상태 변경은 콜백에서 즉시 반영하고, 키보드 수정 API만 메시지별로 모아서 보낸다
+# - 같은 메시지에는 EDIT_COALESCE_WINDOW 초에 최대 1번만 수정, 창 안의 연속 탭은 마지막 상태 1번으로 전송
+# - 마지막으로 보낸 키보드와 같으면 보내지 않음 ("message is not modified" 방지)
+import time
+import asyncio
+from collections import OrderedDict
+from telegram.error import BadRequest, RetryAfter
+from utils import config, log
+
+MAX_TRACKED = 1024  # 기억해 둘 메시지 수 (오래된 것부터 정리)
+
+_messages = OrderedDict()  # (chat_id, message_id) → 상태 dict
+stats = {"requested": 0, "sent": 0, "skipped": 0, "coalesced": 0, "not_modified": 0, "failed": 0}
+
+def _get_state(key, current):
+    state = _messages.get(key)
+    if state is None:
+        # 처음 보는 메시지는 현재 메시지에 붙어 있는 키보드를 마지막 전송분으로 간주
+        state = {"sent": current, "sent_at": 0.0, "build": None, "edit": None, "task": None}
+        _messages[key] = state
+        while len(_messages) > MAX_TRACKED:
+            old_key = next(iter(_messages))
+            if _messages[old_key]["task"] is not None:
+                break
+            del _messages[old_key]
+    else:
+        _messages.move_to_end(key)
+    return state
+
+async def request_edit(key, build_markup, edit, current=None):
+    # build_markup(): 전송 시점의 최신 키보드 생성 / edit(markup): 실제 API 호출 (awaitable)
+    stats["requested"] += 1
+    state = _get_state(key, current)
+    state["build"], state["edit"] = build_markup, edit
+    if state["task"] is not None:
+        stats["coalesced"] += 1  # 예약된 수정이 최신 상태로 보냄
+        return
+    wait = state["sent_at"] + config.EDIT_COALESCE_WINDOW - time.monotonic()
+    if wait <= 0:
+        await _send(state)
+    else:
+        state["task"] = asyncio.create_task(_send_later(state, wait))
+
+async def _send_later(state, wait):
+    await asyncio.sleep(wait)
+    state["task"] = None
+    await _send(state)
+
+async def _send(state):
+    markup = state["build"]()
+    if markup is None or markup == state["sent"]:
+        stats["skipped"] += 1
+        return
+    state["sent_at"] = time.monotonic()  # 전송 중 들어온 탭은 다음 창으로 미룸
+    try:
+        await state["edit"](markup)
+        state["sent"] = markup
+        stats["sent"] += 1
+    except RetryAfter as e:
+        # flood control: 지정된 시간 뒤 최신 상태로 다시 시도
+        if state["task"] is None:
+            state["task"] = asyncio.create_task(_send_later(state, e.retry_after))
+    except BadRequest as e:
+        if "not modified" in str(e).lower():
+            state["sent"] = markup
+            stats["not_modified"] += 1
+        else:
+            stats["failed"] += 1
+            log.warning("키보드 수정 실패", error=str(e))
+    except Exception as e:
+        stats["failed"] += 1
+        log.warning("키보드 수정 실패", error=repr(e))
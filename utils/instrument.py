@@ -0,0 +1,72 @@
+# utils/instrument.py
+# 등록된 텔레그램 핸들러 / 스케줄 작업을 감싸 지연 시간을 기록
+# - 핸들러: ConversationHandler 안쪽(entry_points / states / fallbacks)까지 모두 감싼다
+# - 결과는 utils.metrics의 히스토그램으로 (/metrics에서 조회)
+import time
+from functools import wraps
+from telegram.ext import CommandHandler, ConversationHandler, CallbackQueryHandler
+from utils import metrics, log
+
+def _label(handler):
+    if isinstance(handler, CommandHandler):
+        return "command", "/" + sorted(handler.commands)[0]
+    if isinstance(handler, CallbackQueryHandler):
+        return "callback", handler.callback.__name__
+    return "message", handler.callback.__name__
+
+def _iter_handlers(handlers):
+    for handler in handlers:
+        if isinstance(handler, ConversationHandler):
+            yield from _iter_handlers(handler.entry_points)
+            for state_handlers in handler.states.values():
+                yield from _iter_handlers(state_handlers)
+            yield from _iter_handlers(handler.fallbacks)
+        else:
+            yield handler
+
+def timed_handler(kind, name, fn):
+    @wraps(fn)
+    async def wrapper(update, context):
+        started = time.perf_counter()
+        failed = False
+        try:
+            return await fn(update, context)
+        except Exception:
+            failed = True
+            metrics.HANDLER_ERRORS.inc(kind=kind, handler=name)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.HANDLER_SECONDS.observe(elapsed, kind=kind, handler=name)
+            # 업데이트마다 한 줄 (유저/명령/소요 시간으로 검색). 실패는 항상, 성공은 샘플링해서 기록
+            user = getattr(update, "effective_user", None)
+            (log.warning if failed else log.info)(
+                "업데이트 처리", kind=kind, handler=name, user_id=user.id if user else None,
+                duration_ms=round(elapsed * 1000, 2), failed=failed, sampled=not failed,
+            )
+    return wrapper
+
+def wrap_handlers(app, wrap=timed_handler):
+    # wrap(kind, name, callback) → 새 callback. 같은 함수가 여러 핸들러에 쓰여도 각각 감싼다
+    count = 0
+    for group in app.handlers.values():
+        for handler in _iter_handlers(group):
+            kind, name = _label(handler)
+            handler.callback = wrap(kind, name, handler.callback)
+            count += 1
+    return count
+
+def timed_job(name, fn):
+    # 스케줄 작업(코루틴 함수)용
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        except Exception:
+            metrics.JOB_ERRORS.inc(job=name)
+            log.exception("스케줄러 작업 예외", job=name)
+            raise
+        finally:
+            metrics.JOB_SECONDS.observe(time.perf_counter() - started, job=name)
+    return wrapper
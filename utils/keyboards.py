@@ -0,0 +1,60 @@
+# utils/keyboards.py
+# 인라인 키보드 레이아웃 캐시
+# 게임/숙제 구성(버튼 문구, 콜백 데이터, 줄 배치)은 카탈로그 내용(fingerprint)과 기간 키가 같으면 모든 유저가 동일하고,
+# 유저마다 다른 것은 ✅/☐ 표시뿐이다. 그래서 레이아웃(템플릿)은 한 번만 만들고
+# 렌더링할 때는 유저의 체크 목록에 따라 미리 만들어 둔 두 버튼 중 하나를 고르기만 한다.
+# 채팅별 카탈로그(overlay)마다 템플릿이 생기므로 최근에 쓴 MAX_TEMPLATES개만 보관한다.
+from collections import OrderedDict
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+CHECKED = "✅"
+UNCHECKED = "☐"
+MAX_TEMPLATES = 256
+
+class Template:
+    # rows: 각 셀은 고정 버튼(InlineKeyboardButton) 또는 (entry, 체크된 버튼, 체크 안 된 버튼)
+    # date_keys: 이벤트 키보드에서 체크 목록을 조회해야 하는 date_key 목록
+    __slots__ = ("rows", "date_keys")
+
+    def __init__(self, rows, date_keys=()):
+        self.rows = rows
+        self.date_keys = tuple(date_keys)
+
+def toggle_cell(entry, label: str, callback_data: str):
+    return (
+        entry,
+        InlineKeyboardButton(f"{CHECKED} {label}", callback_data=callback_data),
+        InlineKeyboardButton(f"{UNCHECKED} {label}", callback_data=callback_data),
+    )
+
+_cache = OrderedDict()  # (kind, catalog_fingerprint, period_key) → Template
+stats = {"hits": 0, "misses": 0}
+
+def get_template(kind: str, fingerprint, period_key: str, build):
+    # 내용이 같은 카탈로그끼리는 scope가 달라도 같은 템플릿을 공유
+    key = (kind, fingerprint, period_key)
+    template = _cache.get(key)
+    if template is not None:
+        _cache.move_to_end(key)
+        stats["hits"] += 1
+        return template
+    stats["misses"] += 1
+    template = build()
+    _cache[key] = template
+    # 지난 기간 / 예전 카탈로그 템플릿은 더 이상 쓰이지 않으므로 오래된 것부터 정리
+    while len(_cache) > MAX_TEMPLATES:
+        _cache.popitem(last=False)
+    return template
+
+def clear():
+    _cache.clear()
+
+def render(template: Template, checks):
+    # checks: entry 집합 (template의 entry와 같은 형태)
+    return InlineKeyboardMarkup([
+        [
+            cell if isinstance(cell, InlineKeyboardButton) else (cell[1] if cell[0] in checks else cell[2])
+            for cell in row
+        ]
+        for row in template.rows
+    ])
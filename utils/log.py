@@ -0,0 +1,137 @@
+# utils/log.py
+# 구조화 로그 (JSON lines) + 큐 기반 비동기 기록
+# - 호출 쪽(이벤트 루프)은 레코드를 큐에 넣기만 하고, 직렬화와 stdout 쓰기는 백그라운드 스레드가 담당
+# - 큐가 가득 차면 기다리지 않고 버림 (dropped로 집계) → 로그 때문에 핸들러가 느려지지 않음
+# - 많이 찍히는 이벤트(업데이트 처리, 브로드캐스트 개별 실패 등)는 sampled=True로 LOG_SAMPLE_RATE 비율만 기록
+#   기록된 줄에는 sample_rate가 함께 남아 개수를 역산할 수 있음
+# - 필드는 키워드 인자로: log.info("체크 완료", user_id=1, handler="/daily", duration_ms=3.2)
+#
+# 설정 (config보다 먼저 import 되므로 환경변수를 직접 읽음)
+#   LOG_LEVEL=debug|info|warning|error (기본 info), LOG_FORMAT=json|text (기본 json)
+#   LOG_SAMPLE_RATE (기본 0.1), LOG_QUEUE_SIZE (기본 10000)
+import os
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+
+def _env_float(name, default):
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return float(default)
+
+LEVEL = getattr(logging, os.getenv("LOG_LEVEL", "info").upper(), logging.INFO)
+FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+SAMPLE_RATE = min(1.0, max(0.0, _env_float("LOG_SAMPLE_RATE", "0.1")))
+QUEUE_SIZE = int(_env_float("LOG_QUEUE_SIZE", "10000"))
+
+stats = {"queued": 0, "dropped": 0, "sampled_out": 0}
+
+_RESERVED = {"ts", "level", "logger", "msg", "exc"}
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.module if record.name == "dailyquest" else record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in getattr(record, "fields", {}).items():
+            entry[f"field_{key}" if key in _RESERVED else key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class TextFormatter(logging.Formatter):
+    # 로컬 개발용: 2025-04-15 08:00:00 INFO main: 메시지 key=value
+    def format(self, record):
+        logger = record.module if record.name == "dailyquest" else record.name
+        fields = " ".join(f"{k}={v}" for k, v in getattr(record, "fields", {}).items())
+        line = f"{datetime.fromtimestamp(record.created):%Y-%m-%d %H:%M:%S} {record.levelname} {logger}: {record.getMessage()}"
+        line = f"{line} {fields}" if fields else line
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+_traceback_formatter = logging.Formatter()
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # 포맷(JSON 직렬화)은 writer 스레드에서. 예외 트레이스백만 여기서 문자열로 고정
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+            stats["queued"] += 1
+        except queue.Full:
+            stats["dropped"] += 1
+
+_queue = queue.Queue(maxsize=QUEUE_SIZE)
+_logger = logging.getLogger("dailyquest")
+_listener = None
+
+def setup():
+    # import 시 한 번: 루트 로거(텔레그램, APScheduler, aiohttp 포함)를 모두 같은 큐로
+    global _listener
+    if _listener is not None:
+        return
+    writer = logging.StreamHandler(sys.stdout)
+    writer.setFormatter(JsonFormatter() if FORMAT == "json" else TextFormatter())
+    _listener = logging.handlers.QueueListener(_queue, writer, respect_handler_level=False)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.handlers[:] = [_NonBlockingQueueHandler(_queue)]
+    root.setLevel(max(LEVEL, logging.INFO))
+    _logger.setLevel(LEVEL)
+    # Bot API 요청마다 찍히는 httpx INFO 로그는 끔
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    atexit.register(shutdown)
+
+def shutdown():
+    # 남은 로그를 모두 쓰고 writer 스레드 종료
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def queue_depth():
+    return _queue.qsize()
+
+def _log(level, message, /, sampled=False, exc_info=False, **fields):
+    if not _logger.isEnabledFor(level):
+        return
+    if sampled and SAMPLE_RATE < 1.0:
+        if random.random() >= SAMPLE_RATE:
+            stats["sampled_out"] += 1
+            return
+        fields["sample_rate"] = SAMPLE_RATE
+    _logger.log(level, message, exc_info=exc_info, extra={"fields": fields}, stacklevel=3)
+
+def debug(message, /, **fields):
+    _log(logging.DEBUG, message, **fields)
+
+def info(message, /, **fields):
+    _log(logging.INFO, message, **fields)
+
+def warning(message, /, **fields):
+    _log(logging.WARNING, message, **fields)
+
+def error(message, /, **fields):
+    _log(logging.ERROR, message, **fields)
+
+def exception(message, /, **fields):
+    # except 블록 안에서: 스택 트레이스 포함
+    _log(logging.ERROR, message, exc_info=True, **fields)
+
+setup()
@@ -0,0 +1,170 @@
+# utils/metrics.py
+# Prometheus 텍스트 형식(/metrics)용 최소 구현 (외부 의존성 없음)
+# - Counter / Gauge / Histogram: 라벨 값 튜플별로 값을 보관
+# - collector(fn): 스크레이프 시점에 값을 읽어오는 함수 등록 (큐 길이, 대기 중인 쓰기 수 등)
+import time
+import inspect
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from utils import log
+
+# 초 단위 지연 시간 버킷 (텔레그램 API 왕복 ~ 수백 ms, 저장소 조회 ~ 수 µs)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_metrics = []
+_collectors = []
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + [f'{n}="{v}"' for n, v in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        _metrics.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(n, "") for n in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with _lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        with _lock:
+            self._values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]  # [버킷별 개수, 합계, 전체 개수]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with _lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, [("le", "+Inf")])
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+def timed(histogram: Histogram, **labels):
+    # 동기/비동기 함수 모두에 쓸 수 있는 지연 시간 측정 데코레이터
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with histogram.time(**labels):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def collector(fn):
+    # fn() → [(name, type, help, [(labels dict, value), ...]), ...] 를 스크레이프마다 호출
+    _collectors.append(fn)
+    return fn
+
+def render():
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for fn in _collectors:
+        try:
+            families = fn()
+        except Exception:
+            log.exception("metrics collector 실패")
+            continue
+        for name, kind, help_text, samples in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = _format_labels(labels.keys(), labels.values())
+                lines.append(f"{name}{label_text} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+# ---- 공용 지표 ----
+
+HANDLER_SECONDS = Histogram("dailyquest_handler_seconds", "Telegram handler latency", ("kind", "handler"))
+HANDLER_ERRORS = Counter("dailyquest_handler_errors_total", "Telegram handler exceptions", ("kind", "handler"))
+CALLBACK_SECONDS = Histogram("dailyquest_callback_seconds", "Inline button callback latency by action", ("action",))
+STORAGE_SECONDS = Histogram("dailyquest_storage_seconds", "Checklist storage operation latency", ("op",))
+BROADCAST_MESSAGES = Counter("dailyquest_broadcast_messages_total", "Broadcast messages by result", ("broadcast", "result"))
+BROADCAST_SECONDS = Histogram("dailyquest_broadcast_seconds", "Broadcast run duration", ("broadcast",),
+                              buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800))
+BROADCAST_RATE = Gauge("dailyquest_broadcast_rate", "Messages per second of the last broadcast run", ("broadcast",))
+JOB_SECONDS = Histogram("dailyquest_job_seconds", "Scheduler job duration", ("job",),
+                        buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 15, 60, 300, 1800))
+JOB_ERRORS = Counter("dailyquest_job_errors_total", "Scheduler job exceptions", ("job",))
+PROFILE_CPU_SECONDS = Counter("dailyquest_profile_cpu_seconds_total", "CPU time per handler/job (PROFILE_ENABLED)",
+                              ("kind", "handler"))
+PROFILE_PART_SECONDS = Counter("dailyquest_profile_part_seconds_total",
+                               "Time per handler/job spent in storage, keyboard and telegram (PROFILE_ENABLED)",
+                               ("kind", "handler", "part"))
+SLOW_HANDLERS = Counter("dailyquest_slow_handlers_total", "Handler/job runs over SLOW_HANDLER_MS (PROFILE_ENABLED)",
+                        ("kind", "handler"))
@@ -0,0 +1,64 @@
+# utils/migrate_sqlite.py
+# checklist.json / users.json → SQLite 1회성 이전
+# STORAGE_BACKEND=sqlite 로 처음 기동할 때 자동으로 실행되며, 수동 실행도 가능:
+#   python -m utils.migrate_sqlite          # 아직 이전하지 않았을 때만
+#   python -m utils.migrate_sqlite --force  # SQLite 내용을 JSON 기준으로 다시 채움
+import json
+import os
+import sys
+from datetime import datetime
+from utils import config, migrations, log
+from utils.backends import connect_sqlite, CHECKLIST_FIELDS
+
+MIGRATED_KEY = "migrated_from_json"
+
+def _read_tinydb_json(path: str):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return list(data.get("_default", {}).values())
+
+def _checklist_row(record):
+    task = record.get("task")
+    if isinstance(task, dict):
+        task = task.get("name", "UNKNOWN")
+    row = dict(record, task=task)
+    return tuple(row.get(field) for field in CHECKLIST_FIELDS)
+
+def migrate_json_to_sqlite(force: bool = False):
+    conn = connect_sqlite(config.SQLITE_PATH)
+    try:
+        done = conn.execute("SELECT value FROM meta WHERE key = ?", (MIGRATED_KEY,)).fetchone()
+        if done and not force:
+            return False
+
+        migrations.migrate_json_file("checklist", config.CHECKLIST_PATH)  # 옛 기록 형식(주간 키 등)부터 맞춤
+        checklist = [r for r in _read_tinydb_json(config.CHECKLIST_PATH) if "user_id" in r and "task" in r]
+        user_rows = [r for r in _read_tinydb_json(config.USERS_PATH) if "user_id" in r]
+
+        with conn:
+            if force:
+                conn.execute("DELETE FROM checklist")
+                conn.execute("DELETE FROM users")
+            conn.executemany(
+                "INSERT INTO checklist (user_id, period, date, game, event, task) VALUES (?, ?, ?, ?, ?, ?)",
+                [_checklist_row(r) for r in checklist],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO users (user_id, day_streak, last_day_complete, timezone, reset_hour) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(r["user_id"], r.get("day_streak", 0), r.get("last_day_complete"), r.get("timezone"), r.get("reset_hour"))
+                 for r in user_rows],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (MIGRATED_KEY, datetime.now().isoformat()),
+            )
+        log.info("✅ SQLite 이전 완료", checklist=len(checklist), users=len(user_rows), path=config.SQLITE_PATH)
+        return True
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    migrate_json_to_sqlite(force="--force" in sys.argv[1:])
@@ -0,0 +1,190 @@
+# utils/migrations.py
+# 데이터 파일 스키마 버전 관리
+# - JSON 파일: 옆에 '<파일>.version' 마커 파일로 현재 스키마 버전을 기록
+# - SQLite: PRAGMA user_version
+# 등록된 마이그레이션 중 마커보다 높은 버전만 순서대로 한 번 실행하고, 이후 기동에서는 건너뛴다.
+import os
+import json
+from datetime import timedelta
+from utils import log, periods
+
+_registry = {}  # target → [(version, fn), ...]
+
+def migration(target: str, version: int):
+    def register(fn):
+        _registry.setdefault(target, []).append((version, fn))
+        _registry[target].sort(key=lambda item: item[0])
+        return fn
+    return register
+
+def latest_version(target: str):
+    steps = _registry.get(target, [])
+    return steps[-1][0] if steps else 0
+
+def _marker_path(path: str):
+    return f"{path}.version"
+
+def get_version(path: str):
+    try:
+        with open(_marker_path(path), "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+def set_version(path: str, version: int):
+    tmp_path = f"{_marker_path(path)}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(str(version))
+    os.replace(tmp_path, _marker_path(path))
+
+def _atomic_dump(path: str, data, indent=None):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def migrate_json_file(target: str, path: str, indent=None):
+    # 밀린 마이그레이션을 실행하고 적용한 개수를 반환 (파일은 최대 한 번만 다시 씀)
+    current = get_version(path)
+    pending = [(v, fn) for v, fn in _registry.get(target, []) if v > current]
+    if not pending:
+        return 0
+
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        changed = False
+        for version, fn in pending:
+            changed = fn(data) or changed
+        if changed:
+            _atomic_dump(path, data, indent=indent)
+    set_version(path, pending[-1][0])
+    log.info("🔧 스키마 마이그레이션 완료", file=os.path.basename(path), from_version=current, to_version=pending[-1][0])
+    return len(pending)
+
+def migrate_sqlite(conn):
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    pending = [(v, fn) for v, fn in _registry.get("sqlite", []) if v > current]
+    for version, fn in pending:
+        with conn:
+            fn(conn)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+    return len(pending)
+
+# ---------------------------------------------------------------------------
+# quests.json
+# 마이그레이션 함수는 데이터를 제자리에서 고치고, 변경이 있었으면 True를 반환
+# ---------------------------------------------------------------------------
+
+@migration("quests", 1)
+def _quests_normalize_tasks(quests):
+    # 이벤트 숙제: 문자열 → {"name", "type": "once"}, type 누락 시 once
+    # daily 숙제: {"name": ...} → 이름 문자열
+    modified = False
+    for game, data in quests.items():
+        new_events = []
+        for evt in data.get("events", []):
+            evt_copy = evt.copy()
+            if isinstance(evt_copy.get("tasks"), list):
+                new_tasks = []
+                for task in evt_copy["tasks"]:
+                    if isinstance(task, str):
+                        new_tasks.append({"name": task, "type": "once"})
+                        modified = True
+                    elif isinstance(task, dict) and "name" in task:
+                        if "type" not in task:
+                            task["type"] = "once"
+                            modified = True
+                        new_tasks.append(task)
+                evt_copy["tasks"] = new_tasks
+            new_events.append(evt_copy)
+        data["events"] = new_events
+
+        new_daily = []
+        for task in data.get("daily", []):
+            if isinstance(task, str):
+                new_daily.append(task)
+            elif isinstance(task, dict) and "name" in task:
+                new_daily.append(task["name"])
+                modified = True
+        data["daily"] = new_daily
+    return modified
+
+# ---------------------------------------------------------------------------
+# checklist.json (TinyDB)
+# ---------------------------------------------------------------------------
+
+@migration("checklist", 1)
+def _checklist_task_name(tables):
+    # task 필드가 {"name": ...} 로 저장된 옛 기록 → 이름 문자열
+    modified = False
+    for table in tables.values():
+        for record in table.values():
+            task = record.get("task")
+            if isinstance(task, dict) and "name" in task:
+                record["task"] = task["name"]
+                modified = True
+    return modified
+
+def _legacy_week_key(day):
+    # 예전 주간 키: '월-W<그 달의 몇째 주>' (예: 10-W3)
+    return f"{day:%m}-W{periods.get_week_of_month(day)}"
+
+@migration("checklist", 2)
+def _checklist_iso_week_keys(tables):
+    # 주간 키 형식 변경: 'MM-W<n>' → ISO 주차 'YYYY-Www' (periods.get_week_key)
+    # 이번 ISO 주(월요일 ~ 오늘)에 찍힌 옛 키의 기록은 이번 주 키로 옮겨서 배포 시점에 진행 중인 주간 체크를 유지
+    # 그보다 앞선 주의 기록은 그대로 두면 지난 주로 취급되어 purge_old_checks가 정리
+    today = periods.get_game_date()
+    monday = today - timedelta(days=today.weekday())
+    current = {_legacy_week_key(monday + timedelta(days=i)) for i in range((today - monday).days + 1)}
+    week_key = periods.get_week_key()
+    modified = False
+    for table in tables.values():
+        for record in table.values():
+            if record.get("period") == "weekly" and record.get("date") in current:
+                record["date"] = week_key
+                modified = True
+    return modified
+
+# ---------------------------------------------------------------------------
+# SQLite (dailyquest.db)
+# ---------------------------------------------------------------------------
+
+@migration("sqlite", 1)
+def _sqlite_initial_schema(conn):
+    conn.executescript("""
+    CREATE TABLE IF NOT EXISTS checklist (
+        id      INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        period  TEXT NOT NULL,
+        date    TEXT,
+        game    TEXT NOT NULL,
+        event   TEXT,
+        task    TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_checklist_lookup ON checklist (user_id, period, date, game, task);
+    CREATE INDEX IF NOT EXISTS idx_checklist_user ON checklist (user_id);
+
+    CREATE TABLE IF NOT EXISTS users (
+        user_id           INTEGER PRIMARY KEY,
+        day_streak        INTEGER NOT NULL DEFAULT 0,
+        last_day_complete TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS meta (
+        key   TEXT PRIMARY KEY,
+        value TEXT
+    );
+    """)
+
+@migration("sqlite", 2)
+def _sqlite_user_clock(conn):
+    # 유저별 시간대 / 초기화 시각 (NULL이면 RESET_TIMEZONE / RESET_HOUR)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(users)")}
+    if "timezone" not in columns:
+        conn.execute("ALTER TABLE users ADD COLUMN timezone TEXT")
+    if "reset_hour" not in columns:
+        conn.execute("ALTER TABLE users ADD COLUMN reset_hour INTEGER")
@@ -0,0 +1,173 @@
+# utils/overlays.py
+# 채팅별 숙제 카탈로그 = 공유 기본 카탈로그(quests.json) + 채팅별 변경분(overlay)
+# - scope: 채팅 id (개인 채팅은 유저 id와 같음). 수정하지 않은 채팅은 기본 Catalog 객체를 그대로 공유
+# - overlay는 수정한 게임만 통째로 복사해서 보관 (copy-on-write)
+#   {scope: {게임명: 게임 dict | None}}  None = 이 채팅에서 지웠거나 이름을 바꾼 기본 게임
+# - 저장할 때 기본과 같아진 게임은 overlay에서 빠짐 → 메모리/저장 크기는 유저 수가 아니라 수정한 양에 비례
+# - 실제 카탈로그는 scope별 LRU 캐시 (기본 카탈로그나 해당 overlay가 바뀌면 다시 컴파일)
+# 조회 결과(quests/catalog)는 읽기 전용. 수정은 edit_game / remove_game / rename_game 후 save(scope)
+# scope 자리에 BASE를 주면 공유 기본 카탈로그 자체를 수정 (관리자 /basemode, 저장은 main.save_quests)
+import os
+import copy
+from collections import OrderedDict
+from utils import config, log
+from utils.catalog import compile_catalog
+from utils.quests import QuestRepository
+
+OVERLAYS_PATH = os.path.join(config.DATA_DIR, "overlays.json")
+BASE = None  # 기본 카탈로그 scope
+
+REPO = QuestRepository(OVERLAYS_PATH, indent=None)  # 지연 + 원자적 저장 (quests.json과 같은 방식)
+_overlays = REPO.data      # str(scope) → {게임명: dict | None}
+_versions = {}             # str(scope) → overlay 저장 횟수 (캐시 키)
+_base_quests = {}
+_base_catalog = compile_catalog({})
+_base_version = 0
+_cache = OrderedDict()     # str(scope) → ((기본 버전, overlay 버전), quests, Catalog)
+stats = {"shared": 0, "hits": 0, "misses": 0, "evictions": 0}
+
+def load():
+    global _overlays
+    if not os.path.exists(OVERLAYS_PATH):
+        _overlays = REPO.reset()
+    else:
+        try:
+            _overlays = REPO.load()
+        except Exception:
+            log.exception("❌ overlays.json 로드 실패")
+            _overlays = REPO.reset()
+    _versions.clear()
+    _cache.clear()
+    log.info("✅ overlays.json 로드", scopes=len(_overlays))
+
+def flush():
+    return REPO.flush()
+
+def set_base(quests: dict, catalog):
+    # 기본 카탈로그가 바뀔 때마다 호출 (main._rebuild_catalog) → 모든 scope 캐시 무효화
+    global _base_quests, _base_catalog, _base_version
+    _base_quests, _base_catalog = quests, catalog
+    _base_version += 1
+    _cache.clear()
+
+def scopes():
+    return [int(key) for key in _overlays]
+
+def own_games(scope):
+    # 이 scope가 복사해서 가지고 있는 게임들 (수정 가능, 바꾼 뒤에는 save(scope))
+    return {name: data for name, data in _overlays.get(str(scope), {}).items() if data is not None}
+
+def _merge(overlay):
+    # 기본 순서를 유지하면서 덮어쓴 게임은 그 자리에, 새 게임은 뒤에
+    merged = {}
+    for name, data in _base_quests.items():
+        if name not in overlay:
+            merged[name] = data
+        elif overlay[name] is not None:
+            merged[name] = overlay[name]
+    for name, data in overlay.items():
+        if name not in _base_quests and data is not None:
+            merged[name] = data
+    return merged
+
+def _lookup(scope):
+    if not _overlays:  # 아무도 수정하지 않았으면 모두 기본 카탈로그
+        stats["shared"] += 1
+        return None
+    key = str(scope)
+    overlay = _overlays.get(key)
+    if not overlay:
+        stats["shared"] += 1
+        return None
+    version = (_base_version, _versions.get(key, 0))
+    entry = _cache.get(key)
+    if entry is not None and entry[0] == version:
+        _cache.move_to_end(key)
+        stats["hits"] += 1
+        return entry
+    stats["misses"] += 1
+    quests = _merge(overlay)
+    entry = (version, quests, compile_catalog(quests, f"{_base_catalog.version}:{key}:{version[1]}"))
+    _cache[key] = entry
+    _cache.move_to_end(key)
+    while len(_cache) > config.CATALOG_CACHE_SIZE:
+        _cache.popitem(last=False)
+        stats["evictions"] += 1
+    return entry
+
+def quests(scope):
+    entry = _lookup(scope)
+    return _base_quests if entry is None else entry[1]
+
+def catalog(scope):
+    entry = _lookup(scope)
+    return _base_catalog if entry is None else entry[2]
+
+def edit_game(scope, game: str):
+    # 이 scope 전용으로 수정할 게임 dict (처음 수정할 때 기본 게임을 복사). 없는 게임이면 None
+    if scope is BASE:
+        return _base_quests.get(game)
+    overlay = _overlays.get(str(scope), {})
+    if game in overlay:
+        return overlay[game]
+    if game not in _base_quests:
+        return None
+    data = copy.deepcopy(_base_quests[game])
+    _overlays.setdefault(str(scope), {})[game] = data
+    return data
+
+def remove_game(scope, game: str):
+    if scope is BASE:
+        _base_quests.pop(game, None)
+        return
+    overlay = _overlays.setdefault(str(scope), {})
+    if game in _base_quests:
+        overlay[game] = None
+    else:
+        overlay.pop(game, None)
+
+def rename_game(scope, old: str, new: str):
+    if scope is BASE:
+        if old not in _base_quests:
+            return False
+        _base_quests[new] = _base_quests.pop(old)
+        return True
+    data = edit_game(scope, old)
+    if data is None:
+        return False
+    remove_game(scope, old)
+    _overlays.setdefault(str(scope), {})[new] = data
+    return True
+
+def replace(scope, quests: dict):
+    # /importquests: 이 scope의 카탈로그를 통째로 교체 (기본과 다른 게임만 overlay로 남음, 저장은 호출하는 쪽에서)
+    if scope is BASE:
+        _base_quests.clear()
+        _base_quests.update(quests)
+        return
+    overlay = {name: None for name in _base_quests if name not in quests}
+    overlay.update(copy.deepcopy(quests))
+    _overlays[str(scope)] = overlay
+
+def save(scope):
+    # 기본과 같아진 항목을 정리하고 캐시 무효화 + 파일 저장 예약
+    key = str(scope)
+    overlay = _overlays.get(key)
+    if overlay is not None:
+        for name in list(overlay):
+            data = overlay[name]
+            if (name in _base_quests and data == _base_quests[name]) or (data is None and name not in _base_quests):
+                del overlay[name]
+        if not overlay:
+            del _overlays[key]
+    _versions[key] = _versions.get(key, 0) + 1
+    _cache.pop(key, None)
+    REPO.save()
+
+def get_stats():
+    return {
+        "scopes": len(_overlays),
+        "games": sum(len(overlay) for overlay in _overlays.values()),
+        "cached": len(_cache),
+        **stats,
+    }
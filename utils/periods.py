@@ -0,0 +1,67 @@
+# utils/periods.py
+# 체크 기록의 파티션 키(일일/주간) 계산
+# 하루는 유저의 시간대 기준 초기화 시각(reset_hour)에 바뀌고, 한 주는 월요일 같은 시각에 바뀐다.
+# 설정하지 않은 유저는 RESET_TIMEZONE / RESET_HOUR (DEFAULT_CLOCK).
+# 키가 바뀌면 그 자체로 초기화된 것으로 취급하므로 초기화 작업이 늦거나 빠져도 조회 결과는 정확하다.
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import cached_property
+from pytz import timezone
+from utils import config
+
+@dataclass(frozen=True)
+class Clock:
+    # 날짜가 바뀌는 기준 (같은 Clock을 쓰는 유저는 같은 순간에 초기화됨)
+    timezone: str
+    reset_hour: int
+
+    @cached_property
+    def tz(self):
+        return timezone(self.timezone)
+
+DEFAULT_CLOCK = Clock(config.RESET_TIMEZONE, config.RESET_HOUR)
+RESET_TZ = DEFAULT_CLOCK.tz
+
+_clocks = {}  # user_id → Clock (기본값과 다른 유저만, users.init()에서 채움)
+
+def set_clock(user_id: int, clock: Clock):
+    if clock == DEFAULT_CLOCK:
+        _clocks.pop(user_id, None)
+    else:
+        _clocks[user_id] = clock
+
+def clock_for(user_id=None):
+    return DEFAULT_CLOCK if user_id is None else _clocks.get(user_id, DEFAULT_CLOCK)
+
+def custom_clocks():
+    # user_id → Clock (기본값이 아닌 유저만)
+    return dict(_clocks)
+
+def clocks():
+    # 지금 쓰이는 모든 Clock (기본값 포함)
+    return {DEFAULT_CLOCK, *_clocks.values()}
+
+def get_game_date(now=None, user_id=None, clock=None):
+    # 초기화 시각을 기준으로 한 '게임 날짜' (05시 이전은 전날로 취급)
+    clock = clock or clock_for(user_id)
+    now = now or datetime.now(clock.tz)
+    return (now.astimezone(clock.tz) - timedelta(hours=clock.reset_hour)).date()
+
+def get_today(now=None, user_id=None, clock=None):
+    return get_game_date(now, user_id, clock).strftime("%Y-%m-%d")
+
+def get_week_of_month(date):
+    first_day = date.replace(day=1)
+    adjusted_dom = date.day + first_day.weekday()
+    return int(adjusted_dom / 7) + 1
+
+def get_week_key(now=None, user_id=None, clock=None):
+    # ISO 주차 (월요일 시작): 예) 2025-W16
+    return get_game_date(now, user_id, clock).strftime("%G-W%V")
+
+def get_period_key(period, now=None, user_id=None, clock=None):
+    return get_today(now, user_id, clock) if period == "daily" else get_week_key(now, user_id, clock)
+
+def earliest_game_date(now=None):
+    # 가장 늦게 날짜가 바뀌는 유저 기준 오늘 (이벤트 만료처럼 모든 유저에게 공통인 판단용)
+    return min(get_game_date(now, clock=clock) for clock in clocks())
@@ -0,0 +1,199 @@
+# utils/profiling.py
+# 선택형 프로파일링 (PROFILE_ENABLED=1일 때만 동작, 꺼져 있으면 데코레이터가 원래 함수를 그대로 반환)
+# - 핸들러 / 스케줄 작업 1회마다 wall 시간과 CPU 시간을 기록
+# - 처리 중 구간별 시간: storage(체크/유저 저장소), keyboard(키보드 생성), telegram(Bot API 요청)
+#   구간이 중첩되면 안쪽 구간 시간은 바깥 구간에서 빼서 겹치지 않게 센다
+# - SLOW_HANDLER_MS를 넘은 처리는 구간별 내역과 함께 로그로 남김
+# - sample(): 이벤트 루프 스레드의 스택을 주기적으로 찍는 샘플링 프로파일 (/debug/profile)
+import os
+import sys
+import time
+import inspect
+import threading
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from telegram.request import HTTPXRequest
+from utils import config, metrics, log
+
+ENABLED = config.PROFILE_ENABLED
+PARTS = ("storage", "keyboard", "telegram")
+
+# 지금 처리 중인 핸들러 / 작업의 구간 기록 (업데이트마다 별도 태스크라 contextvar로 분리됨)
+_current = contextvars.ContextVar("profile_trace", default=None)
+
+_lock = threading.Lock()
+_stats = {}  # (kind, name) → {"count", "wall", "cpu", "max", "slow", "parts": {part: 초}}
+_sampling = threading.Lock()
+
+class Trace:
+    __slots__ = ("parts", "calls", "stack")
+
+    def __init__(self):
+        self.parts = {}
+        self.calls = {}
+        self.stack = []
+
+@contextmanager
+def span(part):
+    trace = _current.get()
+    if trace is None or part in trace.stack:
+        # 추적 중이 아니거나 같은 구간 안의 중첩 호출 (예: toggle_check → add_check → _insert)
+        yield
+        return
+    trace.stack.append(part)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        trace.stack.pop()
+        trace.parts[part] = trace.parts.get(part, 0.0) + elapsed
+        trace.calls[part] = trace.calls.get(part, 0) + 1
+        if trace.stack:
+            parent = trace.stack[-1]
+            trace.parts[parent] = trace.parts.get(parent, 0.0) - elapsed
+
+def traced(part):
+    # 구간 표시 데코레이터. 프로파일링이 꺼져 있으면 아무것도 감싸지 않음
+    def decorator(fn):
+        if not ENABLED:
+            return fn
+        if inspect.iscoroutinefunction(fn):
+            @wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(part):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(part):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class TracedRequest(HTTPXRequest):
+    # Bot API 요청 시간을 telegram 구간으로 기록
+    async def do_request(self, *args, **kwargs):
+        with span("telegram"):
+            return await super().do_request(*args, **kwargs)
+
+def _format_ms(seconds):
+    return f"{seconds * 1000:.0f}ms"
+
+def _finish(kind, name, trace, wall, cpu, user_id=None):
+    with _lock:
+        entry = _stats.setdefault((kind, name), {"count": 0, "wall": 0.0, "cpu": 0.0, "max": 0.0, "slow": 0, "parts": {}})
+        entry["count"] += 1
+        entry["wall"] += wall
+        entry["cpu"] += cpu
+        entry["max"] = max(entry["max"], wall)
+        for part, seconds in trace.parts.items():
+            entry["parts"][part] = entry["parts"].get(part, 0.0) + seconds
+    metrics.PROFILE_CPU_SECONDS.inc(cpu, kind=kind, handler=name)
+    for part, seconds in trace.parts.items():
+        metrics.PROFILE_PART_SECONDS.inc(seconds, kind=kind, handler=name, part=part)
+
+    if wall * 1000 < config.SLOW_HANDLER_MS:
+        return
+    with _lock:
+        entry["slow"] += 1
+    metrics.SLOW_HANDLERS.inc(kind=kind, handler=name)
+    breakdown = {}
+    for part in PARTS:
+        if part in trace.parts:
+            breakdown[f"{part}_ms"] = round(trace.parts[part] * 1000, 1)
+            breakdown[f"{part}_calls"] = trace.calls[part]
+    other = wall - sum(trace.parts.values())
+    log.warning("🐢 느린 처리", kind=kind, handler=name, user_id=user_id, duration_ms=round(wall * 1000, 1),
+                cpu_ms=round(cpu * 1000, 1), other_ms=round(other * 1000, 1), **breakdown)
+
+def profiled_handler(kind, name, fn):
+    # instrument.wrap_handlers(app, wrap=profiled_handler) 용
+    # CPU 시간은 이 스레드 기준이라, await 중에 다른 업데이트가 쓴 CPU도 포함될 수 있음 (상한값)
+    @wraps(fn)
+    async def wrapper(update, context):
+        trace = Trace()
+        token = _current.set(trace)
+        started, cpu_started = time.perf_counter(), time.thread_time()
+        try:
+            return await fn(update, context)
+        finally:
+            _current.reset(token)
+            user = getattr(update, "effective_user", None)
+            _finish(kind, name, trace, time.perf_counter() - started, time.thread_time() - cpu_started,
+                    user.id if user else None)
+    return wrapper
+
+def profiled_job(name, fn):
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        trace = Trace()
+        token = _current.set(trace)
+        started, cpu_started = time.perf_counter(), time.thread_time()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+            _finish("job", name, trace, time.perf_counter() - started, time.thread_time() - cpu_started)
+    return wrapper
+
+def summary():
+    # 핸들러 / 작업별 누적 통계 (평균 wall 시간이 긴 순서)
+    with _lock:
+        items = [(key, dict(entry, parts=dict(entry["parts"]))) for key, entry in _stats.items()]
+    items.sort(key=lambda item: -item[1]["wall"] / item[1]["count"])
+    lines = [f"{'kind':<9}{'name':<28}{'count':>8}{'avg':>10}{'max':>10}{'cpu avg':>10}{'slow':>6}  parts(avg)"]
+    for (kind, name), entry in items:
+        count = entry["count"]
+        parts = ", ".join(f"{part} {_format_ms(entry['parts'][part] / count)}" for part in PARTS if part in entry["parts"])
+        lines.append(f"{kind:<9}{name:<28}{count:>8}{_format_ms(entry['wall'] / count):>10}"
+                     f"{_format_ms(entry['max']):>10}{_format_ms(entry['cpu'] / count):>10}{entry['slow']:>6}  {parts}")
+    return "\n".join(lines) + "\n"
+
+# ---- 샘플링 프로파일 ----
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+def sample(seconds, thread_id, interval=0.005):
+    # thread_id 스레드의 스택을 interval마다 기록 → Counter({"root;...;leaf": 샘플 수})
+    # 한 번에 하나만 실행 (이미 실행 중이면 None)
+    if not _sampling.acquire(blocking=False):
+        return None
+    try:
+        stacks = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                stacks[";".join(reversed(labels))] += 1
+            time.sleep(interval)
+        return stacks
+    finally:
+        _sampling.release()
+
+def format_collapsed(stacks):
+    # flamegraph.pl / speedscope에서 바로 읽는 collapsed 형식
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+def format_top(stacks, limit=30):
+    # 함수별 self(가장 안쪽) / total(스택에 포함) 샘플 비율
+    total = sum(stacks.values()) or 1
+    self_counts, total_counts = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_counts[frames[-1]] += count
+        for label in set(frames):
+            total_counts[label] += count
+    lines = [f"samples {total}", f"{'self%':>7}{'total%':>8}  function"]
+    for label, count in self_counts.most_common(limit):
+        lines.append(f"{count / total * 100:>6.1f}%{total_counts[label] / total * 100:>7.1f}%  {label}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,90 @@
+# utils/progress.py
+# 유저별 오늘 daily 숙제 완료 카운터
+# - 체크/해제/일괄 완료 때마다 storage 리스너로 +1/-1 → /done 판정은 O(1)
+# - 완료 기준은 유저 본인(개인 채팅)의 카탈로그 (overlays.catalog(user_id), 수정 안 했으면 기본 카탈로그)
+# - '오늘'은 유저마다 다름 (유저 시간대 / 초기화 시각 기준). 카운터는 (날짜, 개수)로 두고 날짜가 지난 값은 0으로 취급
+# - 남은 숙제가 0이 되는 순간 streak를 자동 갱신 (users.update_day_complete)
+# - 카탈로그가 바뀌면(숙제 추가/삭제) 오늘 파티션에서 다시 센다 (기본 카탈로그 → 전체, overlay → 해당 유저만)
+# - 어제 완료하지 못한 유저의 streak는 날짜가 바뀐 유저 묶음마다 on_rollover()에서 일괄 초기화
+from utils import storage, users, overlays, periods
+
+_done = {}               # user_id → (date_key, 완료한 required 항목 수)
+stats = {"auto_completed": 0, "recounts": 0, "streaks_reset": 0}
+
+def _required(user_id):
+    # 오늘 완료해야 하는 (game, task)
+    return overlays.catalog(user_id).daily_entries
+
+def _count(user_id, today):
+    day, count = _done.get(user_id, (None, 0))
+    return count if day == today else 0
+
+def _recount(user_id=None):
+    if user_id is not None:
+        today = periods.get_today(user_id=user_id)
+        _done.pop(user_id, None)
+        partitions = [(today, [(user_id, storage.get_user_checks(user_id, "daily", today))])]
+    else:
+        # 시간대별 '오늘' 파티션을 모두 훑되, 그 날짜가 실제로 오늘인 유저만 센다
+        _done.clear()
+        todays = {periods.get_today(clock=clock) for clock in periods.clocks()}
+        partitions = [(today, storage.iter_partition("daily", today)) for today in todays]
+    for today, partition in partitions:
+        for uid, checks in partition:
+            if user_id is None and periods.get_today(user_id=uid) != today:
+                continue
+            count = len(_required(uid) & checks)
+            if count:
+                _done[uid] = (today, count)
+    stats["recounts"] += 1
+
+def recount(user_id=None):
+    # 카탈로그 / 유저 시간대가 바뀔 때마다 호출: 오늘 카운터를 재계산 (user_id가 있으면 그 유저만)
+    _recount(user_id)
+
+def total(user_id: int):
+    return len(_required(user_id))
+
+def remaining(user_id: int):
+    return len(_required(user_id)) - _count(user_id, periods.get_today(user_id=user_id))
+
+def is_day_complete(user_id: int, catalog=None):
+    # catalog: 그룹 채팅처럼 본인 카탈로그가 아닌 기준으로 판정할 때 (카운터 대신 체크 목록과 직접 비교)
+    if catalog is None or catalog is overlays.catalog(user_id):
+        return remaining(user_id) == 0
+    return catalog.daily_entries <= storage.get_user_checks(user_id, "daily")
+
+def _on_check_change(user_id, period, date_key, entry, delta):
+    if period != "daily":
+        return
+    required = _required(user_id)
+    if entry not in required:
+        return
+    today = periods.get_today(user_id=user_id)
+    if date_key != today:
+        return
+    count = _count(user_id, today) + delta
+    if count > 0:
+        _done[user_id] = (today, count)
+    else:
+        _done.pop(user_id, None)
+    if delta > 0 and count == len(required):
+        users.update_day_complete(user_id, today)  # 이미 오늘 갱신했으면 그대로
+        stats["auto_completed"] += 1
+
+def on_rollover(clock=None, user_ids=None):
+    # clock의 날짜가 바뀐 직후 한 번: 그 유저 묶음의 지난 카운터를 비우고 놓친 streak를 일괄 초기화
+    # 인자 없이 부르면 (기동 시) 모든 묶음을 처리 → 꺼져 있는 동안 지나간 초기화 반영
+    if clock is None:
+        return sum(on_rollover(clock, ids) for clock, ids in users.users_by_clock().items() if ids)
+    today = periods.get_today(clock=clock)
+    for user_id in user_ids:
+        entry = _done.get(user_id)
+        if entry is not None and entry[0] != today:
+            del _done[user_id]
+    reset = users.reset_missed_streaks(today, user_ids)
+    stats["streaks_reset"] += reset
+    return reset
+
+def init():
+    storage.add_listener(_on_check_change)
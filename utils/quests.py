@@ -0,0 +1,154 @@
+# utils/quests.py
+# quests.json 저장소 (QuestRepository)
+# - 핸들러는 메모리의 dict만 고치고 save()만 호출 → 디스크 기록은 전용 스레드가 담당
+# - 짧은 시간(QUESTS_SAVE_DELAY) 안의 연속 수정은 마지막 상태 1번으로 합쳐서 기록
+# - 임시 파일에 쓰고 fsync 후 rename → 기록 도중 죽어도 기존 파일은 온전함
+# - version: 저장할 때마다 증가 (카탈로그 / 키보드 캐시 키)
+import os
+import copy
+import json
+import atexit
+import tempfile
+import threading
+import time
+from utils import config, log
+
+def atomic_write_json(path, data, indent=None):
+    # 같은 디렉터리의 임시 파일 → fsync → os.replace (같은 파일시스템이라 원자적)
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    try:
+        # rename 자체도 디스크에 남도록 디렉터리 fsync (지원하지 않는 환경은 무시)
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    except OSError:
+        pass
+
+class QuestRepository:
+    def __init__(self, path, delay=None, indent=2):
+        self.path = path
+        self.delay = config.QUESTS_SAVE_DELAY if delay is None else delay
+        self.indent = indent
+        self.data = {}
+        self.version = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = None       # (version, snapshot) 아직 디스크에 안 쓴 최신 상태
+        self._last_change = 0.0
+        self._written_version = 0
+        self._stats = {"saves": 0, "writes": 0, "failures": 0}
+        self._thread = None
+
+    def load(self):
+        # 파일을 읽어 data를 교체 (복구/마이그레이션은 호출하는 쪽에서 먼저 수행)
+        self.flush()
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("quests.json이 딕셔너리 형태가 아닙니다.")
+        with self._lock:
+            self.data = data
+            self.version += 1
+            self._written_version = self.version
+        return data
+
+    def reset(self, data=None):
+        # 읽기 실패 시 빈 상태로 시작 (파일은 건드리지 않음)
+        with self._lock:
+            self.data = {} if data is None else data
+            self.version += 1
+        return self.data
+
+    def save(self):
+        # 현재 data의 스냅샷만 떠두고 바로 반환 (파일 I/O 없음)
+        snapshot = copy.deepcopy(self.data)
+        with self._lock:
+            self.version += 1
+            self._pending = (self.version, snapshot)
+            self._last_change = time.monotonic()
+            self._stats["saves"] += 1
+        self._ensure_writer()
+        if self.delay <= 0:
+            self.flush()
+        else:
+            self._wakeup.set()
+        return self.version
+
+    def flush(self):
+        # 대기 중인 최신 스냅샷을 지금 기록. 기록했으면 True
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is None:
+            return False
+        version, snapshot = pending
+        try:
+            atomic_write_json(self.path, snapshot, indent=self.indent)
+        except Exception:
+            with self._lock:
+                self._stats["failures"] += 1
+                if self._pending is None:  # 그 사이 더 새 저장이 없으면 다음 기회에 재시도
+                    self._pending = pending
+            raise
+        with self._lock:
+            self._written_version = max(self._written_version, version)
+            self._stats["writes"] += 1
+        return True
+
+    def get_write_stats(self):
+        # coalesced: 다른 저장과 합쳐져 파일 기록을 생략한 횟수
+        with self._lock:
+            pending = 1 if self._pending else 0
+            return {
+                "version": self.version,
+                "written_version": self._written_version,
+                "saves": self._stats["saves"],
+                "writes": self._stats["writes"],
+                "coalesced": self._stats["saves"] - self._stats["writes"] - pending,
+                "failures": self._stats["failures"],
+                "pending": pending,
+            }
+
+    def _ensure_writer(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._writer_loop, name="quests-writer", daemon=True)
+            self._thread.start()
+        atexit.register(self._flush_quietly)
+
+    def _writer_loop(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            # 마지막 수정 후 delay 동안 추가 수정이 없을 때까지 기다렸다가 한 번에 기록
+            while True:
+                with self._lock:
+                    remaining = self._last_change + self.delay - time.monotonic()
+                if remaining <= 0:
+                    break
+                time.sleep(remaining)
+            self._flush_quietly()
+
+    def _flush_quietly(self):
+        try:
+            self.flush()
+        except Exception:
+            log.exception("quests.json 저장 실패")
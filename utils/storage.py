@@ -1,27 +1,142 @@
-# utils/storage.py
-from tinydb import TinyDB, Query
-from datetime import datetime
-from utils.backup import load_or_restore_db
-import os
-
-CHECKLIST_PATH = "/data/checklist.json"
-
-# checklist.json 복원 또는 새로 로드
-db = TinyDB("/data/checklist.json")
-User = Query()
-modified = False
-
-for record in db:
-    task = record.get("task")
-    if isinstance(task, dict) and "name" in task:
-        record["task"] = task["name"]
-        db.update({"task": record["task"]}, doc_ids=[record.doc_id])
-        modified = True
-
-if modified:
-    print("✅ checklist.json 내부 task 필드 정규화 완료")
-else:
-    print("✅ checklist.json은 이미 정규화되어 있음")
+from utils import config, metrics, profiling, log
+from utils.periods import get_today, get_week_key, get_period_key, clocks
+from utils.backends import open_checklist_backend
+import atexit
+import threading
+
+CHECKLIST_PATH = config.CHECKLIST_PATH
+
+# 인덱스/백엔드 변경과 지연 쓰기 flush를 직렬화하는 락
+_lock = threading.RLock()
+_flush_lock = threading.Lock()
+_wakeup = threading.Event()
+_write_stats = {"flushes": 0, "flushed": 0}
+
+# checklist 백엔드 (STORAGE_BACKEND=tinydb | sqlite | journal)
+# import 시에는 디스크를 건드리지 않고, 기동 시 init()에서 열고 인덱스를 구축한다.
+backend = None
+
+# 체크 여부 조회용 인메모리 인덱스 (기간 키별 파티션)
+# (period, date_key) → {user_id: {(game, task) 또는 (game, event, task): [record_id, ...]}}
+# 로드 시 한 번만 구축하고, 이후에는 insert/remove 때마다 함께 갱신한다.
+# 일일/주간 초기화는 '현재 파티션 키가 바뀌는 것'으로 끝나며,
+# 지난 파티션은 purge_stale_partitions()가 백그라운드에서 통째로 정리한다.
+_partitions = {}
+
+# 체크 추가/해제 알림 (progress의 완료 카운터 등): fn(user_id, period, date_key, entry, delta)
+_listeners = []
+
+def add_listener(fn):
+    _listeners.append(fn)
+
+def _notify(changes):
+    # 락 밖에서 호출 (리스너가 다른 저장소를 건드려도 checklist 락을 잡고 있지 않도록)
+    for change in changes:
+        for fn in _listeners:
+            try:
+                fn(*change)
+            except Exception:
+                log.exception("checklist 리스너 오류", listener=getattr(fn, "__name__", repr(fn)))
+
+def _partition_key(record):
+    return (record.get("period"), record.get("date"))
+
+def _index_entry(record):
+    if record.get("period") == "event":
+        return (record.get("game"), record.get("event"), record.get("task"))
+    return (record.get("game"), record.get("task"))
+
+def _index_add(record, record_id):
+    # 새로 체크된 항목이면 True (같은 항목의 중복 기록이면 False)
+    partition = _partitions.setdefault(_partition_key(record), {})
+    bucket = partition.setdefault(record.get("user_id"), {})
+    ids = bucket.setdefault(_index_entry(record), [])
+    ids.append(record_id)
+    return len(ids) == 1
+
+def _change(record, delta):
+    return (record.get("user_id"), record.get("period"), record.get("date"), _index_entry(record), delta)
+
+def _index_pop(user_id, period, date_key, entry):
+    partition = _partitions.get((period, date_key))
+    bucket = partition.get(user_id) if partition else None
+    if not bucket:
+        return []
+    record_ids = bucket.pop(entry, [])
+    if not bucket:
+        del partition[user_id]
+    return record_ids
+
+def _user_bucket(user_id, period, date_key):
+    partition = _partitions.get((period, date_key))
+    if not partition:
+        return None
+    return partition.get(user_id)
+
+def build_index():
+    with _lock:
+        _partitions.clear()
+        records = backend.load()
+        for record_id, record in records:
+            _index_add(record, record_id)
+    log.info("✅ checklist 인덱스 구축 완료", records=len(records), partitions=len(_partitions), backend=config.STORAGE_BACKEND)
+
+@profiling.traced("storage")
+@metrics.timed(metrics.STORAGE_SECONDS, op="flush")
+def flush():
+    # 쌓인 변경분을 디스크에 반영하고 반영된 변경 수를 반환
+    with _flush_lock:
+        flushed = backend.flush()
+        if flushed:
+            _write_stats["flushes"] += 1
+            _write_stats["flushed"] += flushed
+    return flushed
+
+def get_write_stats():
+    # coalesced: 디스크 기록 없이 다른 변경과 합쳐진 쓰기 횟수
+    with _lock:
+        pending = backend.pending()
+    return {
+        "writes": _write_stats["flushed"] + pending,
+        "flushes": _write_stats["flushes"],
+        "coalesced": _write_stats["flushed"] - _write_stats["flushes"],
+        "pending": pending,
+    }
+
+def _after_write():
+    if backend.pending() >= config.CHECKLIST_FLUSH_THRESHOLD:
+        _wakeup.set()
+
+def snapshot():
+    # 백업 스레드용 checklist 파일 내용 (tinydb만, 나머지 백엔드는 None)
+    return backend.snapshot()
+
+def compact():
+    # journal 백엔드의 저널 → 스냅샷 압축 (다른 백엔드는 아무 일도 하지 않음)
+    if hasattr(backend, "compact"):
+        backend.compact()
+
+def _flush_loop():
+    while True:
+        _wakeup.wait(config.CHECKLIST_FLUSH_INTERVAL)
+        _wakeup.clear()
+        try:
+            flush()
+            backend.maybe_compact()
+        except Exception:
+            log.exception("checklist flush 실패")
+
+def init():
+    # 백엔드 열기(밀린 스키마 마이그레이션 포함) → 인덱스 구축 → flush 스레드 시작
+    global backend
+    if backend is not None:
+        return
+    backend = open_checklist_backend(_lock)
+    build_index()
+    threading.Thread(target=_flush_loop, name="checklist-flush", daemon=True).start()
+    if config.CHECKLIST_WRITE_BEHIND:
+        log.info("✅ checklist 지연 쓰기 활성화", interval=config.CHECKLIST_FLUSH_INTERVAL, threshold=config.CHECKLIST_FLUSH_THRESHOLD)
+    atexit.register(backend.close)
 
 def normalize_task(task):
     if isinstance(task, dict):
@@ -29,30 +144,51 @@ def normalize_task(task):
     elif isinstance(task, str):
         return task
     else:
-        print(f"[경고] 알 수 없는 task 타입: {type(task)} → {task}")
+        log.warning("알 수 없는 task 타입", type=type(task).__name__, task=repr(task))
         return str(task)
     
-def get_today():
-    return datetime.now().strftime("%Y-%m-%d")
+@profiling.traced("storage")
+@metrics.timed(metrics.STORAGE_SECONDS, op="insert")
+def _insert(record):
+    with _lock:
+        record_id = backend.insert(record)
+        added = _index_add(record, record_id)
+        _after_write()
+    if added:
+        _notify([_change(record, 1)])
+
+@profiling.traced("storage")
+@metrics.timed(metrics.STORAGE_SECONDS, op="remove")
+def _remove(user_id, period, date_key, entry):
+    with _lock:
+        record_ids = _index_pop(user_id, period, date_key, entry)
+        if record_ids:
+            backend.remove(record_ids)
+            _after_write()
+    if record_ids:
+        _notify([(user_id, period, date_key, entry, -1)])
 
-def get_week_of_month(date):
-    first_day = date.replace(day=1)
-    adjusted_dom = date.day + first_day.weekday()
-    return int(adjusted_dom / 7) + 1
+def iter_partition(period, date_key):
+    # 한 기간 파티션의 (user_id, 체크 목록) 스냅샷 (카운터 재계산 등 일괄 처리용)
+    with _lock:
+        partition = _partitions.get((period, date_key)) or {}
+        return [(user_id, frozenset(bucket)) for user_id, bucket in partition.items() if bucket]
 
-def get_week_key():
-    now = datetime.now()
-    week_num = get_week_of_month(now)
-    return now.strftime(f"%m-W{week_num}")
+@profiling.traced("storage")
+@metrics.timed(metrics.STORAGE_SECONDS, op="get_user_checks")
+def get_user_checks(user_id, period="daily", date_key=None):
+    # 유저의 해당 기간 체크 목록을 한 번에 조회 (키보드 렌더링용)
+    # daily/weekly → {(game, task)}, event → {(game, event, task)}
+    if date_key is None:
+        date_key = get_period_key(period, user_id=user_id)
+    return frozenset(_user_bucket(user_id, period, date_key) or ())
 
+@profiling.traced("storage")
+@metrics.timed(metrics.STORAGE_SECONDS, op="is_checked")
 def is_checked(user_id, game, task_name, period="daily"):
     task_name = normalize_task(task_name)  # 혹시라도 dict로 넘어온 경우 대비
-    return db.get(
-        (User.user_id == user_id) &
-        (User.game == game) &
-        (User.task == task_name) &
-        (User.period == period)
-    ) is not None
+    bucket = _user_bucket(user_id, period, get_period_key(period, user_id=user_id))
+    return bool(bucket) and (game, task_name) in bucket
 
 def toggle_check(user_id: int, game: str, task: str, period: str = "daily"):
     if is_checked(user_id, game, task, period):
@@ -61,8 +197,8 @@ def toggle_check(user_id: int, game: str, task: str, period: str = "daily"):
         add_check(user_id, game, task, period)
 
 def add_check(user_id: int, game: str, task: str, period: str = "daily"):
-    key = get_today() if period == "daily" else get_week_key()
-    db.insert({
+    key = get_period_key(period, user_id=user_id)
+    _insert({
         "user_id": user_id,
         "period": period,
         "date": key,
@@ -71,45 +207,82 @@ def add_check(user_id: int, game: str, task: str, period: str = "daily"):
     })
 
 def remove_check(user_id: int, game: str, task: str, period: str = "daily"):
-    key = get_today() if period == "daily" else get_week_key()
-    db.remove((User.user_id == user_id) &
-              (User.period == period) &
-              (User.date == key) &
-              (User.game == game) &
-              (User.task == task))
+    key = get_period_key(period, user_id=user_id)
+    _remove(user_id, period, key, (game, task))
 
+@profiling.traced("storage")
+@metrics.timed(metrics.STORAGE_SECONDS, op="complete_all")
 def complete_all(user_id: int, game: str, tasks: list, period: str = "daily"):
-    key = get_today() if period == "daily" else get_week_key()
+    key = get_period_key(period, user_id=user_id)
+    bucket = _user_bucket(user_id, period, key) or {}
+    records = []
     for task in tasks:
         task_name = normalize_task(task)
-        if not is_checked(user_id, game, task_name, period):
-            db.insert({
-                "user_id": user_id,
-                "period": period,
-                "date": key,
-                "game": game,
-                "task": task_name
-            })
+        if (game, task_name) in bucket:
+            continue
+        records.append({
+            "user_id": user_id,
+            "period": period,
+            "date": key,
+            "game": game,
+            "task": task_name
+        })
+    if not records:
+        return
+    # 여러 건을 한 번의 파일 쓰기로 삽입
+    with _lock:
+        record_ids = backend.insert_many(records)
+        added = [record for record, record_id in zip(records, record_ids) if _index_add(record, record_id)]
+        _after_write()
+    _notify([_change(record, 1) for record in added])
+
+def _is_stale(period, date_key, todays, week_keys):
+    # 유저마다 시간대가 달라 '오늘'이 여러 개일 수 있음 → 어느 유저의 현재 기간도 아닌 것만 만료
+    if period == "daily":
+        return date_key not in todays
+    if period == "weekly":
+        return date_key not in week_keys
+    if period == "event":
+        # daily 이벤트는 날짜, once 이벤트는 종료일이 키 → 가장 이른 오늘보다 이전이면 만료
+        return not date_key or date_key < min(todays)
+    return False
 
+@profiling.traced("storage")
+@metrics.timed(metrics.STORAGE_SECONDS, op="purge")
+def purge_stale_partitions(batch_size: int = 500):
+    # 현재 기간이 아닌 파티션을 인덱스에서 떼어낸 뒤, 저장소에서는 나눠서 삭제
+    # (조회는 이미 현재 키만 보므로 삭제가 늦어져도 결과에는 영향 없음)
+    current = clocks()
+    todays = {get_today(clock=clock) for clock in current}
+    week_keys = {get_week_key(clock=clock) for clock in current}
+    with _lock:
+        stale = [key for key in _partitions if _is_stale(key[0], key[1], todays, week_keys)]
+        dropped = [_partitions.pop(key) for key in stale]
+
+    record_ids = [
+        record_id
+        for partition in dropped
+        for bucket in partition.values()
+        for ids in bucket.values()
+        for record_id in ids
+    ]
+    for i in range(0, len(record_ids), batch_size):
+        with _lock:
+            backend.remove(record_ids[i:i + batch_size])
+            _after_write()
+    return len(stale), len(record_ids)
+
+@profiling.traced("storage")
+@metrics.timed(metrics.STORAGE_SECONDS, op="is_event_checked")
 def is_event_checked(user_id: int, game: str, event: str, task: str, date: str):
-    result = db.search((User.user_id == user_id) &
-                       (User.period == "event") &
-                       (User.date == date) &
-                       (User.game == game) &
-                       (User.event == event) &
-                       (User.task == task))
-    return bool(result)
+    bucket = _user_bucket(user_id, "event", date)
+    return bool(bucket) and (game, event, task) in bucket
 
 def toggle_event_check(user_id: int, game: str, event: str, task: str, date: str):
     if is_event_checked(user_id, game, event, task, date):
-        db.remove((User.user_id == user_id) &
-                  (User.period == "event") &
-                  (User.date == date) &
-                  (User.game == game) &
-                  (User.event == event) &
-                  (User.task == task))
+        _remove(user_id, "event", date, (game, event, task))
     else:
-        db.insert({
+        _insert({
             "user_id": user_id,
             "period": "event",
             "date": date,
@@ -117,5 +290,3 @@ def toggle_event_check(user_id: int, game: str, event: str, task: str, date: str
             "event": event,
             "task": task
         })
-
-        
\ No newline at end of file
@@ -0,0 +1,71 @@
+# utils/timewheel.py
+# 유저별 시간대 / 초기화 시각에 맞춘 일일 작업 스케줄 (버킷 타임 휠)
+# - 유저는 Clock(시간대, 초기화 시각)별 버킷으로 묶인다. 같은 버킷은 같은 순간에 날짜가 바뀐다
+# - 스케줄러는 TIMEWHEEL_TICK_MINUTES마다 due(now)를 한 번 호출하고, 지금 현지 시각이 맞는 버킷만 처리
+#   → 초기화 / 아침 알림이 시간대별 작은 배치로 하루에 걸쳐 나뉘어 실행됨 (한 시각에 전체 유저를 처리하지 않음)
+# - 아침 알림은 REMINDER_SPREAD_MINUTES 동안 user_id 기준으로 tick마다 나눠 보냄 (같은 시간대 유저가 많아도 분산)
+# - (종류, 버킷, tick) 단위로 현지 날짜당 한 번만 실행 → 서머타임으로 같은 시각이 두 번 와도 중복 없음
+#   (서머타임으로 건너뛴 시각의 초기화는 날짜 키가 알아서 바뀌고, streak 정리는 다음 날 함께 처리됨)
+# - 스케줄러가 tick을 건너뛰었으면 (앞 tick 처리가 길어졌거나 잠시 멈춤) 마지막으로 처리한 tick 이후의 tick을
+#   모두 차례로 훑어서 그 사이의 초기화 / 알림 배치를 놓치지 않음 (최대 MAX_CATCH_UP까지)
+from datetime import timedelta
+from utils import config
+
+RESET = "reset"
+REMIND = "remind"
+
+MAX_CATCH_UP = timedelta(days=1)
+
+_fired = {}  # (kind, clock, tick index) → 마지막으로 실행한 현지 날짜
+_last_tick = None  # 마지막으로 처리한 tick 시각 (tick 경계로 내림)
+stats = {RESET: 0, REMIND: 0, "buckets": 0}
+
+def _spread_ticks():
+    return max(1, -(-config.REMINDER_SPREAD_MINUTES // config.TIMEWHEEL_TICK_MINUTES))
+
+def _tick_index(local, hour):
+    # 현지 hour시 정각부터 몇 번째 tick인지 (하루 = 1440분 기준으로 순환)
+    minutes = (local.hour * 60 + local.minute - hour * 60) % 1440
+    return minutes // config.TIMEWHEEL_TICK_MINUTES
+
+def _claim(kind, clock, index, local_date):
+    key = (kind, clock, index)
+    if _fired.get(key) == local_date:
+        return False
+    _fired[key] = local_date
+    return True
+
+def _ticks(now):
+    # 이번 호출에서 훑을 tick 시각들: 마지막으로 처리한 tick 다음부터 지금 tick까지
+    global _last_tick
+    step = timedelta(minutes=config.TIMEWHEEL_TICK_MINUTES)
+    current = now.replace(minute=now.minute - now.minute % config.TIMEWHEEL_TICK_MINUTES, second=0, microsecond=0)
+    start = current if _last_tick is None else max(_last_tick + step, current - MAX_CATCH_UP)
+    ticks = []
+    while start <= current:
+        ticks.append(start)
+        start += step
+    _last_tick = max(current, _last_tick or current)
+    return ticks or [current]  # 같은 tick에 다시 불려도 _claim이 중복 실행을 막음
+
+def due(now, buckets):
+    # now: tz 정보가 있는 현재 시각, buckets: Clock → [user_id] (users.users_by_clock())
+    # → [(kind, clock, [user_id])] 이번 tick(과 건너뛴 tick)에 처리할 배치 (초기화가 알림보다 먼저)
+    resets, reminders = [], []
+    spread = _spread_ticks()
+    stats["buckets"] = sum(1 for user_ids in buckets.values() if user_ids)
+    for tick in _ticks(now):
+        for clock, user_ids in buckets.items():
+            if not user_ids:
+                continue
+            local = tick.astimezone(clock.tz)
+            if _tick_index(local, clock.reset_hour) == 0 and _claim(RESET, clock, 0, local.date()):
+                resets.append((RESET, clock, user_ids))
+            index = _tick_index(local, config.REMINDER_HOUR)
+            if index < spread and _claim(REMIND, clock, index, local.date()):
+                batch = [user_id for user_id in user_ids if user_id % spread == index]
+                if batch:
+                    reminders.append((REMIND, clock, batch))
+    stats[RESET] += len(resets)
+    stats[REMIND] += len(reminders)
+    return resets + reminders
@@ -0,0 +1,60 @@
+# utils/updates.py
+# 업데이트 동시 처리 + 유저별 직렬화
+# - 서로 다른 유저의 업데이트는 동시에 처리 (한 유저가 느려도 다른 유저는 기다리지 않음)
+# - 같은 유저의 업데이트는 들어온 순서대로 하나씩 처리 → 체크 토글 / 대화 단계가 뒤섞이지 않음
+# - 유저별 대기열: 처리 중인 유저의 업데이트가 또 오면 대기열에 넣고 슬롯(semaphore)을 바로 반납,
+#   맨 앞 업데이트를 처리하던 쪽이 대기열을 이어서 처리 → 한 유저는 슬롯을 최대 1개만 차지
+#   (한 유저가 업데이트를 몰아 보내도 다른 유저의 슬롯을 막지 않음)
+from collections import deque
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+from utils import log
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    __slots__ = ("_queues",)
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        self._queues = {}  # user_id → deque[처리 중 + 대기 중 coroutine] (비면 정리)
+
+    def _key(self, update):
+        if isinstance(update, Update):
+            if update.effective_user is not None:
+                return update.effective_user.id
+            if update.effective_chat is not None:
+                return ("chat", update.effective_chat.id)
+        return None
+
+    async def do_process_update(self, update, coroutine):
+        key = self._key(update)
+        if key is None:
+            await coroutine
+            return
+        queue = self._queues.get(key)
+        if queue is not None:
+            # 이 유저의 업데이트를 이미 처리 중 → 줄만 세우고 슬롯 반납 (await 없이 바로 리턴)
+            queue.append(coroutine)
+            return
+        queue = self._queues[key] = deque([coroutine])
+        try:
+            while queue:
+                try:
+                    await queue[0]
+                except Exception:
+                    # 뒤에 줄 선 업데이트는 계속 처리 (PTB가 핸들러 예외는 이미 error handler로 넘김)
+                    log.exception("❌ 업데이트 처리 실패", user=str(key))
+                finally:
+                    queue.popleft()
+        finally:
+            self._queues.pop(key, None)
+            for pending in queue:  # 취소(종료)된 경우 남은 coroutine 정리
+                pending.close()
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        self._queues.clear()
+
+    def active_users(self):
+        return len(self._queues)
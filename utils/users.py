@@ -1,40 +1,106 @@
 # utils/users.py
-from datetime import datetime
-from tinydb import TinyDB, Query
-from utils.backup import load_or_restore_db
+from datetime import date, timedelta
+from pytz import all_timezones_set
+from utils.backends import open_user_backend
+from utils.periods import Clock, DEFAULT_CLOCK, get_today, set_clock, custom_clocks
+from utils import profiling, log
 
-db = load_or_restore_db("/data/users.json")
-User = Query()
+# 유저 백엔드 (STORAGE_BACKEND=tinydb | sqlite), 기동 시 init()에서 연다
+backend = None
 
+def init():
+    global backend
+    if backend is None:
+        backend = open_user_backend()
+        _load_clocks()
+
+def _load_clocks():
+    # 유저별 시간대 / 초기화 시각을 periods에 등록 (날짜 키 계산은 매번 메모리에서)
+    settings = backend.all_settings()
+    for user_id, (tz_name, reset_hour) in settings.items():
+        set_clock(user_id, _make_clock(tz_name, reset_hour))
+    if settings:
+        log.info("✅ 유저별 시간대 설정 로드", users=len(settings))
+
+def _make_clock(tz_name, reset_hour):
+    # 저장된 값이 잘못되었으면 기본값으로
+    if tz_name not in all_timezones_set:
+        tz_name = DEFAULT_CLOCK.timezone
+    if not isinstance(reset_hour, int) or not 0 <= reset_hour <= 23:
+        reset_hour = DEFAULT_CLOCK.reset_hour
+    return Clock(tz_name, reset_hour)
+
+def snapshot():
+    # 백업 스레드용 users 파일 내용 (sqlite면 None → DB 전체 백업에 포함)
+    return backend.snapshot()
+
+@profiling.traced("storage")
 def get_all_users():
-    return [entry['user_id'] for entry in db.all() if 'user_id' in entry]
+    return backend.all_user_ids()
 
+@profiling.traced("storage")
 def add_user(user_id: int):
-    if not db.search(User.user_id == user_id):
-        db.insert({
+    if backend.get(user_id) is None:
+        backend.insert({
             "user_id": user_id,
             "day_streak": 0,
             "last_day_complete": None
         })
 
+@profiling.traced("storage")
 def get_day_streak(user_id: int):
-    result = db.search(User.user_id == user_id)
-    if result and isinstance(result[0], dict):
-        return result[0].get("day_streak", 0)
+    user = backend.get(user_id)
+    if user:
+        return user.get("day_streak", 0)
     return 0
 
-def update_day_complete(user_id: int):
-    today = datetime.now().strftime("%Y-%m-%d")
-    result = db.search(User.user_id == user_id)
-    if result:
-        last_day = result[0].get("last_day_complete")
+@profiling.traced("storage")
+def set_clock_settings(user_id: int, tz_name: str = None, reset_hour: int = None):
+    # 시간대 / 초기화 시각 변경 (None인 값은 그대로). 잘못된 값이면 ValueError
+    if tz_name is not None and tz_name not in all_timezones_set:
+        raise ValueError(f"알 수 없는 시간대: {tz_name}")
+    if reset_hour is not None and not 0 <= reset_hour <= 23:
+        raise ValueError(f"초기화 시각은 0~23 사이여야 합니다: {reset_hour}")
+    add_user(user_id)
+    user = backend.get(user_id)
+    tz_name = tz_name or user.get("timezone")
+    reset_hour = user.get("reset_hour") if reset_hour is None else reset_hour
+    backend.update(user_id, {"timezone": tz_name, "reset_hour": reset_hour})
+    clock = _make_clock(tz_name, reset_hour)
+    set_clock(user_id, clock)
+    return clock
+
+def users_by_clock():
+    # Clock → [user_id] (설정하지 않은 유저는 DEFAULT_CLOCK 묶음)
+    custom = custom_clocks()
+    groups = {DEFAULT_CLOCK: []}
+    for user_id in get_all_users():
+        groups.setdefault(custom.get(user_id, DEFAULT_CLOCK), []).append(user_id)
+    return groups
+
+@profiling.traced("storage")
+def update_day_complete(user_id: int, today: str = None):
+    # 오늘 처음 완료하면 streak 갱신: 어제도 완료했으면 +1, 하루라도 빠졌으면 1부터 다시
+    today = today or get_today(user_id=user_id)
+    user = backend.get(user_id)
+    if user:
+        last_day = user.get("last_day_complete")
         if last_day == today:
-            return result[0]["day_streak"]  # 이미 갱신됨
+            return user["day_streak"]  # 이미 갱신됨
 
-        new_streak = result[0].get("day_streak", 0) + 1
-        db.update({
+        yesterday = (date.fromisoformat(today) - timedelta(days=1)).isoformat()
+        new_streak = user.get("day_streak", 0) + 1 if last_day == yesterday else 1
+        backend.update(user_id, {
             "day_streak": new_streak,
             "last_day_complete": today
-        }, User.user_id == user_id)
+        })
         return new_streak
     return 0
+
+@profiling.traced("storage")
+def reset_missed_streaks(today: str = None, user_ids=None):
+    # 날짜가 바뀐 직후 한 번: 어제 완료하지 못한 유저들의 streak를 일괄 초기화
+    # user_ids: 같은 시각에 날짜가 바뀐 유저 묶음 (today는 그 유저들 기준 날짜), None이면 전체
+    today = today or get_today()
+    yesterday = (date.fromisoformat(today) - timedelta(days=1)).isoformat()
+    return backend.reset_streaks(yesterday, user_ids)
@@ -0,0 +1,142 @@
+# utils/webhook.py
+# 웹훅 모드: 기존 aiohttp 서버(8080)에 텔레그램 업데이트 수신 경로를 붙인다
+# - X-Telegram-Bot-Api-Secret-Token 헤더가 WEBHOOK_SECRET과 같을 때만 받아들임
+# - 받은 업데이트는 Application.update_queue에 바로 넣고 200 응답 (처리는 봇 루프에서)
+#
+# 오프라인 테스트용 가짜 텔레그램 발신기:
+#   python -m utils.webhook "/start" --user 1234 --secret <봇의 WEBHOOK_SECRET> [--url http://127.0.0.1:8080/telegram] [--callback d1a2b3.0.0]
+# 실제 텔레그램 서버 대신 같은 형식의 업데이트 JSON을 만들어 비밀 토큰 헤더와 함께 POST 한다.
+# 봇과 다른 프로세스이므로 비밀 토큰은 --secret 또는 WEBHOOK_SECRET 환경변수로 반드시 지정
+# (WEBHOOK_SECRET 없이 기동한 봇은 프로세스마다 임의 값을 쓰므로 발신기가 알 수 없음 → 봇도 WEBHOOK_SECRET을 지정해 실행)
+import os
+import sys
+import hmac
+import json
+import time
+import asyncio
+import itertools
+import aiohttp
+from aiohttp import web
+from telegram import Update
+from utils import config, log
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+stats = {"received": 0, "rejected": 0, "invalid": 0}
+
+def mount(web_app: web.Application, application, path=None, secret=None):
+    # web_app: aiohttp 앱 / application: telegram.ext.Application
+    path = path or config.WEBHOOK_PATH
+    secret = secret or config.WEBHOOK_SECRET
+
+    async def handle_update(request):
+        token = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(token.encode(), secret.encode()):
+            stats["rejected"] += 1
+            return web.Response(status=403, text="forbidden")
+        try:
+            data = await request.json()
+            update = Update.de_json(data, application.bot)
+        except Exception as e:
+            stats["invalid"] += 1
+            log.warning("[웹훅] 잘못된 업데이트 무시", error=str(e))
+            return web.Response(status=400, text="bad request")
+        stats["received"] += 1
+        await application.update_queue.put(update)
+        return web.Response(text="ok")
+
+    web_app.router.add_post(path, handle_update)
+    log.info("[웹훅] 업데이트 수신 경로 등록", path=path)
+
+async def register(application, base_url=None, path=None, secret=None):
+    # 텔레그램에 웹훅 주소 + 비밀 토큰 등록 (기동할 때마다 호출 → 비밀 토큰이 바뀌어도 안전)
+    url = (base_url or config.WEBHOOK_URL).rstrip("/") + (path or config.WEBHOOK_PATH)
+    await application.bot.set_webhook(
+        url=url,
+        secret_token=secret or config.WEBHOOK_SECRET,
+        allowed_updates=Update.ALL_TYPES,
+    )
+    log.info("[웹훅] 등록 완료", url=url)
+
+# ---- 가짜 텔레그램 발신기 (오프라인 테스트용) ----
+
+_update_ids = itertools.count(int(time.time()))
+
+def _user(user_id):
+    return {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"}
+
+def fake_message_update(user_id: int, text: str, chat_id=None):
+    # 개인 채팅에서 보낸 텍스트 메시지 (명령어면 bot_command entity 포함)
+    update_id = next(_update_ids)
+    message = {
+        "message_id": update_id,
+        "date": int(time.time()),
+        "chat": {"id": chat_id or user_id, "type": "private"},
+        "from": _user(user_id),
+        "text": text,
+    }
+    if text.startswith("/"):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return {"update_id": update_id, "message": message}
+
+def fake_callback_update(user_id: int, data: str, message_id=1, chat_id=None):
+    # 인라인 키보드 버튼 탭
+    update_id = next(_update_ids)
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": _user(user_id),
+            "chat_instance": str(chat_id or user_id),
+            "data": data,
+            "message": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id or user_id, "type": "private"},
+                "text": "checklist",
+            },
+        },
+    }
+
+async def send_fake_update(update: dict, url=None, secret=None, session=None):
+    # 웹훅 경로로 업데이트를 POST 하고 (상태 코드, 응답 본문) 반환
+    # secret을 생략하면 이 프로세스의 config.WEBHOOK_SECRET (봇과 같은 프로세스에서 부를 때만 맞음)
+    url = url or f"http://127.0.0.1:8080{config.WEBHOOK_PATH}"
+    headers = {SECRET_HEADER: secret or config.WEBHOOK_SECRET}
+    if session is None:
+        async with aiohttp.ClientSession() as own_session:
+            return await send_fake_update(update, url, secret, own_session)
+    async with session.post(url, json=update, headers=headers) as resp:
+        return resp.status, await resp.text()
+
+def _main(argv):
+    args = list(argv)
+    def option(name, default=None):
+        if name in args:
+            i = args.index(name)
+            value = args[i + 1]
+            del args[i:i + 2]
+            return value
+        return default
+
+    user_id = int(option("--user", "1"))
+    url = option("--url")
+    callback = option("--callback")
+    secret = option("--secret") or os.getenv("WEBHOOK_SECRET")
+    if not secret:
+        print(
+            "❌ 봇의 비밀 토큰을 --secret 또는 WEBHOOK_SECRET 환경변수로 지정해주세요.\n"
+            "사용법: python -m utils.webhook \"/start\" --user 1234 --secret <WEBHOOK_SECRET> "
+            "[--url http://127.0.0.1:8080/telegram] [--callback <데이터>]",
+            file=sys.stderr,
+        )
+        sys.exit(2)
+    if callback:
+        update = fake_callback_update(user_id, callback)
+    else:
+        update = fake_message_update(user_id, " ".join(args) or "/start")
+    status, body = asyncio.run(send_fake_update(update, url, secret))
+    print(f"{status} {body}\n{json.dumps(update, ensure_ascii=False)}")
+
+if __name__ == "__main__":
+    _main(sys.argv[1:])